@@ -1,456 +1,667 @@
-"""CSC148 Assignment 1 - Algorithms
-
-=== CSC148 Fall 2018 ===
-Department of Computer Science,
-University of Toronto
-
-=== Module Description ===
-
-This file contains two sets of algorithms: ones for generating new arrivals to
-the simulation, and ones for making decisions about how elevators should move.
-
-As with other files, you may not change any of the public behaviour (attributes,
-methods) given in the starter code, but you can definitely add new attributes
-and methods to complete your work here.
-
-See the 'Arrival generation algorithms' and 'Elevator moving algorithsm'
-sections of the assignment handout for a complete description of each algorithm
-you are expected to implement in this file.
-"""
-import csv
-from enum import Enum
-import random
-from typing import Dict, List, Optional
-
-from entities import Person, Elevator
-
-
-###############################################################################
-# Arrival generation algorithms
-###############################################################################
-class ArrivalGenerator:
-    """An algorithm for specifying arrivals at each round of the simulation.
-
-    === Attributes ===
-    max_floor: The maximum floor number for the building.
-               Generated people should not have a starting or target floor
-               beyond this floor.
-    num_people: The number of people to generate, or None if this is left
-                up to the algorithm itself.
-
-    === Representation Invariants ===
-    max_floor >= 2
-    num_people is None or num_people >= 0
-    """
-    max_floor: int
-    num_people: Optional[int]
-
-    def __init__(self, max_floor: int, num_people: Optional[int]) -> None:
-        """Initialize a new ArrivalGenerator.
-
-        Preconditions:
-            max_floor >= 2
-            num_people is None or num_people >= 0
-        """
-        self.max_floor = max_floor
-        self.num_people = num_people
-
-    def generate(self, round_num: int) -> Dict[int, List[Person]]:
-        """Return the new arrivals for the simulation at the given round.
-
-        The returned dictionary maps floor number to the people who
-        arrived starting at that floor.
-
-        You can choose whether to include floors where no people arrived.
-        """
-        raise NotImplementedError
-
-
-class RandomArrivals(ArrivalGenerator):
-    """Generate a fixed number of random people each round.
-
-    Generate 0 people if self.num_people is None.
-
-    For our testing purposes, this class *must* have the same initializer header
-    as ArrivalGenerator. So if you choose to to override the initializer, make
-    sure to keep the header the same!
-
-    Hint: look up the 'sample' function from random.
-    """
-
-    def __init__(self, max_floor: int, num_people: Optional[int]) -> None:
-
-        ArrivalGenerator.__init__(self, max_floor, num_people)
-
-    def generate(self, round_num: int) -> Optional[Dict[int, List[Person]]]:
-        """Randomly generates num_people for the given round_num
-
-        Returns a list containing the floors in the simulation and
-        the people (if any) that have just arrived on that floor
-        """
-
-        #If the number of people to generate is not None
-        if self.num_people is not None:
-
-            arrivals = {}
-
-            #Add a key to arrivals for every floor starting at 1 to max_floor
-            for i in range(1, self.max_floor+1):
-                neww = {i: []}
-                arrivals.update(neww)
-
-            pop = []
-
-            #populate pop with all possible floor numbers
-            for j in range(1, self.max_floor + 1):
-                pop.append(j)
-
-            #generate num_people people
-            for i in range(0, self.num_people):
-
-                neww = random.sample(pop, 2)
-                start = neww[0]
-                target = neww[1]
-                new = Person(start, target)
-                arrivals[start].append(new)
-            return arrivals
-        else:
-            return None
-
-
-class FileArrivals(ArrivalGenerator):
-    """Generate arrivals from a CSV file.
-
-    Attributes:
-        arrivals: a dictionary containing the arrivals to be generated in
-            every round
-    """
-    arrivals: Dict[int, Person]
-
-    def __init__(self, max_floor: int, filename: str) -> None:
-        """Initialize a new FileArrivals algorithm from the given file.
-
-        The num_people attribute of every FileArrivals instance is set to None,
-        since the number of arrivals depends on the given file.
-
-        Precondition:
-            <filename> refers to a valid CSV file, following the specified
-            format and restrictions from the assignment handout.
-        """
-        ArrivalGenerator.__init__(self, max_floor, None)
-        self.arrivals = {}
-
-        # We've provided some of the "reading from csv files" boilerplate code
-        # for you to help you get started.
-        with open(filename) as csvfile:
-            reader = csv.reader(csvfile)
-
-            for line in reader:
-
-                ln = int(line[0])
-                self.arrivals[ln] = []
-
-                #instantiate all people for the simulation
-                for i in range(1, len(line)-1, 2):
-                    new_person = Person(int(line[i]), int(line[i+1]))
-
-                    self.arrivals[ln].append(new_person)
-                    #self.arrivals[ln].append(int(line[i+1]))
-
-
-
-    def generate(self, round_num: int) -> Dict[int, Person]:
-        """Generates the new arrivals for the given round_num
-        from self.arrivals"""
-
-        new_arrivals = {}
-
-        # Add a key to arrivals for every floor starting at 1 to max_floor
-        for i in range(1, self.max_floor+1):
-            neww = {i: []}
-            new_arrivals.update(neww)
-
-        #If there are people to be generated this round according to the file
-        if round_num in self.arrivals:
-
-            for i in range(0, len(self.arrivals[round_num])):
-
-                new_person = self.arrivals[round_num][i]
-                new_arrivals[new_person.start].append(new_person)
-
-        return new_arrivals
-
-
-
-
-
-###############################################################################
-# Elevator moving algorithms
-###############################################################################
-class Direction(Enum):
-    """
-    The following defines the possible directions an elevator can move.
-    This is output by the simulation's algorithms.
-
-    The possible values you'll use in your Python code are:
-        Direction.UP, Direction.DOWN, Direction.STAY
-    """
-    UP = 1
-    STAY = 0
-    DOWN = -1
-
-
-class MovingAlgorithm:
-    """An algorithm to make decisions for moving an elevator at each round.
-    """
-    def move_elevators(self,
-                       elevators: List[Elevator],
-                       waiting: Dict[int, List[Person]],
-                       max_floor: int) -> List[Direction]:
-        """Return a list of directions for each elevator to move to.
-
-        As input, this method receives the list of elevators in the simulation,
-        a dictionary mapping floor number to a list of people waiting on
-        that floor, and the maximum floor number in the simulation.
-
-        Note that each returned direction should be valid:
-            - An elevator at Floor 1 cannot move down.
-            - An elevator at the top floor cannot move up.
-        """
-        raise NotImplementedError
-
-
-class RandomAlgorithm(MovingAlgorithm):
-    """A moving algorithm that randomly determines which direction an
-    elevator should move (Up, down, or stay on the same floor
-    """
-
-
-    def move_elevators(self,
-                       elevators: List[Elevator],
-                       waiting: Dict[int, List[Person]],
-                       max_floor: int) -> List[Direction]:
-
-        """Takes the number of elevators in the simulation, a dictionary
-        of the people waiting and the max floor, and returns a list containing
-        the direction each elevator should move.
-
-        Determines the direction each elevator should move randomly"""
-        directions = []
-        for elevator in elevators:
-
-            #If the elevator is on the first floor, either go up or stay
-            if elevator.current_floor == 1:
-                move = random.randint(0, 1)
-
-            #if the elevator is on the max floor, either stay or go down
-            elif elevator.current_floor == max_floor:
-                move = random.randint(-1, 0)
-
-            #otherwise, it can move up, down or stay
-            else:
-                move = random.randint(-1, 1)
-            elevator.current_floor += move
-
-            #Append the appropriate command to directions
-            if move == 0:
-                directions.append(Direction.STAY)
-            elif move == 1:
-                directions.append(Direction.UP)
-            else:
-                directions.append(Direction.DOWN)
-        return directions
-
-
-
-
-
-
-
-
-
-
-
-
-class PushyPassenger(MovingAlgorithm):
-    """A moving algorithm that preferences the first passenger on each elevator.
-
-    If the elevator is empty, it moves towards the *lowest* floor that has at
-    least one person waiting, or stays still if there are no people waiting.
-
-    If the elevator isn't empty, it moves towards the target floor of the
-    *first* passenger who boarded the elevator.
-    """
-
-    def move_elevators(self,
-                       elevators: List[Elevator],
-                       waiting: Dict[int, List[Person]],
-                       max_floor: int) -> List[Direction]:
-
-        """Takes the number of elevators in the simulation, a dictionary
-        of the people waiting and the max floor, and returns a list containing
-        the direction each elevator should move
-
-        Determines the direction each elevator in the simulation should move
-        based on the PushyPassenger description above"""
-
-        direction = []
-
-        #For every elevator in the simulation
-        for elevator in elevators:
-
-            #If the elevator has passengers
-            if len(elevator.passengers) > 0:
-
-                #Take the first passenger (the one that has been on longest)
-                passenger = elevator.passengers[0]
-
-                #If the passenger's target is above the current floor, go up
-                if passenger.target > elevator.current_floor:
-                    move = Direction.UP
-                    elevator.current_floor += 1
-
-                #If the passenger's target is below the current floor, go down
-                else:
-                    move = Direction.DOWN
-                    elevator.current_floor += -1
-
-            #If the elevator is empty
-            else:
-
-                p_waiting = False #Becomes T if people are waiting
-                for i in range(1, max_floor+1):
-                    length = len(waiting[i])
-                    difference = elevator.current_floor - i
-
-                    # if someone is waiting on floor i, and i is < current floor
-                    if length > 0 and difference > 0:
-                        p_waiting = True
-                        move = Direction.DOWN
-                        elevator.current_floor += -1
-                        break
-
-                    #if someone is waiting at floor i and i is > current floor
-                    elif difference < 0 < length:
-                        move = Direction.UP
-                        p_waiting = True
-                        elevator.current_floor += 1
-                        break
-
-                #If no one is waiting in the simulation, elevator stays
-                if p_waiting is False:
-                    move = Direction.STAY
-            direction.append(move)
-        return direction
-
-
-class ShortSighted(MovingAlgorithm):
-    """A moving algorithm that preferences the closest possible choice.
-
-    If the elevator is empty, it moves towards the *closest* floor that has at
-    least one person waiting, or stays still if there are no people waiting.
-
-    If the elevator isn't empty, it moves towards the closest target floor of
-    all passengers who are on the elevator.
-
-    In this case, the order in which people boarded does *not* matter.
-    """
-
-    def move_elevators(self,
-                       elevators: List[Elevator],
-                       waiting: Dict[int, List[Person]],
-                       max_floor: int) -> List[Direction]:
-
-        """Takes the number of elevators in the simulation, a dictionary
-        of the people waiting and the max floor, and returns a list containing
-        the direction each elevator should move
-
-        Determines the direction each elevator in the simulation should move
-        based on the ShortSighted description above"""
-
-        direction = []
-        waiters = False
-
-        #Checks to see if there are any people waiting anywhere in the sim
-        for j in range(1, len(waiting)+1):
-            if len(waiting[j]) > 0:
-                waiters = True
-                break
-
-
-        for elevator in elevators:
-
-            #a value guaranteed to be further than any other value
-            closest = max_floor*3
-
-
-            #if the elevator has no passengers
-            if len(elevator.passengers) <= 0 and waiters:
-
-                for i in range(1, len(waiting)+1):
-
-                    #if floor i is closer than closest
-                    if abs(closest-elevator.current_floor) >= \
-                            abs(i-elevator.current_floor) and \
-                            len(waiting[i]) > 0:
-                        closest = i
-
-                    #if floor i is equidistiance to closest but lower
-                    elif abs(closest-elevator.current_floor) == \
-                            abs(i-elevator.current_floor) \
-                            and len(waiting[i]) > 0\
-                            and closest-elevator.current_floor > 0:
-
-                        closest = i
-
-            #if no one is waiting and elevator is empty
-            elif len(elevator.passengers) <= 0 and not waiters:
-                closest = elevator.current_floor
-
-
-            #if the elevator has passenger(s)
-            else:
-
-                closest = elevator.passengers[0].target
-
-                for passenger in elevator.passengers:
-
-                    #if passenger's target is closer than closest
-                    if abs(closest - elevator.current_floor) > abs(
-                            passenger.target - elevator.current_floor):
-                        closest = passenger.target
-
-                    #if passenger's target is closer than closest and lower
-                    elif abs(closest - elevator.current_floor) == abs(
-                            passenger.target - elevator.current_floor)\
-                            and passenger.target - elevator.current_floor < 0:
-                        closest = passenger.target
-
-            #if the closest floor is lower than the current floor, go down
-            if elevator.current_floor - closest > 0:
-                direction.append(Direction.DOWN)
-                elevator.current_floor += -1
-
-            #if closest is above current floor, go up
-            elif elevator.current_floor - closest < 0:
-                direction.append(Direction.UP)
-                elevator.current_floor += 1
-
-            #Otherwise, don't move
-            else:
-                direction.append(Direction.STAY)
-
-        return direction
-
-
-
-if __name__ == '__main__':
-    # Don't forget to check your work regularly with python_ta!
-    import python_ta
-    python_ta.check_all(config={
-        'allowed-io': ['__init__'],
-        'extra-imports': ['entities', 'random', 'csv', 'enum'],
-        'max-nested-blocks': 4,
-        'max-attributes': 12,
-        'disable': ['R0201']
-    })
+"""CSC148 Assignment 1 - Algorithms
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains two sets of algorithms: ones for generating new arrivals to
+the simulation, and ones for making decisions about how elevators should move.
+
+As with other files, you may not change any of the public behaviour (attributes,
+methods) given in the starter code, but you can definitely add new attributes
+and methods to complete your work here.
+
+See the 'Arrival generation algorithms' and 'Elevator moving algorithsm'
+sections of the assignment handout for a complete description of each algorithm
+you are expected to implement in this file.
+"""
+import bisect
+import csv
+from enum import Enum
+import gzip
+import lzma
+import random
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from entities import Person, Elevator
+from hall_calls import HallCalls
+
+
+###############################################################################
+# Arrival generation algorithms
+###############################################################################
+class ArrivalGenerator:
+    """An algorithm for specifying arrivals at each round of the simulation.
+
+    === Attributes ===
+    max_floor: The maximum floor number for the building.
+               Generated people should not have a starting or target floor
+               beyond this floor.
+    num_people: The number of people to generate, or None if this is left
+                up to the algorithm itself.
+
+    === Representation Invariants ===
+    max_floor >= 2
+    num_people is None or num_people >= 0
+    """
+    max_floor: int
+    num_people: Optional[int]
+
+    def __init__(self, max_floor: int, num_people: Optional[int]) -> None:
+        """Initialize a new ArrivalGenerator.
+
+        Preconditions:
+            max_floor >= 2
+            num_people is None or num_people >= 0
+        """
+        self.max_floor = max_floor
+        self.num_people = num_people
+
+    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+        """Return the new arrivals for the simulation at the given round.
+
+        The returned dictionary maps floor number to the people who
+        arrived starting at that floor.
+
+        You can choose whether to include floors where no people arrived.
+        """
+        raise NotImplementedError
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round from <round_num> on in which someone may
+        arrive, or None if nobody ever arrives from <round_num> on.
+
+        The simulation skips straight to this round when its building is
+        empty, without calling generate for the rounds in between, so every
+        skipped round must have no arrivals and must not change this
+        generator's state (such as the random numbers it draws). By default
+        every round may have arrivals, and nothing is skipped.
+        """
+        return round_num
+
+    def get_state(self) -> Any:
+        """Return how far this generator has got, as built-in values that
+        can be pickled, for a Simulation checkpoint.
+
+        By default a generator has no state: what it generates only depends
+        on the round number and the random module.
+        """
+        return None
+
+    def set_state(self, state: Any) -> None:
+        """Pick up from <state>, returned by get_state on a generator made
+        with the same arguments as this one.
+        """
+
+    def close(self) -> None:
+        """Release any file this generator reads from.
+
+        Simulation.run calls this at its end, so a generator reading a file
+        is only good for one run. By default there is nothing to release.
+        """
+
+
+class RandomArrivals(ArrivalGenerator):
+    """Generate a fixed number of random people each round.
+
+    Generate 0 people if self.num_people is None.
+
+    For our testing purposes, this class *must* have the same initializer header
+    as ArrivalGenerator. So if you choose to to override the initializer, make
+    sure to keep the header the same!
+
+    Hint: look up the 'sample' function from random.
+
+    === Attributes ===
+    rng: the random number generator people are drawn from, or None to
+         draw them from the random module
+    """
+    rng: Optional[random.Random]
+
+    def __init__(self, max_floor: int, num_people: Optional[int]) -> None:
+
+        ArrivalGenerator.__init__(self, max_floor, num_people)
+        self.rng = None
+
+    def generate(self, round_num: int) -> Optional[Dict[int, List[Person]]]:
+        """Randomly generates num_people for the given round_num
+
+        Returns a list containing the floors in the simulation and
+        the people (if any) that have just arrived on that floor
+        """
+
+        #If the number of people to generate is not None
+        if self.num_people is not None:
+            rng = random if self.rng is None else self.rng
+
+            arrivals = {}
+
+            #Add a key to arrivals for every floor starting at 1 to max_floor
+            for i in range(1, self.max_floor+1):
+                neww = {i: []}
+                arrivals.update(neww)
+
+            pop = []
+
+            #populate pop with all possible floor numbers
+            for j in range(1, self.max_floor + 1):
+                pop.append(j)
+
+            #generate num_people people
+            for i in range(0, self.num_people):
+
+                neww = rng.sample(pop, 2)
+                start = neww[0]
+                target = neww[1]
+                new = Person(start, target)
+                arrivals[start].append(new)
+            return arrivals
+        else:
+            return None
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return round_num if people arrive every round, or None if nobody
+        ever arrives.
+        """
+        if self.num_people:
+            return round_num
+        return None
+
+    def get_state(self) -> Any:
+        """Return the state of rng, or None if people are drawn from the
+        random module (whose state a checkpoint saves anyway).
+        """
+        if self.rng is None:
+            return None
+        return self.rng.getstate()
+
+    def set_state(self, state: Any) -> None:
+        """Restore the state of rng from <state>."""
+        if state is not None:
+            self.rng.setstate(state)
+
+
+class FileArrivals(ArrivalGenerator):
+    """Generate arrivals from a CSV file.
+
+    Attributes:
+        arrivals: a dictionary containing the arrivals to be generated in
+            every round
+
+    === Private Attributes ===
+    _rounds: the rounds in arrivals in which someone arrives, in order
+    """
+    arrivals: Dict[int, Person]
+    _rounds: List[int]
+
+    def __init__(self, max_floor: int, filename: str) -> None:
+        """Initialize a new FileArrivals algorithm from the given file.
+
+        The num_people attribute of every FileArrivals instance is set to None,
+        since the number of arrivals depends on the given file.
+
+        The file may be gzip or xz compressed (see open_arrivals_file).
+
+        Precondition:
+            <filename> refers to a valid CSV file, following the specified
+            format and restrictions from the assignment handout.
+        """
+        ArrivalGenerator.__init__(self, max_floor, None)
+        self.arrivals = {}
+
+        # We've provided some of the "reading from csv files" boilerplate code
+        # for you to help you get started.
+        with open_arrivals_file(filename) as csvfile:
+            reader = csv.reader(csvfile)
+
+            for line in reader:
+
+                ln = int(line[0])
+                self.arrivals[ln] = []
+
+                #instantiate all people for the simulation
+                for i in range(1, len(line)-1, 2):
+                    new_person = Person(int(line[i]), int(line[i+1]))
+
+                    self.arrivals[ln].append(new_person)
+                    #self.arrivals[ln].append(int(line[i+1]))
+
+        self._rounds = sorted(ln for ln, people in self.arrivals.items()
+                              if people)
+
+
+    def generate(self, round_num: int) -> Dict[int, Person]:
+        """Generates the new arrivals for the given round_num
+        from self.arrivals"""
+
+        new_arrivals = {}
+
+        # Add a key to arrivals for every floor starting at 1 to max_floor
+        for i in range(1, self.max_floor+1):
+            neww = {i: []}
+            new_arrivals.update(neww)
+
+        #If there are people to be generated this round according to the file
+        if round_num in self.arrivals:
+
+            for i in range(0, len(self.arrivals[round_num])):
+
+                new_person = self.arrivals[round_num][i]
+                new_arrivals[new_person.start].append(new_person)
+
+        return new_arrivals
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round from round_num on with arrivals in the
+        file, or None if there is none.
+        """
+        i = bisect.bisect_left(self._rounds, round_num)
+        if i == len(self._rounds):
+            return None
+        return self._rounds[i]
+
+
+class StreamingFileArrivals(ArrivalGenerator):
+    """Generate arrivals from a CSV file, reading it as the simulation runs.
+
+    The file has the same format as for FileArrivals, and may be gzip or xz
+    compressed. Instead of loading the whole file up front, each call to
+    generate reads forward just far enough for the requested round, and people
+    are only created for the round being generated. Memory is bounded by the
+    look-ahead window rather than by the length of the file.
+
+    Unlike FileArrivals, several lines for the same round add up instead of
+    replacing each other.
+
+    === Attributes ===
+    lookahead: how many rounds past the current one may be buffered; lines
+               can appear out of round order by at most this many rounds
+
+    === Private Attributes ===
+    _filename: the name of the arrivals file
+    _file: the open arrivals file, or None once it has been read to the end
+    _lines: the CSV reader over _file
+    _next: the next line read from the file that is not buffered yet, as its
+           round and its (start, target) pairs, or None if there is none
+    _pending: the (start, target) pairs read for each buffered round
+    _round: the last round generated, or -1 before the first one
+
+    === Representation Invariants ===
+    lookahead >= 0
+    every key of _pending is in the range (_round, _round + lookahead + 1]
+    """
+    lookahead: int
+    _filename: str
+    _file: Optional[TextIO]
+    _lines: Iterator[List[str]]
+    _next: Optional[Tuple[int, List[Tuple[int, int]]]]
+    _pending: Dict[int, List[Tuple[int, int]]]
+    _round: int
+
+    def __init__(self, max_floor: int, filename: str,
+                 lookahead: int = 0) -> None:
+        """Initialize a new StreamingFileArrivals reading from <filename>.
+
+        Only the first line of the file is read here.
+
+        Preconditions:
+            <filename> refers to a valid CSV file, following the specified
+            format and restrictions from the assignment handout.
+            lookahead >= 0
+        """
+        ArrivalGenerator.__init__(self, max_floor, None)
+        self.lookahead = lookahead
+        self._filename = filename
+        self._file = open_arrivals_file(filename)
+        self._lines = csv.reader(self._file)
+        self._pending = {}
+        self._round = -1
+        self._next = self._read_line()
+
+    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+        """Generate the new arrivals for the given round_num, reading the
+        file forward as needed.
+
+        Arrivals for rounds skipped over since the last call are dropped.
+        Raise ValueError if the file has a line for a round that has already
+        been generated.
+
+        Precondition: round_num is greater than in the previous call.
+        """
+        # Buffer every line up to the end of the look-ahead window
+        while self._next is not None and \
+                self._next[0] <= round_num + self.lookahead:
+            line_round, pairs = self._next
+            if line_round <= self._round:
+                raise ValueError(f'arrivals for round {line_round} come '
+                                 f'after round {self._round} was generated')
+            self._pending.setdefault(line_round, []).extend(pairs)
+            self._next = self._read_line()
+
+        for skipped in [r for r in self._pending if r < round_num]:
+            del self._pending[skipped]
+        self._round = round_num
+
+        new_arrivals = {}
+        for i in range(1, self.max_floor+1):
+            new_arrivals[i] = []
+        for start, target in self._pending.pop(round_num, []):
+            new_arrivals[start].append(Person(start, target))
+        return new_arrivals
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round from round_num on with arrivals buffered,
+        or that a line not read yet may be for, or None if there is none.
+
+        Since lines may be out of order by up to lookahead rounds, the next
+        unread line only bounds the rounds still to come from below.
+        """
+        rounds = [r for r, pairs in self._pending.items()
+                  if r >= round_num and pairs]
+        if self._next is not None:
+            rounds.append(max(round_num, self._next[0] - self.lookahead))
+        return min(rounds, default=None)
+
+    def get_state(self) -> Any:
+        """Return the number of lines read from the file, the next line not
+        buffered yet, the buffered rounds and the last round generated.
+        """
+        lines_read = -1 if self._file is None else self._lines.line_num
+        return lines_read, self._next, self._pending, self._round
+
+    def set_state(self, state: Any) -> None:
+        """Reopen the file at the position in <state>, and restore what was
+        buffered from it.
+        """
+        lines_read, self._next, pending, self._round = state
+        self._pending = dict(pending)
+        self.close()
+        if lines_read >= 0:
+            self._file = open_arrivals_file(self._filename)
+            self._lines = csv.reader(self._file)
+            while self._lines.line_num < lines_read:
+                next(self._lines)
+
+    def close(self) -> None:
+        """Close the arrivals file, if it is still open."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_line(self) -> Optional[Tuple[int, List[Tuple[int, int]]]]:
+        """Return the round and (start, target) pairs of the next non-empty
+        line of the file, or None (closing the file) if there are no more.
+        """
+        for line in self._lines:
+            if line:
+                pairs = [(int(line[i]), int(line[i+1]))
+                         for i in range(1, len(line)-1, 2)]
+                return int(line[0]), pairs
+        self.close()
+        return None
+
+
+def open_arrivals_file(filename: str) -> TextIO:
+    """Open the arrivals CSV file <filename> for reading as text.
+
+    Files starting with a gzip or an xz header are decompressed on the fly,
+    whatever their name.
+    """
+    with open(filename, 'rb') as file:
+        magic = file.read(6)
+    if magic.startswith(b'\x1f\x8b'):
+        return gzip.open(filename, 'rt', newline='')
+    if magic == b'\xfd7zXZ\x00':
+        return lzma.open(filename, 'rt', newline='')
+    return open(filename, newline='')
+
+
+###############################################################################
+# Elevator moving algorithms
+###############################################################################
+class Direction(Enum):
+    """
+    The following defines the possible directions an elevator can move.
+    This is output by the simulation's algorithms.
+
+    The possible values you'll use in your Python code are:
+        Direction.UP, Direction.DOWN, Direction.STAY
+    """
+    UP = 1
+    STAY = 0
+    DOWN = -1
+
+
+class MovingAlgorithm:
+    """An algorithm to make decisions for moving an elevator at each round.
+
+    === Attributes ===
+    moves_when_idle: whether the algorithm may move an elevator (or draw
+                     random numbers) when nobody is waiting or riding. The
+                     simulation only skips over rounds in which the
+                     building is empty for algorithms where this is False.
+    """
+    moves_when_idle: bool = True
+    def move_elevators(self,
+                       elevators: List[Elevator],
+                       waiting: Dict[int, List[Person]],
+                       max_floor: int) -> List[Direction]:
+        """Return a list of directions for each elevator to move to.
+
+        As input, this method receives the list of elevators in the simulation,
+        a dictionary mapping floor number to a list of people waiting on
+        that floor, and the maximum floor number in the simulation.
+
+        Note that each returned direction should be valid:
+            - An elevator at Floor 1 cannot move down.
+            - An elevator at the top floor cannot move up.
+        """
+        raise NotImplementedError
+
+
+class RandomAlgorithm(MovingAlgorithm):
+    """A moving algorithm that randomly determines which direction an
+    elevator should move (Up, down, or stay on the same floor
+    """
+
+
+    def move_elevators(self,
+                       elevators: List[Elevator],
+                       waiting: Dict[int, List[Person]],
+                       max_floor: int) -> List[Direction]:
+
+        """Takes the number of elevators in the simulation, a dictionary
+        of the people waiting and the max floor, and returns a list containing
+        the direction each elevator should move.
+
+        Determines the direction each elevator should move randomly"""
+        directions = []
+        for elevator in elevators:
+
+            #If the elevator is on the first floor, either go up or stay
+            if elevator.current_floor == 1:
+                move = random.randint(0, 1)
+
+            #if the elevator is on the max floor, either stay or go down
+            elif elevator.current_floor == max_floor:
+                move = random.randint(-1, 0)
+
+            #otherwise, it can move up, down or stay
+            else:
+                move = random.randint(-1, 1)
+            elevator.current_floor += move
+
+            #Append the appropriate command to directions
+            if move == 0:
+                directions.append(Direction.STAY)
+            elif move == 1:
+                directions.append(Direction.UP)
+            else:
+                directions.append(Direction.DOWN)
+        return directions
+
+
+
+
+
+
+
+
+
+
+
+
+class PushyPassenger(MovingAlgorithm):
+    """A moving algorithm that preferences the first passenger on each elevator.
+
+    If the elevator is empty, it moves towards the *lowest* floor that has at
+    least one person waiting, or stays still if there are no people waiting.
+
+    If the elevator isn't empty, it moves towards the target floor of the
+    *first* passenger who boarded the elevator.
+    """
+    moves_when_idle = False
+
+    def move_elevators(self,
+                       elevators: List[Elevator],
+                       waiting: Dict[int, List[Person]],
+                       max_floor: int) -> List[Direction]:
+
+        """Takes the number of elevators in the simulation, a dictionary
+        of the people waiting and the max floor, and returns a list containing
+        the direction each elevator should move
+
+        Determines the direction each elevator in the simulation should move
+        based on the PushyPassenger description above"""
+
+        direction = []
+        calls = HallCalls.from_waiting(waiting)
+
+        #For every elevator in the simulation
+        for elevator in elevators:
+
+            #If the elevator has passengers
+            if len(elevator.passengers) > 0:
+
+                #Take the first passenger (the one that has been on longest)
+                passenger = elevator.passengers[0]
+
+                #If the passenger's target is above the current floor, go up
+                if passenger.target > elevator.current_floor:
+                    move = Direction.UP
+                    elevator.current_floor += 1
+
+                #If the passenger's target is below the current floor, go down
+                else:
+                    move = Direction.DOWN
+                    elevator.current_floor += -1
+
+            #If the elevator is empty, head for the lowest floor with someone
+            #waiting (other than the current one), or stay if there is none
+            else:
+                lowest = calls.lowest()
+
+                # if someone is waiting on a floor below the current floor
+                if lowest is not None and lowest < elevator.current_floor:
+                    move = Direction.DOWN
+                    elevator.current_floor += -1
+
+                #if someone is waiting on a floor above the current floor
+                elif calls.above(elevator.current_floor) is not None:
+                    move = Direction.UP
+                    elevator.current_floor += 1
+
+                #If no one is waiting in the simulation, elevator stays
+                else:
+                    move = Direction.STAY
+            direction.append(move)
+        return direction
+
+
+class ShortSighted(MovingAlgorithm):
+    """A moving algorithm that preferences the closest possible choice.
+
+    If the elevator is empty, it moves towards the *closest* floor that has at
+    least one person waiting, or stays still if there are no people waiting.
+
+    If the elevator isn't empty, it moves towards the closest target floor of
+    all passengers who are on the elevator.
+
+    In this case, the order in which people boarded does *not* matter.
+    """
+    moves_when_idle = False
+
+    def move_elevators(self,
+                       elevators: List[Elevator],
+                       waiting: Dict[int, List[Person]],
+                       max_floor: int) -> List[Direction]:
+
+        """Takes the number of elevators in the simulation, a dictionary
+        of the people waiting and the max floor, and returns a list containing
+        the direction each elevator should move
+
+        Determines the direction each elevator in the simulation should move
+        based on the ShortSighted description above"""
+
+        direction = []
+        calls = HallCalls.from_waiting(waiting)
+
+        for elevator in elevators:
+
+            #if the elevator has no passengers, go to the closest floor with
+            #people waiting (the higher one if two are equally close), or stay
+            #if no one is waiting
+            if len(elevator.passengers) <= 0:
+                closest = calls.nearest(elevator.current_floor)
+                if closest is None:
+                    closest = elevator.current_floor
+
+            #if the elevator has passenger(s)
+            else:
+
+                closest = elevator.passengers[0].target
+
+                for target in elevator.passengers.targets():
+
+                    #if this target is closer than closest
+                    if abs(closest - elevator.current_floor) > abs(
+                            target - elevator.current_floor):
+                        closest = target
+
+                    #if this target is as close as closest and lower
+                    elif abs(closest - elevator.current_floor) == abs(
+                            target - elevator.current_floor)\
+                            and target - elevator.current_floor < 0:
+                        closest = target
+
+            #if the closest floor is lower than the current floor, go down
+            if elevator.current_floor - closest > 0:
+                direction.append(Direction.DOWN)
+                elevator.current_floor += -1
+
+            #if closest is above current floor, go up
+            elif elevator.current_floor - closest < 0:
+                direction.append(Direction.UP)
+                elevator.current_floor += 1
+
+            #Otherwise, don't move
+            else:
+                direction.append(Direction.STAY)
+
+        return direction
+
+
+
+if __name__ == '__main__':
+    # Don't forget to check your work regularly with python_ta!
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['__init__', 'open_arrivals_file'],
+        'extra-imports': ['entities', 'hall_calls', 'random', 'csv', 'enum',
+                          'gzip', 'lzma', 'bisect'],
+        'max-nested-blocks': 4,
+        'max-attributes': 12,
+        'disable': ['R0201']
+    })
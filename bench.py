@@ -0,0 +1,326 @@
+"""CSC148 Assignment 1 - Benchmarks
+
+=== Module Description ===
+This module benchmarks headless simulation runs, to tell whether a change to
+a moving algorithm or to the engine made things faster or slower. It runs
+Simulation.run once per combination of building size (floors, elevators and
+capacity), RandomArrivals rate (people per round) and moving algorithm, and
+measures the rounds run per second (the best of a few repeats) and the peak
+memory allocated during a run (from one more run under tracemalloc). It also
+times FileArrivals loading a large generated arrivals file, in rows per
+second.
+
+With --engines, each case is instead run by both Simulation and
+VectorSimulation, to check that they report the same statistics and wait
+times, and to compare their rounds per second; the script exits with status 1
+if any case disagrees. With --batch N as well, each case is run for seeds 0
+to N - 1, one after the other by Simulation and all at once by a
+BatchSimulation of N buildings, and rounds per second count the rounds of
+every building. The vectorized engines, and so NumPy, are only imported for
+--engines, so the plain benchmarks run without NumPy installed.
+
+The results are written as a table to bench_output.txt. With --save-baseline
+they are also stored in a baseline file, and later benchmarks are compared
+with it: a case whose speed dropped, or whose peak memory grew, by more than
+the threshold fraction is marked as a regression, and the script exits with
+status 1 if there are any. Baselines are only meaningful on the machine they
+were recorded on.
+
+For example:
+
+    python bench.py --save-baseline
+    python bench.py --floors 12 --algorithms short_sighted --threshold 0.1
+    python bench.py --engines --floors 200 --elevators 40 --capacity 20 \
+        --people 60 --algorithms short_sighted pushy
+    python bench.py --engines --batch 64 --floors 20 --people 2
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+import algorithms
+from simulation import Simulation
+from sweep import ALGORITHMS
+
+OUTPUT = 'bench_output.txt'
+BASELINE = 'bench_baseline.json'
+
+
+def _config(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the configuration of a headless simulation of the building,
+    arrival rate and algorithm in <params>.
+    """
+    return {
+        'num_floors': params['floors'],
+        'num_elevators': params['elevators'],
+        'elevator_capacity': params['capacity'],
+        'arrival_generator': algorithms.RandomArrivals(params['floors'],
+                                                       params['people']),
+        'moving_algorithm': ALGORITHMS[params['algorithm']](),
+        'visualize': False
+    }
+
+
+def _run(params: Dict[str, Any], num_rounds: int, engine: type = Simulation,
+         seed: int = 0) -> Tuple[Dict[str, int], Dict[str, float]]:
+    """Return the statistics and wait time summary of a headless simulation
+    of the building, arrival rate and algorithm in <params>, run by <engine>
+    for <num_rounds> rounds from <seed>.
+    """
+    random.seed(seed)
+    sim = engine(_config(params))
+    return sim.run(num_rounds), sim.wait_summary()
+
+
+def bench_run(params: Dict[str, Any], num_rounds: int,
+              repeats: int) -> Dict[str, float]:
+    """Return the rounds per second (best of <repeats> runs) and the peak
+    memory in bytes of running the simulation described by <params> for
+    <num_rounds> rounds.
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        _run(params, num_rounds)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        _run(params, num_rounds)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'rate': num_rounds / best, 'peak': peak}
+
+
+def bench_engines(params: Dict[str, Any], num_rounds: int,
+                  repeats: int) -> Dict[str, Any]:
+    """Return the rounds per second (best of <repeats> runs) of Simulation
+    and of VectorSimulation running the simulation described by <params>
+    for <num_rounds> rounds, and whether they reported the same statistics
+    and wait times.
+    """
+    from vector_engine import VectorSimulation
+    rates = []
+    reports = []
+    for engine in (Simulation, VectorSimulation):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            report = _run(params, num_rounds, engine)
+            best = min(best, time.perf_counter() - start)
+        rates.append(num_rounds / best)
+        reports.append(report)
+    return {'object': rates[0], 'vector': rates[1],
+            'same': reports[0] == reports[1]}
+
+
+def bench_batch(params: Dict[str, Any], num_rounds: int, repeats: int,
+                num_buildings: int) -> Dict[str, Any]:
+    """Return the rounds per second, over all buildings, (best of <repeats>
+    runs) of Simulation running the simulation described by <params> for
+    <num_rounds> rounds from each seed up to <num_buildings>, and of a
+    BatchSimulation running all of them at once, and whether they reported
+    the same statistics and wait times.
+    """
+    from vector_engine import BatchSimulation
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        reports = [_run(params, num_rounds, seed=seed)
+                   for seed in range(num_buildings)]
+        best = min(best, time.perf_counter() - start)
+    object_rate = num_buildings * num_rounds / best
+
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        batch = BatchSimulation([dict(_config(params), seed=seed)
+                                 for seed in range(num_buildings)])
+        batch_reports = list(zip(batch.run(num_rounds),
+                                 batch.wait_summaries()))
+        best = min(best, time.perf_counter() - start)
+    return {'object': object_rate,
+            'vector': num_buildings * num_rounds / best,
+            'same': reports == batch_reports}
+
+
+def bench_file_load(num_rows: int, num_floors: int,
+                    repeats: int) -> Dict[str, float]:
+    """Return the rows per second (best of <repeats> loads) and the peak
+    memory in bytes of FileArrivals loading a generated file of <num_rows>
+    rounds, with up to four people each.
+    """
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'arrivals.csv')
+        with open(filename, 'w') as csv_file:
+            for round_num in range(num_rows):
+                row = [round_num]
+                for _ in range(rng.randint(1, 4)):
+                    row.extend(rng.sample(range(1, num_floors + 1), 2))
+                csv_file.write(','.join(map(str, row)) + '\n')
+
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            algorithms.FileArrivals(num_floors, filename)
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            algorithms.FileArrivals(num_floors, filename)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {'rate': num_rows / best, 'peak': peak}
+
+
+def compare(results: Dict[str, Dict[str, float]],
+            baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> Dict[str, List[str]]:
+    """Return the regressions of each case in <results> against <baseline>,
+    as a list of descriptions per case.
+
+    A case regressed if its rate is more than <threshold> (a fraction) below
+    the baseline's, or its peak memory is more than <threshold> above it.
+    Cases missing from <baseline> are not compared.
+    """
+    regressions = {}
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        old = baseline[case]
+        found = []
+        if result['rate'] < old['rate'] * (1 - threshold):
+            found.append('speed')
+        if result['peak'] > old['peak'] * (1 + threshold):
+            found.append('memory')
+        if found:
+            regressions[case] = found
+    return regressions
+
+
+def write_report(results: Dict[str, Dict[str, float]],
+                 baseline: Optional[Dict[str, Dict[str, float]]],
+                 regressions: Dict[str, List[str]], output: str) -> None:
+    """Write <results> as a table to the file <output>, compared with
+    <baseline> if there is one.
+    """
+    width = max(len(case) for case in results)
+    with open(output, 'w') as out:
+        out.write(f'{"case":<{width}} {"rate/s":>12} {"peak KiB":>10} '
+                  f'{"rate vs base":>13} {"peak vs base":>13}\n')
+        for case, result in results.items():
+            line = (f'{case:<{width}} {result["rate"]:>12.1f} '
+                    f'{result["peak"] / 1024:>10.1f}')
+            if baseline is not None and case in baseline:
+                old = baseline[case]
+                line += (f' {result["rate"] / old["rate"] - 1:>+13.1%}'
+                         f' {result["peak"] / max(old["peak"], 1) - 1:>+13.1%}')
+            if case in regressions:
+                line += '  REGRESSION (' + ', '.join(regressions[case]) + ')'
+            out.write(line + '\n')
+        if baseline is not None:
+            out.write(f'\n{len(regressions)} regression(s)\n')
+
+
+def write_engine_report(results: Dict[str, Dict[str, Any]],
+                        output: str) -> None:
+    """Write the engine comparisons <results> as a table to the file
+    <output>.
+    """
+    width = max(len(case) for case in results)
+    with open(output, 'w') as out:
+        out.write(f'{"case":<{width}} {"object/s":>10} {"vector/s":>10} '
+                  f'{"speedup":>8}  same\n')
+        for case, result in results.items():
+            out.write(f'{case:<{width}} {result["object"]:>10.1f} '
+                      f'{result["vector"]:>10.1f} '
+                      f'{result["vector"] / result["object"]:>7.2f}x  '
+                      f'{"yes" if result["same"] else "NO"}\n')
+        mismatches = sum(not result['same'] for result in results.values())
+        out.write(f'\n{mismatches} mismatch(es)\n')
+
+
+def _main(argv: List[str]) -> int:
+    """Run the benchmarks described by the command line arguments <argv>,
+    and return the exit status.
+    """
+    parser = argparse.ArgumentParser(
+        prog=argv[0], description='Benchmark headless simulation runs.')
+    parser.add_argument('--floors', type=int, nargs='+', default=[6, 12, 24])
+    parser.add_argument('--elevators', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--capacity', type=int, nargs='+', default=[3, 8])
+    parser.add_argument('--people', type=int, nargs='+', default=[1, 4],
+                        help='RandomArrivals people per round')
+    parser.add_argument('--algorithms', nargs='+', choices=ALGORITHMS,
+                        default=list(ALGORITHMS))
+    parser.add_argument('--rounds', type=int, default=1000)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--file-rows', type=int, default=200000,
+                        help='rounds in the FileArrivals file (0 to skip)')
+    parser.add_argument('--engines', action='store_true',
+                        help='compare VectorSimulation with Simulation '
+                             'instead')
+    parser.add_argument('--batch', type=int, default=0, metavar='N',
+                        help='with --engines, compare N seeded Simulation '
+                             'runs with one BatchSimulation')
+    parser.add_argument('-o', '--output', default=OUTPUT)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store these results as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='the fraction of slowdown or memory growth '
+                             'counted as a regression')
+    args = parser.parse_args(argv[1:])
+
+    results = {}
+    for floors, elevators, capacity, people, algorithm in itertools.product(
+            args.floors, args.elevators, args.capacity, args.people,
+            args.algorithms):
+        params = {'floors': floors, 'elevators': elevators,
+                  'capacity': capacity, 'people': people,
+                  'algorithm': algorithm}
+        case = ' '.join(f'{key}={value}' for key, value in params.items())
+        if args.engines and args.batch:
+            results[case] = bench_batch(params, args.rounds, args.repeats,
+                                        args.batch)
+        elif args.engines:
+            results[case] = bench_engines(params, args.rounds, args.repeats)
+        else:
+            results[case] = bench_run(params, args.rounds, args.repeats)
+        print(case, file=sys.stderr)
+    if args.engines:
+        write_engine_report(results, args.output)
+        return 0 if all(result['same'] for result in results.values()) \
+            else 1
+    if args.file_rows:
+        case = f'file_load rows={args.file_rows}'
+        results[case] = bench_file_load(args.file_rows, max(args.floors),
+                                        args.repeats)
+        print(case, file=sys.stderr)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    regressions = {} if baseline is None else \
+        compare(results, baseline, args.threshold)
+    write_report(results, baseline, regressions, args.output)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=1)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv))
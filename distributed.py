@@ -0,0 +1,250 @@
+"""CSC148 Assignment 1 - Distributed sweeps
+
+=== Module Description ===
+This module spreads a sweep (see sweep.py) over any number of machines. A
+Coordinator listens on a TCP port and hands out the runs of a grid one at a
+time; workers connect to it, run each one headless with sweep.run_one and
+send back its statistics. A run handed to a worker that disconnects before
+answering is handed out again, after the other runs waiting, so workers can
+come and go during a sweep; a run whose workers disconnected MAX_ATTEMPTS
+times is given up on. A run that raises an error is reported as an error row
+(see sweep.error_row), like a failed run of a local sweep.
+
+The protocol is one JSON object per line. A worker sends {"op": "next"} to
+ask for work, {"op": "result", "id": ID, "row": ROW} to return the results
+of run ID and ask for more, or {"op": "result", "id": ID, "error": ERROR} if
+run ID failed with ERROR, described as by sweep.describe_error. The
+coordinator replies to each with either {"op": "run", "id": ID, "params":
+PARAMS} or, once every run has finished, {"op": "stop"}.
+
+Run this module as a script to start a coordinator or a worker, e.g.
+
+    python distributed.py coordinator --port 5148 --floors 6 12 --seeds 0 1
+    python distributed.py worker localhost 5148 --processes 8
+"""
+from __future__ import annotations
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import json
+import queue
+import socket
+import socketserver
+import sys
+import threading
+from typing import Any, BinaryIO, Deque, Dict, Iterable, Iterator, List, \
+    Optional, Set, Tuple
+
+import sweep
+
+# The most times a run is handed out to workers that disconnect before
+# answering
+MAX_ATTEMPTS = 3
+
+
+def _send(stream: BinaryIO, message: Dict[str, Any]) -> None:
+    """Write <message> to <stream> as one line of JSON."""
+    stream.write(json.dumps(message).encode() + b'\n')
+    stream.flush()
+
+
+class Coordinator:
+    """Hands out the runs of a sweep to workers over TCP, and collects their
+    results.
+
+    === Attributes ===
+    address: the (host, port) the coordinator listens on
+
+    === Private Attributes ===
+    _runs: the parameters of every run, by id
+    _todo: the ids of the runs not handed out yet, in order
+    _outstanding: the ids of the runs handed out and not finished yet
+    _attempts: the number of times each run has been handed out
+    _results: the results of the finished runs, not yielded by serve yet
+    _condition: guards _todo and _outstanding, and is notified when they
+                change
+    _server: the TCP server the workers connect to
+
+    === Representation Invariants ===
+    _todo and _outstanding have no id in common
+    """
+    address: Tuple[str, int]
+    _runs: List[Dict[str, Any]]
+    _todo: Deque[int]
+    _outstanding: Set[int]
+    _attempts: Dict[int, int]
+    _results: queue.Queue
+    _condition: threading.Condition
+    _server: socketserver.ThreadingTCPServer
+
+    def __init__(self, runs: Iterable[Dict[str, Any]],
+                 host: str = 'localhost', port: int = 0) -> None:
+        """Initialize a coordinator for <runs>, listening on <host> and
+        <port> (any free port if 0).
+        """
+        self._runs = list(runs)
+        self._todo = deque(range(len(self._runs)))
+        self._outstanding = set()
+        self._attempts = {}
+        self._results = queue.Queue()
+        self._condition = threading.Condition()
+
+        self._server = socketserver.ThreadingTCPServer((host, port),
+                                                       _WorkerHandler)
+        self._server.daemon_threads = True
+        self._server.coordinator = self
+        self.address = self._server.server_address
+
+    def serve(self) -> Iterator[Dict[str, Any]]:
+        """Serve workers until every run has finished, yielding the results
+        of each run as it comes in.
+        """
+        thread = threading.Thread(target=self._server.serve_forever,
+                                  daemon=True)
+        thread.start()
+        try:
+            for _ in range(len(self._runs)):
+                yield self._results.get()
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def take(self) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Return the id and parameters of the next run to hand out, or None
+        if every run has finished.
+
+        If every run has been handed out but some have not finished, wait in
+        case one of them is handed back.
+        """
+        with self._condition:
+            while not self._todo and self._outstanding:
+                self._condition.wait()
+            if not self._todo:
+                return None
+            run_id = self._todo.popleft()
+            self._outstanding.add(run_id)
+            self._attempts[run_id] = self._attempts.get(run_id, 0) + 1
+            return run_id, self._runs[run_id]
+
+    def finish(self, run_id: int, row: Dict[str, Any]) -> None:
+        """Record <row> as the results of run <run_id>.
+
+        Results of runs that already finished are ignored.
+        """
+        with self._condition:
+            if run_id not in self._outstanding:
+                return
+            self._outstanding.remove(run_id)
+            self._results.put(row)
+            self._condition.notify_all()
+
+    def fail(self, run_id: int, error: str) -> None:
+        """Record that run <run_id> failed with <error>."""
+        self.finish(run_id, sweep.error_row(self._runs[run_id], error))
+
+    def hand_back(self, run_id: int) -> None:
+        """Put run <run_id> back at the end of the queue, since its worker
+        went away, or record it as failed if it has been handed out
+        MAX_ATTEMPTS times.
+        """
+        with self._condition:
+            if run_id not in self._outstanding:
+                return
+            if self._attempts[run_id] < MAX_ATTEMPTS:
+                self._outstanding.remove(run_id)
+                self._todo.append(run_id)
+                self._condition.notify_all()
+                return
+        self.fail(run_id, f'{MAX_ATTEMPTS} workers disconnected while '
+                          f'running it')
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """Talks to one worker connected to a Coordinator."""
+
+    def handle(self) -> None:
+        coordinator = self.server.coordinator
+        current = None
+        try:
+            for line in self.rfile:
+                message = json.loads(line)
+                if message['op'] == 'result' and 'error' in message:
+                    coordinator.fail(message['id'], message['error'])
+                    current = None
+                elif message['op'] == 'result':
+                    coordinator.finish(message['id'], message['row'])
+                    current = None
+                item = coordinator.take()
+                if item is None:
+                    _send(self.wfile, {'op': 'stop'})
+                    return
+                current = item[0]
+                _send(self.wfile, {'op': 'run', 'id': item[0],
+                                   'params': item[1]})
+        except (OSError, ValueError, KeyError):
+            # A broken connection or message; the worker is given up on
+            pass
+        finally:
+            if current is not None:
+                coordinator.hand_back(current)
+
+
+def work(host: str, port: int) -> int:
+    """Run simulations handed out by the coordinator at <host> and <port>
+    until it has no more, and return how many were run.
+    """
+    done = 0
+    with socket.create_connection((host, port)) as connection, \
+            connection.makefile('rwb') as stream:
+        _send(stream, {'op': 'next'})
+        for line in stream:
+            message = json.loads(line)
+            if message['op'] == 'stop':
+                break
+            try:
+                row = sweep.run_one(message['params'])
+            except Exception as error:  # Sent back to the coordinator
+                _send(stream, {'op': 'result', 'id': message['id'],
+                               'error': sweep.describe_error(error)})
+            else:
+                _send(stream, {'op': 'result', 'id': message['id'],
+                               'row': row})
+            done += 1
+    return done
+
+
+def _main(argv: List[str]) -> None:
+    """Start the coordinator or worker described by the command line
+    arguments <argv>.
+    """
+    parser = argparse.ArgumentParser(
+        prog=argv[0], description='Run a sweep over several machines.')
+    modes = parser.add_subparsers(dest='mode', required=True)
+
+    coordinator = modes.add_parser('coordinator',
+                                   help='hand out the runs of a grid')
+    coordinator.add_argument('--host', default='localhost')
+    coordinator.add_argument('--port', type=int, default=0)
+    sweep.add_grid_arguments(coordinator)
+
+    worker = modes.add_parser('worker', help='run simulations')
+    worker.add_argument('host')
+    worker.add_argument('port', type=int)
+    worker.add_argument('--processes', type=int, default=1)
+
+    args = parser.parse_args(argv[1:])
+    if args.mode == 'coordinator':
+        server = Coordinator(sweep.grid_from_arguments(args),
+                             args.host, args.port)
+        print('listening on {}:{}'.format(*server.address), file=sys.stderr)
+        sweep.write_table(server.serve(), args.output)
+    elif args.processes == 1:
+        work(args.host, args.port)
+    else:
+        with ProcessPoolExecutor(args.processes) as pool:
+            list(pool.map(work, [args.host] * args.processes,
+                          [args.port] * args.processes))
+
+
+if __name__ == '__main__':
+    _main(sys.argv)
@@ -0,0 +1,150 @@
+"""CSC148 Assignment 1 - Frame export
+
+=== Module Description ===
+This module contains FrameExporter, which records the frames drawn by a
+Visualizer without opening a window, either as numbered PNG files or as one
+raw RGB stream (for example to pipe into a video encoder). The visualizer
+only copies each frame's pixels; compressing and writing them happens on a
+pool of worker threads, so drawing does not wait on the encoder.
+
+A visualizer exporting frames draws onto an offscreen surface, and the SDL
+dummy video driver is selected as long as the FrameExporter is created before
+pygame is first initialized (that is, before the visualizer module is
+imported), so recordings can be made on machines without a display server.
+"""
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import os
+import struct
+from typing import BinaryIO, Deque, Optional
+import zlib
+
+import pygame
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def encode_png(width: int, height: int, rgb: bytes, level: int = 6) -> bytes:
+    """Return the PNG image of the 8-bit RGB pixels <rgb>, stored row by row.
+
+    Precondition: len(rgb) == width * height * 3
+    """
+    stride = width * 3
+    # Every row gets filter type 0 (none)
+    rows = b''.join(b'\x00' + rgb[y * stride:(y + 1) * stride]
+                    for y in range(height))
+    return (PNG_SIGNATURE +
+            _png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height,
+                                            8, 2, 0, 0, 0)) +
+            _png_chunk(b'IDAT', zlib.compress(rows, level)) +
+            _png_chunk(b'IEND', b''))
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    """Return a PNG chunk of type <kind> holding <data>."""
+    return (struct.pack('>I', len(data)) + kind + data +
+            struct.pack('>I', zlib.crc32(kind + data)))
+
+
+def _write_png(filename: str, width: int, height: int, rgb: bytes) -> None:
+    """Encode the pixels <rgb> and save them as the PNG file <filename>."""
+    data = encode_png(width, height, rgb)
+    with open(filename, 'wb') as png:
+        png.write(data)
+
+
+class FrameExporter:
+    """Save every frame a Visualizer draws.
+
+    In PNG mode, frame n is saved as frame_<n>.png (zero-padded to six
+    digits) in the output directory, and several frames are encoded at once.
+    In raw mode, frames are appended to the output file in order, as
+    width * height * 3 bytes each with no header.
+
+    === Attributes ===
+    path: the output directory (PNG mode) or file (raw mode)
+    raw: whether frames are written as a raw RGB stream
+    frames: the number of frames handed to the exporter so far
+
+    === Private Attributes ===
+    _stream: the raw output file, or None in PNG mode
+    _pool: the worker threads encoding and writing frames
+    _pending: the frames being encoded or written, oldest first
+    _max_pending: the most frames kept in memory waiting to be written
+
+    === Representation Invariants ===
+    len(_pending) <= _max_pending
+    """
+    path: str
+    raw: bool
+    frames: int
+    _stream: Optional[BinaryIO]
+    _pool: ThreadPoolExecutor
+    _pending: Deque[Future]
+    _max_pending: int
+
+    def __init__(self, path: str, raw: bool = False,
+                 workers: Optional[int] = None,
+                 max_pending: Optional[int] = None) -> None:
+        """Initialize an exporter writing to <path>.
+
+        <workers> is the number of encoding threads, one per CPU by default;
+        a raw stream is always written by a single thread, in order.
+        <max_pending> bounds the memory used by frames waiting to be written:
+        once that many are waiting, write blocks until the oldest is done.
+        """
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        self.path = path
+        self.raw = raw
+        self.frames = 0
+        if raw:
+            self._stream = open(path, 'wb')
+            workers = 1
+        else:
+            self._stream = None
+            os.makedirs(path, exist_ok=True)
+            workers = workers or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(workers)
+        self._pending = deque()
+        self._max_pending = max_pending or 2 * workers
+
+    def write(self, surface: pygame.Surface) -> None:
+        """Queue the current contents of <surface> as the next frame."""
+        width, height = surface.get_size()
+        rgb = pygame.image.tostring(surface, 'RGB')
+        if self._stream is not None:
+            future = self._pool.submit(self._stream.write, rgb)
+        else:
+            filename = os.path.join(self.path, f'frame_{self.frames:06d}.png')
+            future = self._pool.submit(_write_png, filename, width, height,
+                                       rgb)
+        self.frames += 1
+
+        self._pending.append(future)
+        while self._pending and (self._pending[0].done() or
+                                 len(self._pending) > self._max_pending):
+            # Raise any error from writing the oldest frame
+            self._pending.popleft().result()
+
+    def close(self) -> None:
+        """Wait for every queued frame to be written, then close the output.
+        """
+        while self._pending:
+            self._pending.popleft().result()
+        self._pool.shutdown()
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['_write_png', '__init__'],
+        'extra-imports': ['collections', 'concurrent.futures', 'os', 'struct',
+                          'zlib', 'pygame'],
+        'max-nested-blocks': 4,
+        'max-attributes': 12,
+        'disable': ['R0201']
+    })
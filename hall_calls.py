@@ -0,0 +1,139 @@
+"""CSC148 Assignment 1 - Hall calls
+
+=== Module Description ===
+This module keeps track of which floors have someone waiting for an elevator
+(a "hall call"). The simulation updates the index whenever people arrive on a
+floor or the last person on a floor boards, so the moving algorithms can find
+the lowest or the nearest waiting floor with a couple of bit operations,
+instead of scanning every floor for every elevator in every round.
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Deque, Dict, Iterator, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entities import Person
+
+
+class HallCalls:
+    """The set of floors where at least one person is waiting.
+
+    The set is stored as a bitset in a Python int: bit f is set if and only if
+    someone is waiting on floor f. Queries are word-parallel bit scans.
+
+    === Private Attributes ===
+    _bits: the bitset of floors with someone waiting
+
+    === Representation Invariants ===
+    _bits >= 0
+    bit 0 of _bits is never set (floors start at 1)
+    """
+    _bits: int
+
+    def __init__(self) -> None:
+        self._bits = 0
+
+    @staticmethod
+    def from_waiting(waiting: Dict[int, Deque[Person]]) -> HallCalls:
+        """Return the hall calls for the waiting queues <waiting>.
+
+        If <waiting> is a WaitingQueues maintained by a simulation, its index
+        is returned as is; for any other dictionary a new index is built by
+        scanning every floor once.
+        """
+        if isinstance(waiting, WaitingQueues):
+            return waiting.calls
+        calls = HallCalls()
+        for floor, people in waiting.items():
+            if len(people) > 0:
+                calls.add(floor)
+        return calls
+
+    def __bool__(self) -> bool:
+        return self._bits != 0
+
+    def __contains__(self, floor: int) -> bool:
+        return (self._bits >> floor) & 1 == 1
+
+    def __iter__(self) -> Iterator[int]:
+        """Yield the floors with someone waiting, from lowest to highest."""
+        bits = self._bits
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def add(self, floor: int) -> None:
+        """Record that someone is waiting on <floor>."""
+        self._bits |= 1 << floor
+
+    def discard(self, floor: int) -> None:
+        """Record that nobody is waiting on <floor> anymore."""
+        self._bits &= ~(1 << floor)
+
+    def lowest(self) -> Optional[int]:
+        """Return the lowest floor with someone waiting, or None."""
+        if not self._bits:
+            return None
+        return (self._bits & -self._bits).bit_length() - 1
+
+    def above(self, floor: int) -> Optional[int]:
+        """Return the lowest floor above <floor> with someone waiting, or None.
+        """
+        bits = self._bits >> (floor + 1)
+        if not bits:
+            return None
+        return floor + (bits & -bits).bit_length()
+
+    def below(self, floor: int) -> Optional[int]:
+        """Return the highest floor below <floor> with someone waiting, or None.
+        """
+        bits = self._bits & ((1 << floor) - 1)
+        if not bits:
+            return None
+        return bits.bit_length() - 1
+
+    def nearest(self, floor: int) -> Optional[int]:
+        """Return the floor closest to <floor> with someone waiting, or None.
+
+        <floor> itself counts as closest. When a floor above and a floor below
+        are equally close, the higher one is returned.
+        """
+        if floor in self:
+            return floor
+        up = self.above(floor)
+        down = self.below(floor)
+        if up is None:
+            return down
+        if down is None or up - floor <= floor - down:
+            return up
+        return down
+
+
+class WaitingQueues(Dict[int, Deque['Person']]):
+    """The people waiting on each floor, together with their hall calls.
+
+    This is a plain dictionary mapping floor number to a deque of waiting
+    people, so it can be handed to any MovingAlgorithm. The simulation keeps
+    calls up to date as people arrive and board.
+
+    === Attributes ===
+    calls: the floors where at least one person is waiting
+    """
+    calls: HallCalls
+
+    def __init__(self, num_floors: int) -> None:
+        super().__init__()
+        for floor in range(1, num_floors + 1):
+            self[floor] = deque()
+        self.calls = HallCalls()
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['collections', 'entities'],
+        'max-nested-blocks': 4,
+        'max-attributes': 12,
+        'disable': ['R0201']
+    })
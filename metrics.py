@@ -0,0 +1,262 @@
+"""CSC148 Assignment 1 - Live metrics
+
+=== Module Description ===
+This module contains MetricsServer, which a Simulation can be given (as its
+'metrics' setting) to watch a long run while it is going. It serves the
+latest figures of the run over HTTP at /metrics, in the Prometheus text
+format:
+
+    elevator_round                    the last round run
+    elevator_rounds_per_second        rounds run per second lately
+    elevator_waiting_people           people waiting, by floor
+    elevator_load_factor              the fullness of each elevator
+    elevator_people_arrived_total     people who have arrived
+    elevator_people_completed_total   people who reached their target floor
+    elevator_wait_rounds              wait times of the people who reached
+                                      their target floor lately (quantiles),
+                                      and of everyone so far (sum and count)
+
+The simulation only hands the server a new snapshot of these figures every
+interval seconds, and the server's thread only ever reads the latest
+snapshot, never the simulation's queues and elevators. The wait time
+quantiles cover the people who reached their target floor in the last
+window snapshots, and are NaN while nobody did. The first snapshot is taken
+after the first round the server is given, and the rounds per second are
+measured from it on, so a server started long before its simulation still
+reports the rate of the run.
+
+For example, to watch a run at http://localhost:9148/metrics:
+
+    server = MetricsServer(port=9148)
+    server.start()
+    sim = Simulation(dict(config, metrics=server))
+    sim.run(10 ** 7)
+    server.close()
+"""
+from __future__ import annotations
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import time
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from entities import Elevator
+from hall_calls import WaitingQueues
+from stats import WaitStats
+
+# The wait time quantiles reported, and the percentiles they are read from
+QUANTILES = (('0.5', 50), ('0.95', 95), ('0.99', 99))
+
+
+class MetricsServer:
+    """Serves the latest snapshot of a simulation run's figures over HTTP.
+
+    === Attributes ===
+    address: the (host, port) the server listens on
+    interval: the least time between two snapshots, in seconds
+    window: the number of snapshots the wait time quantiles cover
+
+    === Private Attributes ===
+    _snapshot: the latest snapshot, or None before the first one
+    _published: when the latest snapshot was taken, from time.perf_counter,
+                or None before the first one
+    _published_round: the round of the latest snapshot
+    _slot: the wait times recorded since the latest snapshot
+    _recent: the wait times recorded between each of the latest snapshots,
+             oldest first
+    _count: the number of wait times recorded
+    _sum: the sum of the wait times recorded
+    _server: the HTTP server
+    _thread: the thread serving HTTP requests, or None if not started
+
+    === Representation Invariants ===
+    interval >= 0
+    window >= 1
+    len(_recent) <= window
+    """
+    address: Tuple[str, int]
+    interval: float
+    window: int
+    _snapshot: Optional[Dict[str, Any]]
+    _published: Optional[float]
+    _published_round: int
+    _slot: WaitStats
+    _recent: Deque[WaitStats]
+    _count: int
+    _sum: int
+    _server: ThreadingHTTPServer
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, host: str = 'localhost', port: int = 0,
+                 interval: float = 1.0, window: int = 10) -> None:
+        """Initialize a server listening on <host> and <port> (any free port
+        if 0), which serves requests once started.
+        """
+        self.interval = interval
+        self.window = window
+        self._snapshot = None
+        self._published = None
+        self._published_round = 0
+        self._slot = WaitStats()
+        self._recent = deque(maxlen=window)
+        self._count = 0
+        self._sum = 0
+
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.metrics = self
+        self.address = self._server.server_address
+        self._thread = None
+
+    def start(self) -> None:
+        """Start serving requests from a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop serving requests, and close the server."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def record_wait(self, wait_time: int) -> None:
+        """Record that someone reached their target floor after <wait_time>
+        rounds.
+        """
+        self._slot.add(wait_time)
+        self._count += 1
+        self._sum += wait_time
+
+    def update(self, round_num: int, waiting: WaitingQueues,
+               elevators: List[Elevator], total_people: int) -> None:
+        """Take a snapshot after round <round_num> if there is none yet, or
+        if the latest one is at least interval seconds old.
+        """
+        if self._published is None or \
+                time.perf_counter() - self._published >= self.interval:
+            self.publish(round_num, waiting, elevators, total_people)
+
+    def publish(self, round_num: int, waiting: WaitingQueues,
+                elevators: List[Elevator], total_people: int) -> None:
+        """Take a snapshot after round <round_num>, with the people waiting
+        in <waiting>, the elevators <elevators> and <total_people> people
+        having arrived so far.
+
+        The first snapshot has a rate of 0, since there is no earlier one to
+        measure it from. A quantile is None if nobody reached their target
+        floor in the window.
+        """
+        now = time.perf_counter()
+        rounds = round_num + 1 - self._published_round
+        if self._published is not None and rounds > 0 and \
+                now > self._published:
+            rate = rounds / (now - self._published)
+        elif self._snapshot is not None:
+            # No rounds run since the latest snapshot, so the latest rate
+            # still stands
+            rate = self._snapshot['rounds_per_second']
+        else:
+            rate = 0.0
+        self._recent.append(self._slot)
+        self._slot = WaitStats()
+        recent = WaitStats()
+        for stats in self._recent:
+            recent.merge(stats)
+
+        # A new dictionary every time, so the server thread never sees one
+        # half written
+        self._snapshot = {
+            'round': round_num,
+            'rounds_per_second': rate,
+            'waiting': [len(waiting[floor]) for floor in sorted(waiting)],
+            'loads': [elevator.fullness() for elevator in elevators],
+            'arrived': total_people,
+            'completed': self._count,
+            'wait_quantiles': [recent.percentile(percent) if recent.count
+                               else None for _, percent in QUANTILES],
+            'wait_sum': self._sum,
+            'wait_count': self._count
+        }
+        self._published = now
+        self._published_round = round_num + 1
+
+    def render(self) -> str:
+        """Return the latest snapshot in the Prometheus text format."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return ''
+        lines = []
+        _add_metric(lines, 'elevator_round', 'gauge',
+                    'The last round run.', [('', snapshot['round'])])
+        _add_metric(lines, 'elevator_rounds_per_second', 'gauge',
+                    'Rounds run per second since the previous snapshot.',
+                    [('', snapshot['rounds_per_second'])])
+        _add_metric(lines, 'elevator_waiting_people', 'gauge',
+                    'People waiting for an elevator, by floor.',
+                    [(f'{{floor="{floor}"}}', count) for floor, count
+                     in enumerate(snapshot['waiting'], 1)])
+        _add_metric(lines, 'elevator_load_factor', 'gauge',
+                    'The fraction of each elevator\'s capacity in use.',
+                    [(f'{{elevator="{e}"}}', load) for e, load
+                     in enumerate(snapshot['loads'])])
+        _add_metric(lines, 'elevator_people_arrived_total', 'counter',
+                    'People who have arrived.', [('', snapshot['arrived'])])
+        _add_metric(lines, 'elevator_people_completed_total', 'counter',
+                    'People who reached their target floor.',
+                    [('', snapshot['completed'])])
+        samples = [(f'{{quantile="{quantile}"}}',
+                    'NaN' if value is None else value) for (quantile, _),
+                   value in zip(QUANTILES, snapshot['wait_quantiles'])]
+        samples.append(('_sum', snapshot['wait_sum']))
+        samples.append(('_count', snapshot['wait_count']))
+        _add_metric(lines, 'elevator_wait_rounds', 'summary',
+                    'Rounds people took to reach their target floor.',
+                    samples)
+        return '\n'.join(lines) + '\n'
+
+
+def _add_metric(lines: List[str], name: str, kind: str, description: str,
+                samples: Iterable[Tuple[str, Any]]) -> None:
+    """Append the Prometheus text format lines of the metric <name> of type
+    <kind> to <lines>.
+
+    Each sample is the suffix of its name (labels, or _sum and so on) and its
+    value.
+    """
+    lines.append(f'# HELP {name} {description}')
+    lines.append(f'# TYPE {name} {kind}')
+    for suffix, value in samples:
+        lines.append(f'{name}{suffix} {value}')
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Answers requests to a MetricsServer."""
+
+    def do_GET(self) -> None:
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Scrapes are not logged
+        pass
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['collections', 'http.server', 'threading', 'time',
+                          'entities', 'hall_calls', 'stats'],
+        'max-nested-blocks': 4,
+        'max-attributes': 15,
+        'disable': ['R0201']
+    })
@@ -0,0 +1,235 @@
+"""CSC148 Assignment 1 - Stage profiling
+
+=== Module Description ===
+This module contains StageProfiler, which a Simulation can be given (as its
+'profiler' setting) to record where the time of a run goes. Every round is
+split into the stages in STAGES:
+
+    arrivals     generating new arrivals and adding them to the queues
+    leaving      letting passengers off at their target floors
+    boarding     letting waiting people onto the elevators
+    algorithm    the MovingAlgorithm.move_elevators call
+    moves        updating the simulation after the elevators moved
+    visualizer   drawing the round and waiting between rounds
+
+Everything the visualizer does is charged to the visualizer stage, including
+the show_* calls made in the middle of the other stages: the profiler laps
+just before and after each of them. The other stages only time the
+simulation itself.
+
+The profiler keeps the total and largest time of each stage, and optionally
+the time of every stage in every round. With snapshot_every set, it also
+traces memory allocations with tracemalloc and takes a snapshot every that
+many rounds, recording the memory in use and the lines that allocated most of
+it. report returns everything as a dictionary of plain values, and write saves
+it as JSON.
+
+A simulation without a profiler uses a NullProfiler, whose methods do
+nothing, so profiled and unprofiled runs go through the same code. Tracing
+memory slows a profiled run down considerably, so only ask for snapshots when
+needed.
+"""
+from __future__ import annotations
+from array import array
+import json
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+STAGES = ('arrivals', 'leaving', 'boarding', 'algorithm', 'moves',
+          'visualizer')
+
+
+class NullProfiler:
+    """A profiler that records nothing, for simulations run without one."""
+
+    def start(self) -> None:
+        """Do nothing."""
+
+    def finish(self) -> None:
+        """Do nothing."""
+
+    def begin_round(self) -> None:
+        """Do nothing."""
+
+    def lap(self, stage: str) -> None:
+        """Do nothing."""
+
+    def end_round(self, round_num: int) -> None:
+        """Do nothing."""
+
+
+class StageProfiler:
+    """Wall time per stage and memory snapshots of simulation runs.
+
+    Stages are timed with laps: begin_round starts the clock, and each call
+    to lap charges the time since the previous lap to a stage. A profiler
+    given to several runs adds them all up.
+
+    === Attributes ===
+    snapshot_every: the number of rounds between memory snapshots, or 0 to
+                    not trace memory
+    top: the number of allocating lines recorded in each memory snapshot
+    keep_rounds: whether the time of every stage is kept for every round
+    rounds: the number of rounds profiled
+    totals: the total time spent in each stage, in seconds
+    longest: the longest time spent in each stage in one round, in seconds
+    snapshots: the memory snapshots taken, oldest first
+
+    === Private Attributes ===
+    _round_nums: the number of each round profiled, if keep_rounds
+    _per_round: the time of each stage in each round profiled, if
+                keep_rounds
+    _current: the time of each stage in the round being profiled
+    _last: the time of the last lap, from time.perf_counter
+    _started: when the current run started, from time.perf_counter
+    _wall_time: the total time of the runs finished so far, in seconds
+    _next_snapshot: the round from which the next snapshot is taken
+    _tracing: whether this profiler started tracemalloc
+
+    === Representation Invariants ===
+    snapshot_every >= 0
+    totals, longest and _current have a key for every stage in STAGES
+    """
+    snapshot_every: int
+    top: int
+    keep_rounds: bool
+    rounds: int
+    totals: Dict[str, float]
+    longest: Dict[str, float]
+    snapshots: List[Dict[str, Any]]
+    _round_nums: array
+    _per_round: Dict[str, array]
+    _current: Dict[str, float]
+    _last: float
+    _started: Optional[float]
+    _wall_time: float
+    _next_snapshot: int
+    _tracing: bool
+
+    def __init__(self, snapshot_every: int = 0, top: int = 10,
+                 keep_rounds: bool = True) -> None:
+        """Initialize a profiler that has not profiled anything yet."""
+        self.snapshot_every = snapshot_every
+        self.top = top
+        self.keep_rounds = keep_rounds
+        self.rounds = 0
+        self.totals = dict.fromkeys(STAGES, 0.0)
+        self.longest = dict.fromkeys(STAGES, 0.0)
+        self.snapshots = []
+        self._round_nums = array('q')
+        self._per_round = {stage: array('d') for stage in STAGES}
+        self._current = dict.fromkeys(STAGES, 0.0)
+        self._last = 0.0
+        self._started = None
+        self._wall_time = 0.0
+        self._next_snapshot = 0
+        self._tracing = False
+
+    def start(self) -> None:
+        """Start profiling a run, tracing memory if snapshots are wanted."""
+        if self.snapshot_every and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._next_snapshot = 0
+        self._started = time.perf_counter()
+
+    def finish(self) -> None:
+        """Stop profiling the current run, and stop tracing memory if this
+        profiler started it.
+        """
+        if self._started is not None:
+            self._wall_time += time.perf_counter() - self._started
+            self._started = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def begin_round(self) -> None:
+        """Start the clock for a new round."""
+        for stage in STAGES:
+            self._current[stage] = 0.0
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str) -> None:
+        """Charge the time since the previous lap to <stage>."""
+        now = time.perf_counter()
+        self._current[stage] += now - self._last
+        self._last = now
+
+    def end_round(self, round_num: int) -> None:
+        """Record the stage times of round <round_num>, and take a memory
+        snapshot if one is due.
+        """
+        self.rounds += 1
+        for stage, seconds in self._current.items():
+            self.totals[stage] += seconds
+            if seconds > self.longest[stage]:
+                self.longest[stage] = seconds
+            if self.keep_rounds:
+                self._per_round[stage].append(seconds)
+        if self.keep_rounds:
+            self._round_nums.append(round_num)
+
+        if self.snapshot_every and round_num >= self._next_snapshot:
+            self._take_snapshot(round_num)
+            self._next_snapshot = round_num - round_num % \
+                self.snapshot_every + self.snapshot_every
+
+    def _take_snapshot(self, round_num: int) -> None:
+        """Record the memory in use after round <round_num>, and the lines
+        that allocated most of it.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)))
+        top = []
+        for stat in snapshot.statistics('lineno')[:self.top]:
+            frame = stat.traceback[0]
+            top.append({'file': frame.filename, 'line': frame.lineno,
+                        'size': stat.size, 'count': stat.count})
+        self.snapshots.append({'round': round_num, 'current': current,
+                               'peak': peak, 'top': top})
+
+    def report(self) -> Dict[str, Any]:
+        """Return everything recorded so far as a dictionary of lists,
+        dictionaries, strings and numbers.
+        """
+        wall_time = self._wall_time
+        if self._started is not None:
+            wall_time += time.perf_counter() - self._started
+        stages = {}
+        for stage in STAGES:
+            stages[stage] = {
+                'total': self.totals[stage],
+                'mean': self.totals[stage] / self.rounds if self.rounds
+                        else 0.0,
+                'max': self.longest[stage]
+            }
+        report = {'rounds': self.rounds, 'wall_time': wall_time,
+                  'stages': stages, 'memory': self.snapshots}
+        if self.keep_rounds:
+            per_round = {'round': self._round_nums.tolist()}
+            for stage in STAGES:
+                per_round[stage] = self._per_round[stage].tolist()
+            report['per_round'] = per_round
+        return report
+
+    def write(self, filename: str) -> None:
+        """Save the report of everything recorded so far as the JSON file
+        <filename>.
+        """
+        with open(filename, 'w') as out:
+            json.dump(self.report(), out, indent=1)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'allowed-io': ['write'],
+        'extra-imports': ['array', 'json', 'time', 'tracemalloc'],
+        'max-nested-blocks': 4,
+        'max-attributes': 15,
+        'disable': ['R0201']
+    })
@@ -0,0 +1,318 @@
+"""CSC148 Assignment 1 - Remote rendering
+
+=== Module Description ===
+This module lets a simulation be watched without being slowed down by its
+animation. RemoteVisualizer has the same show_* interface as Visualizer, but
+instead of drawing it records what happened in each round as a compact delta
+of integers and sends it to a renderer process. The renderer keeps its own
+copy of the building's people and elevators up to date from the deltas and
+animates them with a Visualizer at its own pace.
+
+The channel to the renderer holds at most QUEUE_ROUNDS messages, and the
+simulation never waits for room in it: when it is full, the round's delta is
+dropped. Once there is room again, the renderer is sent a snapshot of the
+whole building instead of the deltas it missed, and jumps straight to it.
+When the renderer falls behind, it also applies every message already waiting
+without drawing and only animates the latest one. Either way the window
+shows a live view of the run however fast the simulation goes, and neither
+the lag nor the memory held by the channel grow with the length of the run.
+
+The renderer is a daemon process, killed as soon as Python exits, so the
+last round is only shown once close has been called. Simulation.run does
+that at its end; code driving a RemoteVisualizer itself must call close when
+done.
+
+Each message is a (kind, contents) pair. A ROUND message holds a round's
+delta:
+    round_num
+    arrivals   flat list of (person id, start floor, target floor)
+    leaving    flat list of (person id, elevator index)
+    boarding   flat list of (person id, elevator index)
+    moves      the Direction value of each elevator's move
+and a SNAPSHOT message the building after a round:
+    round_num
+    people     flat list of (person id, start floor, target floor, arrival
+               round) of everyone in the building, in arrival order
+    floors     the floor of each elevator
+    riders     the ids of each elevator's passengers, in boarding order
+where person ids are small integers handed out as people arrive.
+"""
+from __future__ import annotations
+import multiprocessing
+from queue import Empty, Full
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from algorithms import Direction
+from entities import Person, Elevator, PassengerList
+
+if TYPE_CHECKING:
+    from visualizer import Visualizer
+
+# How long the idle renderer waits for a round before handling window events
+IDLE_TIMEOUT = 0.05
+
+# The most messages waiting for the renderer at once
+QUEUE_ROUNDS = 4
+
+# The kinds of message sent to the renderer
+ROUND = 0
+SNAPSHOT = 1
+
+RoundDelta = Tuple[int, List[int], List[int], List[int], List[int]]
+Snapshot = Tuple[int, List[int], List[int], List[List[int]]]
+
+
+class RemoteVisualizer:
+    """A stand-in for Visualizer that streams each round to a renderer
+    process.
+
+    Only close ever waits for the renderer.
+
+    === Private Attributes ===
+    _queue: the bounded queue of messages sent to the renderer; None once
+            closed
+    _process: the renderer process
+    _elevators: the elevators of the simulation
+    _elevator_ids: the index of each elevator in the simulation
+    _person_ids: the id of each person in the building, in arrival order
+    _next_id: the id to give the next person who arrives
+    _round: the delta of the round being recorded
+    _stale: whether a round was dropped since the last message sent, so
+            the renderer needs a snapshot
+    """
+    _queue: Optional[multiprocessing.Queue]
+    _process: multiprocessing.Process
+    _elevators: List[Elevator]
+    _elevator_ids: Dict[Elevator, int]
+    _person_ids: Dict[Person, int]
+    _next_id: int
+    _round: RoundDelta
+    _stale: bool
+
+    def __init__(self,
+                 elevators: List[Elevator],
+                 num_floors: int,
+                 **options: int) -> None:
+        """Start a renderer process showing <elevators> in a building with
+        <num_floors> floors.
+
+        <options> are passed on to the renderer's Visualizer.
+
+        Precondition: every elevator is empty and on floor 1.
+        """
+        self._elevators = elevators
+        self._elevator_ids = {elevator: i
+                              for i, elevator in enumerate(elevators)}
+        self._person_ids = {}
+        self._next_id = 0
+        self._round = (0, [], [], [], [])
+        self._stale = False
+
+        self._queue = multiprocessing.Queue(QUEUE_ROUNDS)
+        self._process = multiprocessing.Process(
+            target=_render_rounds,
+            args=(self._queue, num_floors, len(elevators),
+                  elevators[0].max_pass, options),
+            daemon=True)
+        self._process.start()
+
+    def render_header(self, round_num: int) -> None:
+        """Start recording round <round_num>."""
+        self._round = (round_num, [], [], [], [])
+
+    def show_arrivals(self, arrivals: Dict[int, List[Person]]) -> None:
+        """Record new arrivals."""
+        record = self._round[1]
+        for people in arrivals.values():
+            for person in people:
+                self._person_ids[person] = self._next_id
+                record.extend((self._next_id, person.start, person.target))
+                self._next_id += 1
+
+    def show_boarding(self, person: Person, elevator: Elevator) -> None:
+        """Record <person> boarding <elevator>."""
+        self._round[3].extend((self._person_ids[person],
+                               self._elevator_ids[elevator]))
+
+    def show_disembarking(self, person: Person, elevator: Elevator) -> None:
+        """Record <person> leaving <elevator>."""
+        self._round[2].extend((self._person_ids.pop(person),
+                               self._elevator_ids[elevator]))
+
+    def show_elevator_moves(self,
+                            elevators: List[Elevator],
+                            directions: List[Direction]) -> None:
+        """Record the moves of every elevator."""
+        self._round[4].extend(direction.value for direction in directions)
+
+    def animate(self) -> None:
+        """Send the recorded round to the renderer, or a snapshot if it
+        missed a round, unless the renderer has fallen too far behind.
+        """
+        if self._queue is None:
+            return
+        if self._queue.full():
+            self._stale = True
+            return
+        if self._stale:
+            message = (SNAPSHOT, self._snapshot())
+        else:
+            message = (ROUND, self._round)
+        try:
+            self._queue.put_nowait(message)
+        except Full:
+            self._stale = True
+        else:
+            self._stale = False
+
+    def _snapshot(self) -> Snapshot:
+        """Return a snapshot of the building after the recorded round."""
+        people = []
+        for person, person_id in self._person_ids.items():
+            people.extend((person_id, person.start, person.target,
+                           person.arrival))
+        return (self._round[0], people,
+                [elevator.current_floor for elevator in self._elevators],
+                [[self._person_ids[person] for person in elevator.passengers]
+                 for elevator in self._elevators])
+
+    def wait(self, wait_time: int) -> None:
+        """Do nothing: the renderer paces itself, not the simulation."""
+
+    def close(self) -> None:
+        """Wait for the renderer to show the last round, then close its
+        window.
+        """
+        if self._queue is None:
+            return
+        if self._stale:
+            self._queue.put((SNAPSHOT, self._snapshot()))
+        self._queue.put(None)
+        self._queue.close()
+        self._queue = None
+        self._process.join()
+
+
+def _render_rounds(queue: multiprocessing.Queue, num_floors: int,
+                   num_elevators: int, capacity: int,
+                   options: Dict[str, int]) -> None:
+    """Animate the messages read from <queue> until None is read.
+
+    This is the main function of the renderer process.
+    """
+    # Only the renderer process imports pygame
+    from visualizer import Visualizer
+
+    elevators = [Elevator([], capacity) for _ in range(num_elevators)]
+    visualizer = Visualizer(elevators, num_floors, True, **options)
+    people: Dict[int, Person] = {}
+    while True:
+        try:
+            batch = [queue.get(timeout=IDLE_TIMEOUT)]
+        except Empty:
+            # Keep the window responsive while the simulation is busy
+            visualizer.render()
+            continue
+
+        # Take every message sent meanwhile, and only animate the last one
+        while batch[-1] is not None:
+            try:
+                batch.append(queue.get_nowait())
+            except Empty:
+                break
+        closed = batch[-1] is None
+        if closed:
+            batch.pop()
+
+        visualizer.set_drawing(False)
+        for i, (kind, contents) in enumerate(batch):
+            if i == len(batch) - 1:
+                visualizer.set_drawing(True)
+            if kind == SNAPSHOT:
+                _apply_snapshot(contents, elevators, people, num_floors,
+                                visualizer)
+            else:
+                _apply_round(contents, elevators, people, num_floors,
+                             visualizer)
+        if closed:
+            # The renderer's copy of a FrameExporter is the one writing
+            if options.get('export') is not None:
+                options['export'].close()
+            return
+
+
+def _apply_snapshot(snapshot: Snapshot, elevators: List[Elevator],
+                    people: Dict[int, Person], num_floors: int,
+                    visualizer: Visualizer) -> None:
+    """Replace <elevators> and <people> with the building in <snapshot>, and
+    show it on <visualizer> from scratch.
+    """
+    round_num, arrivals, floors, riders = snapshot
+    people.clear()
+    for i in range(0, len(arrivals), 4):
+        person = Person(arrivals[i + 1], arrivals[i + 2])
+        person.arrival = arrivals[i + 3]
+        people[arrivals[i]] = person
+
+    riding = set()
+    for elevator, floor, ids in zip(elevators, floors, riders):
+        elevator.current_floor = floor
+        elevator.passengers = PassengerList(people[person_id]
+                                            for person_id in ids)
+        riding.update(ids)
+    waiting: Dict[int, List[Person]] = {
+        floor: [] for floor in range(1, num_floors + 1)}
+    for person_id, person in people.items():
+        if person_id not in riding:
+            waiting[person.start].append(person)
+    visualizer.show_state(round_num, waiting)
+
+
+def _apply_round(delta: RoundDelta, elevators: List[Elevator],
+                 people: Dict[int, Person], num_floors: int,
+                 visualizer: Visualizer) -> None:
+    """Update <elevators> and <people> with the round <delta>, showing every
+    change on <visualizer> in the same order as Simulation.run does.
+    """
+    round_num, arrivals, leaving, boarding, moves = delta
+    visualizer.render_header(round_num)
+
+    new_arrivals: Dict[int, List[Person]] = {
+        floor: [] for floor in range(1, num_floors + 1)}
+    for i in range(0, len(arrivals), 3):
+        person = Person(arrivals[i + 1], arrivals[i + 2])
+        person.arrival = round_num
+        people[arrivals[i]] = person
+        new_arrivals[person.start].append(person)
+    visualizer.show_arrivals(new_arrivals)
+
+    for i in range(0, len(leaving), 2):
+        person = people.pop(leaving[i])
+        elevator = elevators[leaving[i + 1]]
+        elevator.passengers.remove(person)
+        person.wait_time = round_num - person.arrival
+        person.start = person.target
+        visualizer.show_disembarking(person, elevator)
+
+    for i in range(0, len(boarding), 2):
+        person = people[boarding[i]]
+        elevator = elevators[boarding[i + 1]]
+        elevator.passengers.append(person)
+        visualizer.show_boarding(person, elevator)
+
+    for elevator, move in zip(elevators, moves):
+        elevator.current_floor += move
+    visualizer.show_elevator_moves(elevators,
+                                   [Direction(move) for move in moves])
+    visualizer.animate()
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['multiprocessing', 'queue', 'algorithms', 'entities',
+                          'visualizer'],
+        'max-nested-blocks': 4,
+        'max-attributes': 12,
+        'disable': ['R0201']
+    })
@@ -0,0 +1,326 @@
+"""CSC148 Assignment 1 - Reinforcement learning environments
+
+=== Module Description ===
+This module wraps Simulation as an environment for training a learned moving
+algorithm. ElevatorEnv runs one simulation: reset starts an episode, and each
+step takes the directions a MovingAlgorithm would return for the round and
+moves the simulation on to the next round. VecEnv runs several environments
+in worker processes.
+
+Every episode starts the arrival generator over from where it was when the
+environment was made, through the get_state and set_state methods that
+Simulation checkpoints use, so a generator reading a file reopens it rather
+than being copied. A RandomArrivals that would draw from the random module
+is given the environment's own random.Random instead, so several
+environments in one process, or the code around them, do not disturb each
+other's sequences.
+
+An observation is an int32 array of 3 * num_elevators + num_floors numbers:
+
+    floors          the floor each elevator is on
+    loads           the number of people in each elevator
+    first targets   the target floor of each elevator's first passenger (the
+                    one who has been on longest), or 0 if it is empty
+    waiting         the number of people waiting on each floor, from floor 1
+
+It is taken after boarding, when a MovingAlgorithm would be asked for its
+moves. The reward of a step is minus the number of people in the building
+after it, so the rewards of an episode add up to minus the total number of
+rounds people spent waiting or riding.
+
+VecEnv keeps the observations, rewards, done flags and actions of all its
+environments in shared memory. The workers read their actions from it and
+write their results to it, so only one-byte commands go through the pipes
+to the workers, however large the observations are.
+"""
+from __future__ import annotations
+import copy
+import multiprocessing
+import random
+import traceback
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from algorithms import Direction, RandomArrivals
+from simulation import Simulation
+
+Action = Union[Sequence[Direction], Sequence[int], np.ndarray]
+
+
+class ElevatorEnv:
+    """One simulation, stepped one round at a time.
+
+    === Attributes ===
+    config: the Simulation configuration of every episode
+    episode_rounds: the number of rounds in an episode
+    num_floors: the number of floors
+    num_elevators: the number of elevators
+    observation_size: the length of an observation
+    round_num: the round of the episode the next step finishes
+    rng: the random number generator arrivals are drawn from
+
+    === Private Attributes ===
+    _sim: the simulation of the current episode, or None before reset
+    _start: the state of the arrival generator at the start of an episode
+
+    === Representation Invariants ===
+    episode_rounds >= 1
+    """
+    config: Dict[str, Any]
+    episode_rounds: int
+    num_floors: int
+    num_elevators: int
+    observation_size: int
+    round_num: int
+    rng: random.Random
+    _sim: Optional[Simulation]
+    _start: Any
+
+    def __init__(self, config: Dict[str, Any], episode_rounds: int) -> None:
+        """Initialize an environment running <config> for <episode_rounds>
+        rounds per episode.
+
+        If <config> has a 'seed', rng is seeded with it. Each episode
+        rewinds the arrival generator to the state it is in now. If it is a
+        RandomArrivals without an rng of its own, a copy of it drawing from
+        rng is used instead, whose episodes carry on rng's sequence.
+        """
+        self.episode_rounds = episode_rounds
+        self.num_floors = config['num_floors']
+        self.num_elevators = config['num_elevators']
+        self.observation_size = 3 * self.num_elevators + self.num_floors
+        self.round_num = 0
+        self.rng = random.Random(config.get('seed'))
+        self._sim = None
+        generator = config['arrival_generator']
+        self._start = generator.get_state()
+        if isinstance(generator, RandomArrivals) and generator.rng is None:
+            generator = copy.copy(generator)
+            generator.rng = self.rng
+        self.config = dict(config, visualize=False,
+                           arrival_generator=generator)
+
+    def reset(self, out: np.ndarray = None) -> np.ndarray:
+        """Start a new episode, and return its first observation.
+
+        If <out> is given, the observation is written into it.
+        """
+        self.config['arrival_generator'].set_state(self._start)
+        self._sim = Simulation(self.config)
+        self.round_num = 0
+        self._sim.start_round(0)
+        return self.observe(out)
+
+    def step(self, action: Action,
+             out: np.ndarray = None) -> Tuple[np.ndarray, float, bool]:
+        """Move each elevator in the direction given by <action>, and run the
+        simulation up to the next observation.
+
+        Return the next observation, the reward and whether the episode is
+        over. <action> holds a Direction or a move (-1, 0 or 1) for every
+        elevator; moves past the bottom or top floor are treated as staying.
+        If <out> is given, the observation is written into it.
+        """
+        directions = []
+        for elevator, move in zip(self._sim.elevators, action):
+            if isinstance(move, Direction):
+                move = move.value
+            floor = elevator.current_floor + int(move)
+            if 1 <= floor <= self.num_floors:
+                directions.append(Direction(int(move)))
+            else:
+                directions.append(Direction.STAY)
+        self._sim.move_elevators(directions)
+
+        self.round_num += 1
+        done = self.round_num >= self.episode_rounds
+        if not done:
+            self._sim.start_round(self.round_num)
+        observation = self.observe(out)
+        in_building = observation[self.num_elevators:2 * self.num_elevators] \
+            .sum() + observation[3 * self.num_elevators:].sum()
+        return observation, -float(in_building), done
+
+    def observe(self, out: np.ndarray = None) -> np.ndarray:
+        """Return the current observation (see the module description),
+        written into <out> if it is given.
+        """
+        if out is None:
+            out = np.zeros(self.observation_size, dtype=np.int32)
+        num_elevators = self.num_elevators
+        for e, elevator in enumerate(self._sim.elevators):
+            out[e] = elevator.current_floor
+            out[num_elevators + e] = len(elevator.passengers)
+            if len(elevator.passengers) > 0:
+                out[2 * num_elevators + e] = elevator.passengers[0].target
+            else:
+                out[2 * num_elevators + e] = 0
+        for floor in range(1, self.num_floors + 1):
+            out[3 * num_elevators + floor - 1] = len(self._sim.waiting[floor])
+        return out
+
+
+class VecEnv:
+    """Several ElevatorEnvs, each run by its own worker process.
+
+    Environments start a new episode as soon as one ends: the observation
+    returned for an environment whose done flag is set is the first one of
+    its next episode.
+
+    === Attributes ===
+    num_envs: the number of environments
+    observations: the latest observation of each environment, one per row
+    rewards: the latest reward of each environment
+    dones: whether each environment's last step ended its episode
+    actions: the moves each environment takes in the next step, one row of
+             num_elevators moves per environment
+
+    === Private Attributes ===
+    _pipes: the command pipe of each worker
+    _workers: the worker processes
+    """
+    num_envs: int
+    observations: np.ndarray
+    rewards: np.ndarray
+    dones: np.ndarray
+    actions: np.ndarray
+    _pipes: List[Any]
+    _workers: List[multiprocessing.Process]
+
+    def __init__(self, configs: List[Dict[str, Any]],
+                 episode_rounds: int) -> None:
+        """Start one worker process for each configuration in <configs>.
+
+        The configurations must have the same numbers of floors and
+        elevators, and are sent to the workers once, so they must be
+        picklable. An environment whose configuration has no 'seed' is
+        seeded with its index, so that the workers do not all start from
+        the same random state.
+        """
+        self.num_envs = len(configs)
+        num_elevators = configs[0]['num_elevators']
+        size = 3 * num_elevators + configs[0]['num_floors']
+        buffers = (multiprocessing.RawArray('i', self.num_envs * size),
+                   multiprocessing.RawArray('d', self.num_envs),
+                   multiprocessing.RawArray('b', self.num_envs),
+                   multiprocessing.RawArray('b', self.num_envs * num_elevators))
+        self.observations, self.rewards, self.dones, self.actions = \
+            _views(buffers, self.num_envs, size, num_elevators)
+
+        self._pipes = []
+        self._workers = []
+        for i, config in enumerate(configs):
+            config = dict(config)
+            config.setdefault('seed', i)
+            ours, theirs = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_work, args=(theirs, config, episode_rounds, i,
+                                    buffers),
+                daemon=True)
+            worker.start()
+            theirs.close()
+            self._pipes.append(ours)
+            self._workers.append(worker)
+
+    def reset(self) -> np.ndarray:
+        """Start a new episode in every environment, and return their first
+        observations.
+        """
+        self._command(b'r')
+        return self.observations
+
+    def step(self, actions: np.ndarray = None) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Step every environment with its row of <actions> (or of
+        self.actions, if <actions> is None).
+
+        Return the observations, rewards and done flags of every environment.
+        These are the shared buffers themselves, overwritten by the next step.
+        """
+        if actions is not None:
+            self.actions[:] = actions
+        self._command(b's')
+        return self.observations, self.rewards, self.dones
+
+    def close(self) -> None:
+        """Stop every worker process."""
+        for pipe in self._pipes:
+            pipe.send_bytes(b'c')
+        for pipe, worker in zip(self._pipes, self._workers):
+            worker.join()
+            pipe.close()
+        self._pipes = []
+        self._workers = []
+
+    def _command(self, command: bytes) -> None:
+        """Send <command> to every worker, and wait until all of them are
+        done with it.
+
+        Raise RuntimeError if any of them failed.
+        """
+        for pipe in self._pipes:
+            pipe.send_bytes(command)
+        errors = [pipe.recv_bytes() for pipe in self._pipes]
+        for error in errors:
+            if error:
+                raise RuntimeError(error.decode())
+
+
+def _views(buffers: Tuple[Any, Any, Any, Any], num_envs: int, size: int,
+           num_elevators: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray,
+                                        np.ndarray]:
+    """Return NumPy views of the shared observation, reward, done and action
+    buffers <buffers>.
+    """
+    observations, rewards, dones, actions = buffers
+    return (np.frombuffer(observations, dtype=np.int32)
+            .reshape(num_envs, size),
+            np.frombuffer(rewards, dtype=np.float64),
+            np.frombuffer(dones, dtype=np.bool_),
+            np.frombuffer(actions, dtype=np.int8)
+            .reshape(num_envs, num_elevators))
+
+
+def _work(pipe: Any, config: Dict[str, Any], episode_rounds: int, index: int,
+          buffers: Tuple[Any, Any, Any, Any]) -> None:
+    """Run environment <index> of a VecEnv, following the commands read from
+    <pipe>: b'r' to reset, b's' to step and b'c' to stop.
+
+    Each command is answered with an empty message once the results are in
+    the shared buffers, or with the error that made it fail.
+    """
+    env = ElevatorEnv(config, episode_rounds)
+    observations, rewards, dones, actions = _views(
+        buffers, len(buffers[1]), env.observation_size, env.num_elevators)
+    out = observations[index]
+    while True:
+        command = pipe.recv_bytes()
+        if command == b'c':
+            return
+        try:
+            if command == b'r':
+                env.reset(out)
+                rewards[index] = 0
+                dones[index] = False
+            else:
+                _, reward, done = env.step(actions[index], out)
+                if done:
+                    env.reset(out)
+                rewards[index] = reward
+                dones[index] = done
+        except Exception:  # Sent back to VecEnv, which raises it
+            pipe.send_bytes(traceback.format_exc().encode())
+        else:
+            pipe.send_bytes(b'')
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['copy', 'multiprocessing', 'random', 'traceback',
+                          'numpy', 'algorithms', 'simulation'],
+        'max-nested-blocks': 4,
+        'max-attributes': 12,
+        'disable': ['R0201']
+    })
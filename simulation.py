@@ -1,272 +1,572 @@
-"""CSC148 Assignment 1 - Simulation
-
-=== CSC148 Fall 2018 ===
-Department of Computer Science,
-University of Toronto
-
-=== Module description ===
-This contains the main Simulation class that is actually responsible for
-creating and running the simulation. You'll also find the function `sample_run`
-here at the bottom of the file, which you can use as a starting point to run
-your simulation on a small configuration.
-
-Note that we have provided a fairly comprehensive list of attributes for
-Simulation already. You may add your own *private* attributes, but should not
-remove any of the existing attributes.
-"""
-# You may import more things from these modules (e.g., additional types from
-# typing), but you may not import from any other modules.
-from typing import Dict, List, Any
-
-import algorithms
-from entities import Person, Elevator
-from visualizer import Visualizer
-
-
-class Simulation:
-    """The main simulation class.
-
-    === Attributes ===
-    arrival_generator: the algorithm used to generate new arrivals.
-    elevators: a list of the elevators in the simulation
-    moving_algorithm: the algorithm used to decide how to move elevators
-    num_floors: the number of floors
-    visualizer: the Pygame visualizer used to visualize this simulation
-    waiting: a dictionary of people waiting for an elevator
-             (keys are floor numbers, values are the list of waiting people)
-    num_rounds: the number of rounds the simulation should run for
-    _waitt: stores the amount of time it took people to reach their target floor
-    __people_completed: the number of people that reached their target floor
-    _total_people: the total number of people generated in the simulation
-
-    === Representation Invariants ===
-        elevators > 0
-        num_floors > 0
-        num_rounds > 0
-    """
-    arrival_generator: algorithms.ArrivalGenerator
-    elevators: List[Elevator]
-    moving_algorithm: algorithms.MovingAlgorithm
-    num_floors: int
-    visualizer: Visualizer
-    waiting: Dict[int, List[Person]]
-    num_rounds: int
-    __people_completed: int
-    _total_people: int
-    _waitt: List[int]
-
-    def __init__(self,
-                 config: Dict[str, Any]) -> None:
-        """Initialize a new simulation using the given configuration."""
-
-        # Initialize the visualizer.
-        # Note that this should be called *after* the other attributes
-        # have been initialized.
-
-
-        self.num_floors = config['num_floors']
-        self.elevators = []
-        self.waiting = {}
-        for i in range(1, self.num_floors+1):
-            self.waiting[i] = []
-        for i in range(0, config['num_elevators']):
-            self.elevators.append(Elevator([], config['elevator_capacity']))
-
-        self.arrival_generator = config['arrival_generator']
-        self.moving_algorithm = config['moving_algorithm']
-
-        self.visualizer = Visualizer(self.elevators, self.num_floors,
-                                     config['visualize'])
-
-        self.num_rounds = 0
-        self.__people_completed = 0
-        self._waitt = []
-        self._total_people = 0
-
-    ############################################################################
-    # Handle rounds of simulation.
-    ############################################################################
-    def run(self, num_rounds: int) -> Dict[str, Any]:
-        """Run the simulation for the given number of rounds.
-
-        Return a set of statistics for this simulation run, as specified in the
-        assignment handout.
-
-        Precondition: num_rounds >= 1.
-
-        Note: each run of the simulation starts from the same initial state
-        (no people, all elevators are empty and start at floor 1).
-        """
-        self.num_rounds = num_rounds
-        for i in range(num_rounds):
-            self.visualizer.render_header(i)
-
-            # Stage 1: generate new arrivals
-            self._generate_arrivals(i)
-
-            # Stage 2: leave elevators
-            self._handle_leaving()
-
-            # Stage 3: board elevators
-            self._handle_boarding()
-
-            # Stage 4: move the elevators using the moving algorithm
-            self._move_elevators()
-
-            # Update anger of all peoples
-            self._update_anger()
-
-            # Pause for 1 second
-            self.visualizer.wait(1)
-
-        return self._calculate_stats()
-
-    def _generate_arrivals(self, round_num: int) -> None:
-        """Generate and visualize new arrivals."""
-
-        arrivals = self.arrival_generator.generate(round_num)
-
-        #If there are new arrivals, add the new arrivals self.waiting
-        if arrivals is not None:
-            for i in range(1, len(arrivals)+1):
-                current = self.waiting[i]
-                self.waiting[i] = current + arrivals[i]
-                self._total_people += len(arrivals[i])
-            self.visualizer.show_arrivals(arrivals)
-
-
-    def _handle_leaving(self) -> None:
-        """Handle people leaving elevators."""
-
-        for elevator in self.elevators:
-
-            for passenger in elevator.passengers:
-
-                #if a passenger has reached their target floor
-                if passenger.target == elevator.current_floor:
-                    self.__people_completed += 1
-                    self._waitt.append(passenger.wait_time)
-                    passenger.start = passenger.target
-                    elevator.passengers.remove(passenger)
-                    self.visualizer.show_disembarking(passenger, elevator)
-
-
-    def _handle_boarding(self) -> None:
-
-        """Handle boarding of people and visualize."""
-        for i in range(1, self.num_floors+1):
-            lst = self.waiting[i]
-            for elevator in self.elevators:
-                self._update_elevator(elevator, i, lst)
-
-    def _update_anger(self) -> None:
-
-        """Update the wait_time of people who haven't
-        reached their target floor yet"""
-
-        #Update anger of people waiting on floors
-        for i in range(1, len(self.waiting)+1):
-            for person in self.waiting[i]:
-                person.wait_time += 1
-
-        #Update anger of people on elevators
-        for elevator in self.elevators:
-            for person in elevator.passengers:
-                person.wait_time += 1
-
-    def _update_elevator(self, elevator: Elevator, floor: int,
-                         lst: List[Person]) -> None:
-
-        """Add passengers to the elevator"""
-
-        #If the elevator is on the specified floor and not at max capacity
-        if elevator.current_floor == floor and \
-                  len(elevator.passengers) < elevator.max_pass:
-
-            #While the elevator is not at max capacity and there are people on
-            #the floor
-            while (len(elevator.passengers) < elevator.max_pass) and (
-                    len(lst) > 0):
-                elevator.passengers.append(lst[0])
-                self.visualizer.show_boarding(lst[0], elevator)
-                lst.remove(lst[0])
-
-    def _move_elevators(self) -> None:
-        """Move the elevators in this simulation.
-
-        Use this simulation's moving algorithm to move the elevators.
-        """
-        moves = self.moving_algorithm.move_elevators(self.elevators,
-                                                     self.waiting,
-                                                     self.num_floors)
-        self.visualizer.show_elevator_moves(self.elevators, moves)
-
-    ############################################################################
-    # Statistics calculations
-    ############################################################################
-    def _calculate_stats(self) -> Dict[str, int]:
-        """Report the statistics for the current run of this simulation.
-        """
-
-
-        #If no one reached their target floor
-        if self.__people_completed == 0:
-            max_wait = -1
-            min_wait = -1
-            avg_wait = -1
-
-        #if people reached their target floor
-        else:
-            min_wait = min(self._waitt)
-            max_wait = max(self._waitt)
-
-            #Calculate the average wait time
-            summ = 0
-            for i in range(len(self._waitt)):
-                summ += self._waitt[i]
-            avg_wait = summ//len(self._waitt)
-
-
-        return {
-            'num_iterations': self.num_rounds,
-            'total_people': self._total_people,
-            'people_completed': self.__people_completed,
-            'max_time': max_wait,
-            'min_time': min_wait,
-            'avg_time': avg_wait
-        }
-
-
-def sample_run() -> Dict[str, int]:
-    """Run a sample simulation, and return the simulation statistics."""
-    config = {
-        'num_floors': 6, #check
-        'num_elevators': 3, #check
-        'elevator_capacity': 3, #check
-        'num_people_per_round': 2,
-        # Random arrival generator with 6 max floors and 2 arrivals per round.
-        'arrival_generator': algorithms.FileArrivals(6,"sample_arrivals.csv"),
-        'moving_algorithm': algorithms.ShortSighted(),
-        'visualize': True,
-        'max-attributes': 12,
-        'disable': ['R0201']
-    }
-
-    sim = Simulation(config)
-    stats = sim.run(10)
-    return stats
-
-
-if __name__ == '__main__':
-    # Uncomment this line to run our sample simulation (and print the
-    # statistics generated by the simulation).
-    print(sample_run())
-    #
-    # import python_ta
-    # python_ta.check_all(config={
-    #     'extra-imports': ['entities', 'visualizer', 'algorithms', 'time'],
-    #     'max-nested-blocks': 4,
-    #     'max-attributes': 12,
-    #     'disable': ['R0201']
-    # })
-    #sample_run()
+"""CSC148 Assignment 1 - Simulation
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module description ===
+This contains the main Simulation class that is actually responsible for
+creating and running the simulation. You'll also find the function `sample_run`
+here at the bottom of the file, which you can use as a starting point to run
+your simulation on a small configuration.
+
+A simulation built with 'visualize': False runs headless: it never imports
+pygame or the visualizer module, so batch runs skip pygame startup entirely.
+With 'render_process': True as well, the simulation runs at full speed and a
+separate renderer process (see remote.py) shows a live view of it. Since the
+renderer would be killed when Python exits, run waits at its end for the
+renderer to show the last round and then closes it, so such a simulation can
+only be run once.
+
+The optional 'playback_speed', 'frame_skip' and 'fast_forward' settings control
+how a visualized run is played back, and an 'export' FrameExporter (see
+export.py) records it to image files without opening a window; see
+Visualizer.
+
+A 'profiler' StageProfiler (see profiling.py) times each stage of every round
+and can take memory snapshots, to see where the time of a slow run goes. A
+'metrics' MetricsServer (see metrics.py) serves live figures of a long run
+over HTTP while it is going. Long headless runs can save checkpoints and
+resume from them after a crash; see Simulation.run and load_checkpoint.
+
+Note that we have provided a fairly comprehensive list of attributes for
+Simulation already. You may add your own *private* attributes, but should not
+remove any of the existing attributes.
+"""
+# You may import more things from these modules (e.g., additional types from
+# typing), but you may not import from any other modules.
+from __future__ import annotations
+import gzip
+import os
+import pickle
+import random
+from typing import Deque, Dict, List, Any, Optional, Tuple, Union, \
+    TYPE_CHECKING
+
+import algorithms
+from entities import Person, Elevator, PassengerList
+from hall_calls import WaitingQueues
+from profiling import NullProfiler
+from stats import WaitStats
+
+# The version of the checkpoint format written by Simulation.save_checkpoint
+CHECKPOINT_VERSION = 1
+
+if TYPE_CHECKING:
+    from visualizer import Visualizer
+    from remote import RemoteVisualizer
+    from profiling import StageProfiler
+    from metrics import MetricsServer
+    from export import FrameExporter
+
+
+class Simulation:
+    """The main simulation class.
+
+    === Attributes ===
+    arrival_generator: the algorithm used to generate new arrivals.
+    elevators: a list of the elevators in the simulation
+    moving_algorithm: the algorithm used to decide how to move elevators
+    num_floors: the number of floors
+    visualizer: the Pygame visualizer used to visualize this simulation,
+                a RemoteVisualizer feeding a renderer process, or None if
+                this simulation runs headless
+    waiting: a dictionary of people waiting for an elevator
+             (keys are floor numbers, values are deques of waiting people,
+             first come first served), which also tracks the floors where
+             someone is waiting in waiting.calls
+    num_rounds: the number of rounds the simulation should run for
+    _waitt: running statistics of the amount of time it took people to reach
+            their target floor
+    __people_completed: the number of people that reached their target floor
+    _total_people: the total number of people generated in the simulation
+    _elevators_by_floor: the elevators on each floor that has at least one,
+                         in the same order as elevators
+    _render_process: whether visualizer is a RemoteVisualizer, which is
+                     closed at the end of run
+    _export: the FrameExporter recording the run, closed at the end of run,
+             or None
+    _profiler: the profiler timing the stages of each round, or a
+               NullProfiler
+    _metrics: the server publishing live figures of the run, or None
+    _rounds_done: the number of rounds of the current run done so far, not
+                  counting rounds skipped at its end
+    _resume_round: the round the next run starts from
+
+    === Representation Invariants ===
+        elevators > 0
+        num_floors > 0
+        num_rounds > 0
+    """
+    arrival_generator: algorithms.ArrivalGenerator
+    elevators: List[Elevator]
+    moving_algorithm: algorithms.MovingAlgorithm
+    num_floors: int
+    visualizer: Optional[Union[Visualizer, RemoteVisualizer]]
+    waiting: WaitingQueues
+    num_rounds: int
+    __people_completed: int
+    _total_people: int
+    _waitt: WaitStats
+    _elevators_by_floor: Dict[int, List[Elevator]]
+    _render_process: bool
+    _export: Optional[FrameExporter]
+    _profiler: Union[StageProfiler, NullProfiler]
+    _metrics: Optional[MetricsServer]
+    _rounds_done: int
+    _resume_round: int
+
+    def __init__(self,
+                 config: Dict[str, Any]) -> None:
+        """Initialize a new simulation using the given configuration."""
+
+        # Initialize the visualizer.
+        # Note that this should be called *after* the other attributes
+        # have been initialized.
+
+
+        self.num_floors = config['num_floors']
+        self.elevators = []
+        self.waiting = WaitingQueues(self.num_floors)
+        for i in range(0, config['num_elevators']):
+            self.elevators.append(Elevator([], config['elevator_capacity']))
+        self._elevators_by_floor = {}
+        self._index_elevators()
+
+        self.arrival_generator = config['arrival_generator']
+        self.moving_algorithm = config['moving_algorithm']
+
+        # Only import pygame (through the visualizer) when it is needed
+        options = {key: config[key]
+                   for key in ('visible_floors', 'crowd_threshold',
+                               'playback_speed', 'frame_skip', 'fast_forward',
+                               'export')
+                   if key in config}
+        if config['visualize'] and config.get('render_process', False):
+            from remote import RemoteVisualizer
+            self.visualizer = RemoteVisualizer(self.elevators,
+                                               self.num_floors, **options)
+        elif config['visualize']:
+            from visualizer import Visualizer
+            self.visualizer = Visualizer(self.elevators, self.num_floors,
+                                         True, **options)
+        else:
+            self.visualizer = None
+
+        self._render_process = self.visualizer is not None and \
+            config.get('render_process', False)
+        self._export = config.get('export') if config['visualize'] else None
+        self.num_rounds = 0
+        self.__people_completed = 0
+        self._waitt = WaitStats()
+        self._total_people = 0
+        self._profiler = config.get('profiler') or NullProfiler()
+        self._metrics = config.get('metrics')
+        self._rounds_done = 0
+        self._resume_round = 0
+
+    ############################################################################
+    # Handle rounds of simulation.
+    ############################################################################
+    def run(self, num_rounds: int, checkpoint: Optional[str] = None,
+            checkpoint_every: int = 0) -> Dict[str, Any]:
+        """Run the simulation for the given number of rounds.
+
+        Return a set of statistics for this simulation run, as specified in the
+        assignment handout.
+
+        Precondition: num_rounds >= 1.
+
+        Note: each run of the simulation starts from the same initial state
+        (no people, all elevators are empty and start at floor 1).
+
+        Without a visualizer, rounds in which the building is empty and
+        nobody arrives are skipped over when the moving algorithm leaves idle
+        elevators alone; the statistics are the same as if they were run.
+
+        If <checkpoint> is given, the run resumes from that checkpoint file
+        if it exists (see load_checkpoint), saves a checkpoint to it every
+        <checkpoint_every> rounds if that is not 0, and saves one at the end.
+        Rerunning the same simulation after a crash then picks up from the
+        last checkpoint instead of round 0.
+
+        A renderer process (see 'render_process') is closed once it has shown
+        the last round, and a FrameExporter (see 'export') once every frame
+        has been written, so such a simulation can only be run once. The
+        arrival generator is closed at the end of the run as well (see
+        ArrivalGenerator.close). All of these are closed even if the run
+        fails.
+        """
+        self.num_rounds = num_rounds
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self.load_checkpoint(checkpoint)
+        self._profiler.start()
+        try:
+            i = self._resume_round
+            self._resume_round = 0
+            next_checkpoint = i - i % checkpoint_every + checkpoint_every \
+                if checkpoint_every else num_rounds
+            while i < num_rounds:
+                self._profiler.begin_round()
+
+                # Stages 1 to 3: arrivals, leaving and boarding
+                self.start_round(i)
+
+                # Stage 4: move the elevators using the moving algorithm
+                self._move_elevators()
+
+                # Animate this round's moves, then pause for 1 second
+                if self.visualizer is not None:
+                    self.visualizer.animate()
+                    self.visualizer.wait(1)
+                    self._profiler.lap('visualizer')
+                self._profiler.end_round(i)
+
+                if self._metrics is not None:
+                    self._metrics.update(i, self.waiting, self.elevators,
+                                         self._total_people)
+                i += 1
+
+                # Jump to the next round with arrivals if nothing can happen
+                # before it
+                if self._is_idle():
+                    next_round = self.arrival_generator.next_arrival_round(i)
+                    i = num_rounds if next_round is None \
+                        else min(max(i, next_round), num_rounds)
+                self._rounds_done = i
+
+                if checkpoint is not None and i >= next_checkpoint and \
+                        i < num_rounds:
+                    self.save_checkpoint(checkpoint)
+                    next_checkpoint = \
+                        i - i % checkpoint_every + checkpoint_every
+
+            if checkpoint is not None:
+                self.save_checkpoint(checkpoint)
+        finally:
+            self.arrival_generator.close()
+            if self._render_process:
+                self.visualizer.close()
+            if self._export is not None:
+                self._export.close()
+        self._profiler.finish()
+        if self._metrics is not None:
+            self._metrics.publish(num_rounds - 1, self.waiting,
+                                  self.elevators, self._total_people)
+        return self._calculate_stats()
+
+    def save_checkpoint(self, filename: str) -> None:
+        """Save the state of this simulation after the rounds of the current
+        (or last) run done so far to the file <filename>.
+
+        The checkpoint holds the round reached, the waiting people, the
+        elevators and their passengers, the statistics so far, the state of
+        the random module and how far the arrival generator has got. The
+        file is replaced in one step, so a crash while saving leaves the
+        previous checkpoint intact.
+        """
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'round': self._rounds_done,
+            'num_floors': self.num_floors,
+            'waiting': [[_person_state(person)
+                         for person in self.waiting[floor]]
+                        for floor in range(1, self.num_floors + 1)],
+            'elevators': [(elevator.current_floor,
+                           [_person_state(person)
+                            for person in elevator.passengers])
+                          for elevator in self.elevators],
+            'people_completed': self.__people_completed,
+            'total_people': self._total_people,
+            'wait_stats': self._waitt.get_state(),
+            'random': random.getstate(),
+            'arrivals': self.arrival_generator.get_state()
+        }
+        temporary = filename + '.tmp'
+        with gzip.open(temporary, 'wb') as out:
+            pickle.dump(state, out, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, filename)
+
+    def load_checkpoint(self, filename: str) -> None:
+        """Restore the state saved by save_checkpoint to the file <filename>,
+        so that the next run picks up from the round it was saved after.
+
+        This simulation must be headless, and have the configuration of the
+        one that saved the checkpoint (apart from the number of rounds), with
+        a fresh arrival generator. Several simulations can load the same
+        checkpoint, for example to branch experiments off a shared warm-up.
+
+        Raise ValueError if the checkpoint does not fit this simulation.
+        """
+        if self.visualizer is not None:
+            raise ValueError('checkpoints can only be loaded by headless '
+                             'simulations')
+        with gzip.open(filename, 'rb') as checkpoint:
+            state = pickle.load(checkpoint)
+        if state.get('version') != CHECKPOINT_VERSION or \
+                state['num_floors'] != self.num_floors or \
+                len(state['elevators']) != len(self.elevators):
+            raise ValueError(f'{filename} is not a checkpoint of this '
+                             f'simulation')
+
+        for floor, people in enumerate(state['waiting'], 1):
+            self.waiting[floor].clear()
+            self.waiting[floor].extend(_make_person(person)
+                                       for person in people)
+            if people:
+                self.waiting.calls.add(floor)
+            else:
+                self.waiting.calls.discard(floor)
+        for elevator, (floor, passengers) in zip(self.elevators,
+                                                 state['elevators']):
+            elevator.current_floor = floor
+            elevator.passengers = PassengerList(_make_person(person)
+                                                for person in passengers)
+        self._index_elevators()
+
+        self.__people_completed = state['people_completed']
+        self._total_people = state['total_people']
+        self._waitt.set_state(state['wait_stats'])
+        random.setstate(state['random'])
+        self.arrival_generator.set_state(state['arrivals'])
+        self._rounds_done = self._resume_round = state['round']
+
+    def _is_idle(self) -> bool:
+        """Return whether rounds without arrivals can be skipped, since
+        nobody is waiting or riding and nothing is drawn.
+        """
+        return (self.visualizer is None and
+                not self.moving_algorithm.moves_when_idle and
+                not self.waiting.calls and
+                all(len(elevator.passengers) == 0
+                    for elevator in self.elevators))
+
+    def start_round(self, round_num: int) -> None:
+        """Run the first three stages of round <round_num>: generate new
+        arrivals, then let people leave and board elevators.
+
+        Together with move_elevators, this lets a caller step through the
+        simulation one round at a time and choose the moves itself.
+        """
+        profiler = self._profiler
+        if self.visualizer is not None:
+            self.visualizer.render_header(round_num)
+            profiler.lap('visualizer')
+        self._generate_arrivals(round_num)
+        profiler.lap('arrivals')
+        self._handle_leaving(round_num)
+        profiler.lap('leaving')
+        self._handle_boarding()
+        profiler.lap('boarding')
+
+    def move_elevators(self, directions: List[algorithms.Direction]) -> None:
+        """Finish the current round by moving each elevator in the given
+        direction, instead of asking the moving algorithm.
+
+        Precondition: every direction is valid for its elevator (see
+        MovingAlgorithm.move_elevators).
+        """
+        for elevator, direction in zip(self.elevators, directions):
+            elevator.current_floor += direction.value
+        self._show_moves(directions)
+        if self.visualizer is not None:
+            self.visualizer.animate()
+
+    def _generate_arrivals(self, round_num: int) -> None:
+        """Generate and visualize new arrivals."""
+
+        arrivals = self.arrival_generator.generate(round_num)
+
+        #If there are new arrivals, add the new arrivals self.waiting
+        if arrivals is not None:
+            for floor, people in arrivals.items():
+                for person in people:
+                    person.arrival = round_num
+                self.waiting[floor].extend(people)
+                if people:
+                    self.waiting.calls.add(floor)
+                self._total_people += len(people)
+            if self.visualizer is not None:
+                self._profiler.lap('arrivals')
+                self.visualizer.show_arrivals(arrivals)
+                self._profiler.lap('visualizer')
+
+
+    def _handle_leaving(self, round_num: int) -> None:
+        """Handle people leaving elevators in round <round_num>.
+
+        A person's wait time is only worked out here, from the round they
+        arrived in, so nobody is aged while they wait.
+        """
+
+        for elevator in self.elevators:
+
+            #Everyone whose target is this floor leaves, in boarding order
+            for passenger in elevator.passengers.pop_target(
+                    elevator.current_floor):
+                self.__people_completed += 1
+                passenger.wait_time = round_num - passenger.arrival
+                self._waitt.add(passenger.wait_time)
+                if self._metrics is not None:
+                    self._metrics.record_wait(passenger.wait_time)
+                passenger.start = passenger.target
+                if self.visualizer is not None:
+                    self._profiler.lap('leaving')
+                    self.visualizer.show_disembarking(passenger, elevator)
+                    self._profiler.lap('visualizer')
+
+
+    def _handle_boarding(self) -> None:
+
+        """Handle boarding of people and visualize.
+
+        Only floors that have an elevator on them are visited.
+        """
+        for floor in sorted(self._elevators_by_floor):
+            lst = self.waiting[floor]
+            if lst:
+                for elevator in self._elevators_by_floor[floor]:
+                    self._update_elevator(elevator, floor, lst)
+                if not lst:
+                    self.waiting.calls.discard(floor)
+
+    def _update_elevator(self, elevator: Elevator, floor: int,
+                         lst: Deque[Person]) -> None:
+
+        """Add passengers to the elevator"""
+
+        #If the elevator is on the specified floor and not at max capacity
+        if elevator.current_floor == floor and \
+                  len(elevator.passengers) < elevator.max_pass:
+
+            #While the elevator is not at max capacity and there are people on
+            #the floor
+            while (len(elevator.passengers) < elevator.max_pass) and (
+                    len(lst) > 0):
+                person = lst.popleft()
+                elevator.passengers.append(person)
+                if self.visualizer is not None:
+                    self._profiler.lap('boarding')
+                    self.visualizer.show_boarding(person, elevator)
+                    self._profiler.lap('visualizer')
+
+    def _move_elevators(self) -> None:
+        """Move the elevators in this simulation.
+
+        Use this simulation's moving algorithm to move the elevators.
+        """
+        moves = self.moving_algorithm.move_elevators(self.elevators,
+                                                     self.waiting,
+                                                     self.num_floors)
+        self._profiler.lap('algorithm')
+        self._show_moves(moves)
+        self._profiler.lap('moves')
+
+    def _show_moves(self, moves: List[algorithms.Direction]) -> None:
+        """Update the index of elevators after they made <moves>, and
+        visualize the moves.
+        """
+        self._index_elevators()
+        if self.visualizer is not None:
+            self._profiler.lap('moves')
+            self.visualizer.show_elevator_moves(self.elevators, moves)
+            self._profiler.lap('visualizer')
+
+    def _index_elevators(self) -> None:
+        """Rebuild the index of elevators by the floor they are on."""
+        self._elevators_by_floor.clear()
+        for elevator in self.elevators:
+            floor = elevator.current_floor
+            if floor in self._elevators_by_floor:
+                self._elevators_by_floor[floor].append(elevator)
+            else:
+                self._elevators_by_floor[floor] = [elevator]
+
+    ############################################################################
+    # Statistics calculations
+    ############################################################################
+    def wait_summary(self) -> Dict[str, float]:
+        """Report detailed wait time statistics for the people who have
+        reached their target floor so far.
+
+        This can be called at any point of a run. It includes the mean,
+        standard deviation and the 50th, 95th and 99th percentiles; see
+        WaitStats.summary.
+        """
+        return self._waitt.summary()
+
+    def _calculate_stats(self) -> Dict[str, int]:
+        """Report the statistics for the current run of this simulation.
+        """
+
+
+        #If no one reached their target floor
+        if self.__people_completed == 0:
+            max_wait = -1
+            min_wait = -1
+            avg_wait = -1
+
+        #if people reached their target floor
+        else:
+            min_wait = self._waitt.min
+            max_wait = self._waitt.max
+            avg_wait = self._waitt.total // self._waitt.count
+
+
+        return {
+            'num_iterations': self.num_rounds,
+            'total_people': self._total_people,
+            'people_completed': self.__people_completed,
+            'max_time': max_wait,
+            'min_time': min_wait,
+            'avg_time': avg_wait
+        }
+
+
+def _person_state(person: Person) -> Tuple[int, int, int, int]:
+    """Return the attributes of <person> saved in a checkpoint."""
+    return person.start, person.target, person.arrival, person.wait_time
+
+
+def _make_person(state: Tuple[int, int, int, int]) -> Person:
+    """Return the person saved in a checkpoint as <state>."""
+    start, target, arrival, wait_time = state
+    person = Person(start, target)
+    person.arrival = arrival
+    person.wait_time = wait_time
+    return person
+
+
+def sample_run() -> Dict[str, int]:
+    """Run a sample simulation, and return the simulation statistics."""
+    config = {
+        'num_floors': 6, #check
+        'num_elevators': 3, #check
+        'elevator_capacity': 3, #check
+        'num_people_per_round': 2,
+        # Random arrival generator with 6 max floors and 2 arrivals per round.
+        'arrival_generator': algorithms.FileArrivals(6,"sample_arrivals.csv"),
+        'moving_algorithm': algorithms.ShortSighted(),
+        'visualize': True,
+        'max-attributes': 12,
+        'disable': ['R0201']
+    }
+
+    sim = Simulation(config)
+    stats = sim.run(10)
+    return stats
+
+
+if __name__ == '__main__':
+    # Uncomment this line to run our sample simulation (and print the
+    # statistics generated by the simulation).
+    print(sample_run())
+    #
+    # import python_ta
+    # python_ta.check_all(config={
+    #     'extra-imports': ['entities', 'visualizer', 'algorithms', 'time'],
+    #     'max-nested-blocks': 4,
+    #     'max-attributes': 12,
+    #     'disable': ['R0201']
+    # })
+    #sample_run()
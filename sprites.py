@@ -1,173 +1,306 @@
-"""CSC148 Assignment 1 - Sprites
-
-=== CSC148 Fall 2018 ===
-Department of Computer Science,
-University of Toronto
-
-=== Module Description ===
-
-This file contains the different Sprite classes, used for the visualization
-with Pygame, the graphics library we're using for this assignment.
-There's quite a bit in this file, but you aren't responsible for most of it.
-
-DO NOT CHANGE ANY CODE IN THIS FILE. You don't need to for this assignment,
-and in fact you aren't even submitting this file!
-
-The two classes whose documentation you are required to read are ElevatorSprite
-and PersonSprite, as you'll be implementing their subclasses.
-You can completely ignore the other Sprite classes in this file.
-"""
-import random
-from typing import Any
-import pygame
-
-
-# Images for people
-FIGURES = [f'people/person{i}.png' for i in range(1, 6)]
-
-
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-RED = (255, 0, 0)
-BLUE = (0, 0, 255)
-YELLOW = (255, 255, 0)
-GREEN = (0, 255, 0)
-DARK_GREEN = (0, 100, 0)
-
-
-# Dimensions for various objects
-WIDTH = 900               # Screen width
-STAT_WINDOW_HEIGHT = 100  # Space at the top for stats and messages
-FLOOR_HEIGHT = 100        # The height of each floor (including the border)
-FLOOR_BORDER_HEIGHT = 10  # The height of the border
-
-ELEVATOR_HEIGHT = 66      # Elevator height
-ELEVATOR_WIDTH = 44       # Elevator width
-
-PERSON_HEIGHT = 50        # Person height
-PERSON_WIDTH = 32         # Person width
-
-# Fonts
-FONT_HEIGHT = 30
-pygame.init()
-COMIC_SANS = pygame.font.SysFont('Comic Sans MS', FONT_HEIGHT)
-
-
-###############################################################################
-# Sprites
-###############################################################################
-class ElevatorSprite(pygame.sprite.Sprite):
-    """Sprite representing an elevator.
-
-    === Attributes ===
-    image: the Pygame surface on which to draw this sprite
-    rect: the rectangle representing the dimensions of this sprite
-    """
-    image: pygame.Surface
-    rect: pygame.Rect
-
-    def __init__(self) -> None:
-        """Initialize a new ElevatorSprite."""
-        pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.Surface([ELEVATOR_WIDTH, ELEVATOR_HEIGHT])
-        self.image.fill(GREEN)
-        self.image.set_colorkey(WHITE)
-        self.rect = self.image.get_rect()
-
-    def update(self) -> None:
-        """Update this elevator's image based on its fullness."""
-        pygame.draw.rect(self.image, GREEN,
-                         [0, 0, ELEVATOR_WIDTH, ELEVATOR_HEIGHT])
-        pygame.draw.rect(self.image, DARK_GREEN,
-                         [0, ELEVATOR_HEIGHT * (1 - self.fullness()),
-                          ELEVATOR_WIDTH, ELEVATOR_HEIGHT])
-
-    def fullness(self) -> float:
-        """Return the fraction that this elevator is filled.
-
-        The value returned should be a float between 0.0 (completely empty) and
-        1.0 (completely full).
-        """
-        raise NotImplementedError
-
-
-class PersonSprite(pygame.sprite.Sprite):
-    """Sprite representing a person.
-
-    === Attributes ===
-    height: the height of the person sprite
-    width: the width of the person sprite
-    image: the Pygame surface on which to draw this sprite
-    rect: the rectangle representing the dimensions of this sprite
-
-    === Representation Invariants ===
-    height >= 0
-    width >= 0
-    """
-    height: int
-    width: int
-    image: pygame.Surface
-    rect: pygame.Rect
-
-    def __init__(self) -> None:
-        """Initialize a new person sprite."""
-        super().__init__()
-        self.width, self.height = PERSON_WIDTH, PERSON_HEIGHT
-        self.image = self.load_image()
-        self.rect = self.image.get_rect()
-        self.rect.bottom = 0
-        self.rect.centerx = random.randint(-2, 2)
-
-    def load_image(self) -> Any:
-        """Load the image for this sprite and redraws it
-        Lower indices are happier :)
-        """
-        image = pygame.image.load(FIGURES[self.get_anger_level()])
-        return pygame.transform.scale(image, (self.width, self.height))
-
-    def get_anger_level(self) -> int:
-        """Return the anger level of this sprite.
-
-        This determines the image used to render this sprite.
-
-        Anger level must be an integer between 0 and 4, inclusive.
-        (0 means not at all angry, 4 is very angry)
-        """
-        raise NotImplementedError
-
-
-class FloorSprite(pygame.sprite.Sprite):
-    """Sprite that draws a floor of the building.
-    """
-    def __init__(self, width: int, height: int, y: int) -> None:
-        super().__init__()
-        self.image = pygame.Surface([width, height])
-        self.image.fill(WHITE)
-        self.image.set_colorkey(WHITE)
-        pygame.draw.rect(self.image, BLUE, [0, 0, width, FLOOR_BORDER_HEIGHT])
-        self.rect = self.image.get_rect()
-        self.rect.top = y
-
-
-class FloorNum(pygame.sprite.Sprite):
-    """Text Sprite to Label the floor number.
-    """
-    def __init__(self, floor_y: int, text: str) -> None:
-        super().__init__()
-        self.floor_font = COMIC_SANS
-        self.image = self.floor_font.render(text, True, BLACK)
-        self.rect = self.image.get_rect()
-        self.rect.bottom = floor_y
-        self.rect.right = WIDTH - 20
-
-
-class StatLine(pygame.sprite.Sprite):
-    """Text Sprite for displaying some text.
-    """
-    def __init__(self, y: int, text: str):
-        super().__init__()
-        self.floor_font = COMIC_SANS
-        self.image = self.floor_font.render(text, True, BLACK)
-        self.rect = self.image.get_rect()
-        self.rect.top = y
-        self.rect.left = 5
+"""CSC148 Assignment 1 - Sprites
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains the different Sprite classes, used for the visualization
+with Pygame, the graphics library we're using for this assignment.
+There's quite a bit in this file, but you aren't responsible for most of it.
+
+Only the visualizer imports this module, so a headless simulation never
+loads pygame or any images.
+
+The two classes whose documentation you are required to read are ElevatorSprite
+and PersonSprite. VisualElevator and VisualPerson are their concrete
+subclasses; the visualizer wraps every simulation entity in one of them.
+You can completely ignore the other Sprite classes in this file.
+"""
+from __future__ import annotations
+import random
+from typing import Any, Dict, List, Tuple, TYPE_CHECKING
+import pygame
+
+if TYPE_CHECKING:
+    from entities import Person, Elevator
+
+
+# Images for people
+FIGURES = [f'people/person{i}.png' for i in range(1, 6)]
+
+# Person images already decoded and scaled, by (anger level, width, height)
+_IMAGE_CACHE: Dict[Tuple[int, int, int], pygame.Surface] = {}
+
+# Sprite positions are jittered with a random generator of their own, so
+# drawing never changes the random numbers a simulation draws
+_JITTER = random.Random()
+
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+GREEN = (0, 255, 0)
+DARK_GREEN = (0, 100, 0)
+ORANGE = (255, 140, 0)
+LIME = (170, 220, 0)
+
+# Colours for anger levels 0 to 4 in crowd badges
+ANGER_COLOURS = [GREEN, LIME, YELLOW, ORANGE, RED]
+
+
+# Dimensions for various objects
+WIDTH = 900               # Screen width
+STAT_WINDOW_HEIGHT = 100  # Space at the top for stats and messages
+FLOOR_HEIGHT = 100        # The height of each floor (including the border)
+FLOOR_BORDER_HEIGHT = 10  # The height of the border
+
+ELEVATOR_HEIGHT = 66      # Elevator height
+ELEVATOR_WIDTH = 44       # Elevator width
+
+PERSON_HEIGHT = 50        # Person height
+PERSON_WIDTH = 32         # Person width
+
+BADGE_HEIGHT = 50         # Crowd badge height
+BADGE_WIDTH = 80          # Crowd badge width
+BADGE_BAR_HEIGHT = 10     # Height of the anger bar in a crowd badge
+
+# Fonts
+FONT_HEIGHT = 30
+pygame.init()
+COMIC_SANS = pygame.font.SysFont('Comic Sans MS', FONT_HEIGHT)
+
+
+###############################################################################
+# Sprites
+###############################################################################
+class ElevatorSprite(pygame.sprite.Sprite):
+    """Sprite representing an elevator.
+
+    === Attributes ===
+    image: the Pygame surface on which to draw this sprite
+    rect: the rectangle representing the dimensions of this sprite
+    """
+    image: pygame.Surface
+    rect: pygame.Rect
+
+    def __init__(self) -> None:
+        """Initialize a new ElevatorSprite."""
+        pygame.sprite.Sprite.__init__(self)
+        self.image = pygame.Surface([ELEVATOR_WIDTH, ELEVATOR_HEIGHT])
+        self.image.fill(GREEN)
+        self.image.set_colorkey(WHITE)
+        self.rect = self.image.get_rect()
+
+    def update(self) -> None:
+        """Update this elevator's image based on its fullness."""
+        pygame.draw.rect(self.image, GREEN,
+                         [0, 0, ELEVATOR_WIDTH, ELEVATOR_HEIGHT])
+        pygame.draw.rect(self.image, DARK_GREEN,
+                         [0, ELEVATOR_HEIGHT * (1 - self.fullness()),
+                          ELEVATOR_WIDTH, ELEVATOR_HEIGHT])
+
+    def fullness(self) -> float:
+        """Return the fraction that this elevator is filled.
+
+        The value returned should be a float between 0.0 (completely empty) and
+        1.0 (completely full).
+        """
+        raise NotImplementedError
+
+
+class PersonSprite(pygame.sprite.Sprite):
+    """Sprite representing a person.
+
+    === Attributes ===
+    height: the height of the person sprite
+    width: the width of the person sprite
+    image: the Pygame surface on which to draw this sprite
+    rect: the rectangle representing the dimensions of this sprite
+    anger_level: the anger level image is currently showing
+
+    === Representation Invariants ===
+    height >= 0
+    width >= 0
+    0 <= anger_level <= 4
+    """
+    height: int
+    width: int
+    image: pygame.Surface
+    rect: pygame.Rect
+    anger_level: int
+
+    def __init__(self) -> None:
+        """Initialize a new person sprite."""
+        super().__init__()
+        self.width, self.height = PERSON_WIDTH, PERSON_HEIGHT
+        self.anger_level = self.get_anger_level()
+        self.image = self.load_image()
+        self.rect = self.image.get_rect()
+        self.rect.bottom = 0
+        self.rect.centerx = _JITTER.randint(-2, 2)
+
+    def load_image(self) -> Any:
+        """Load the image for this sprite and redraws it
+        Lower indices are happier :)
+
+        Each image is only decoded and scaled the first time it is needed;
+        after that, every sprite with the same anger level and size shares the
+        same surface, so it must not be drawn on.
+        """
+        key = (self.get_anger_level(), self.width, self.height)
+        if key not in _IMAGE_CACHE:
+            image = pygame.image.load(FIGURES[key[0]])
+            _IMAGE_CACHE[key] = pygame.transform.scale(image,
+                                                       (self.width,
+                                                        self.height))
+        return _IMAGE_CACHE[key]
+
+    def refresh(self) -> bool:
+        """Swap this sprite's image if its anger level has changed.
+
+        Return whether the image was swapped.
+        """
+        level = self.get_anger_level()
+        if level == self.anger_level:
+            return False
+        self.anger_level = level
+        self.image = self.load_image()
+        return True
+
+    def get_anger_level(self) -> int:
+        """Return the anger level of this sprite.
+
+        This determines the image used to render this sprite.
+
+        Anger level must be an integer between 0 and 4, inclusive.
+        (0 means not at all angry, 4 is very angry)
+        """
+        raise NotImplementedError
+
+
+class VisualElevator(ElevatorSprite):
+    """Sprite that draws an entities.Elevator.
+
+    The visualizer creates one of these for every elevator it shows, so the
+    simulation itself only ever deals with sprite-free entities.
+
+    === Attributes ===
+    entity: the elevator this sprite draws
+    """
+    entity: Elevator
+
+    def __init__(self, entity: Elevator) -> None:
+        self.entity = entity
+        super().__init__()
+
+    def fullness(self) -> float:
+        """Return the fraction of the drawn elevator that is filled."""
+        return self.entity.fullness()
+
+
+class VisualPerson(PersonSprite):
+    """Sprite that draws an entities.Person.
+
+    === Attributes ===
+    entity: the person this sprite draws
+    round_num: the round the visualizer is currently showing
+    """
+    entity: Person
+    round_num: int
+
+    def __init__(self, entity: Person, round_num: int) -> None:
+        self.entity = entity
+        self.round_num = round_num
+        super().__init__()
+
+    def get_anger_level(self) -> int:
+        """Return the anger level of the drawn person in round_num."""
+        return self.entity.get_anger_level(self.round_num)
+
+
+class CrowdBadge(pygame.sprite.Sprite):
+    """Sprite standing in for a whole crowd of people.
+
+    It shows how many people there are, over a bar split into the share of
+    them at each anger level.
+
+    === Attributes ===
+    count: the number of people shown
+    histogram: the number of people shown at each anger level, from 0 to 4
+    """
+    count: int
+    histogram: List[int]
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.count = -1
+        self.histogram = []
+        self.image = pygame.Surface([BADGE_WIDTH, BADGE_HEIGHT])
+        self.rect = self.image.get_rect()
+
+    def show(self, count: int, histogram: List[int]) -> bool:
+        """Show <count> people with the anger levels in <histogram>.
+
+        The image is only redrawn if something changed; return whether it was.
+        """
+        if count == self.count and histogram == self.histogram:
+            return False
+        self.count, self.histogram = count, list(histogram)
+
+        self.image.fill(WHITE)
+        pygame.draw.rect(self.image, BLACK, [0, 0, BADGE_WIDTH, BADGE_HEIGHT],
+                         2)
+        text = COMIC_SANS.render(str(count), True, BLACK)
+        self.image.blit(text, text.get_rect(centerx=BADGE_WIDTH // 2, top=2))
+
+        x = 2
+        bar_width = BADGE_WIDTH - 4
+        total = max(1, sum(histogram))
+        for level, people in enumerate(histogram):
+            width = bar_width * people // total
+            pygame.draw.rect(self.image, ANGER_COLOURS[level],
+                             [x, BADGE_HEIGHT - BADGE_BAR_HEIGHT - 2,
+                              width, BADGE_BAR_HEIGHT])
+            x += width
+        return True
+
+
+class FloorSprite(pygame.sprite.Sprite):
+    """Sprite that draws a floor of the building.
+    """
+    def __init__(self, width: int, height: int, y: int) -> None:
+        super().__init__()
+        self.image = pygame.Surface([width, height])
+        self.image.fill(WHITE)
+        self.image.set_colorkey(WHITE)
+        pygame.draw.rect(self.image, BLUE, [0, 0, width, FLOOR_BORDER_HEIGHT])
+        self.rect = self.image.get_rect()
+        self.rect.top = y
+
+
+class FloorNum(pygame.sprite.Sprite):
+    """Text Sprite to Label the floor number.
+    """
+    def __init__(self, floor_y: int, text: str) -> None:
+        super().__init__()
+        self.floor_font = COMIC_SANS
+        self.image = self.floor_font.render(text, True, BLACK)
+        self.rect = self.image.get_rect()
+        self.rect.bottom = floor_y
+        self.rect.right = WIDTH - 20
+
+
+class StatLine(pygame.sprite.Sprite):
+    """Text Sprite for displaying some text.
+    """
+    def __init__(self, y: int, text: str):
+        super().__init__()
+        self.floor_font = COMIC_SANS
+        self.image = self.floor_font.render(text, True, BLACK)
+        self.rect = self.image.get_rect()
+        self.rect.top = y
+        self.rect.left = 5
@@ -0,0 +1,171 @@
+"""CSC148 Assignment 1 - Wait time statistics
+
+=== Module Description ===
+This module contains WaitStats, an online accumulator for the wait times of
+the people who reach their target floor. It uses a fixed amount of memory no
+matter how many wait times are added: exact count, total, minimum, maximum and
+variance, plus a log-linear (HDR-style) histogram for percentiles.
+
+The histogram is exact for wait times below 2 ** PRECISION_BITS rounds. Larger
+wait times share buckets whose width is under 1 / 2 ** (PRECISION_BITS - 1) of
+their value, so a reported percentile is never more than that fraction above
+the true one.
+"""
+from __future__ import annotations
+import math
+from typing import Dict, Tuple, Union
+
+# Wait times below 2 ** PRECISION_BITS get a bucket each
+PRECISION_BITS = 7
+_HALF = 1 << (PRECISION_BITS - 1)
+
+
+def _bucket_of(value: int) -> int:
+    """Return the histogram bucket index of <value>.
+
+    Precondition: value >= 0
+    """
+    shift = max(0, value.bit_length() - PRECISION_BITS)
+    return shift * _HALF + (value >> shift)
+
+
+def _highest_in(bucket: int) -> int:
+    """Return the largest value that falls into histogram bucket <bucket>."""
+    if bucket < 2 * _HALF:
+        return bucket
+    shift = bucket // _HALF - 1
+    return ((bucket - shift * _HALF + 1) << shift) - 1
+
+
+class WaitStats:
+    """Running statistics of wait times.
+
+    Every statistic can be queried at any time, including in the middle of a
+    simulation run. Queries on an empty WaitStats return -1, like the
+    statistics reported by Simulation when nobody has reached their target.
+
+    === Attributes ===
+    count: the number of wait times added
+    total: the sum of the wait times added
+    min: the smallest wait time added, or -1 if count == 0
+    max: the largest wait time added, or -1 if count == 0
+
+    === Private Attributes ===
+    _sum_sq: the sum of the squares of the wait times added
+    _buckets: the number of wait times in each non-empty histogram bucket
+
+    === Representation Invariants ===
+    count >= 0
+    count == sum(_buckets.values())
+    """
+    count: int
+    total: int
+    min: int
+    max: int
+    _sum_sq: int
+    _buckets: Dict[int, int]
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.min = -1
+        self.max = -1
+        self._sum_sq = 0
+        self._buckets = {}
+
+    def add(self, value: int, times: int = 1) -> None:
+        """Record the wait time <value>, <times> times.
+
+        Preconditions:
+            value >= 0
+            times >= 1
+        """
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += times
+        self.total += value * times
+        self._sum_sq += value * value * times
+        bucket = _bucket_of(value)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + times
+
+    def merge(self, other: WaitStats) -> None:
+        """Add every wait time recorded by <other> to this WaitStats."""
+        if other.count == 0:
+            return
+        if self.count == 0 or other.min < self.min:
+            self.min = other.min
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+        self._sum_sq += other._sum_sq
+        for bucket, times in other._buckets.items():
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + times
+
+    def get_state(self) -> Tuple[int, int, int, int, int, Dict[int, int]]:
+        """Return everything recorded, as built-in values that can be
+        pickled.
+        """
+        return (self.count, self.total, self.min, self.max, self._sum_sq,
+                dict(self._buckets))
+
+    def set_state(self, state: Tuple[int, int, int, int, int,
+                                     Dict[int, int]]) -> None:
+        """Replace everything recorded with <state>, returned by get_state.
+        """
+        self.count, self.total, self.min, self.max, self._sum_sq, buckets = \
+            state
+        self._buckets = dict(buckets)
+
+    def mean(self) -> float:
+        """Return the mean wait time."""
+        if self.count == 0:
+            return -1
+        return self.total / self.count
+
+    def variance(self) -> float:
+        """Return the (population) variance of the wait times."""
+        if self.count == 0:
+            return -1
+        # Exact integer arithmetic, so no cancellation error
+        return (self._sum_sq * self.count - self.total ** 2) / self.count ** 2
+
+    def percentile(self, percent: float) -> int:
+        """Return the wait time at the given percentile (nearest rank).
+
+        Precondition: 0 <= percent <= 100
+        """
+        if self.count == 0:
+            return -1
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                return min(_highest_in(bucket), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Union[int, float]]:
+        """Return all the statistics of the wait times recorded so far."""
+        variance = self.variance()
+        return {
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.mean(),
+            'stdev': math.sqrt(variance) if variance >= 0 else -1,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99)
+        }
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['math'],
+        'max-nested-blocks': 4,
+        'max-attributes': 12,
+        'disable': ['R0201']
+    })
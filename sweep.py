@@ -0,0 +1,195 @@
+"""CSC148 Assignment 1 - Experiment sweeps
+
+=== Module Description ===
+This module runs many headless simulations, one per combination of a grid of
+building configurations, arrival generators, moving algorithms and random
+seeds. The runs are spread over a pool of worker processes, and each run's
+statistics are reported as soon as it finishes, as one row of a single table.
+
+Arrival generators are given as short strings so they can be sent to worker
+processes and written to the results table:
+
+    random:N      RandomArrivals with N people per round
+    file:PATH     FileArrivals reading the CSV file PATH
+    stream:PATH   StreamingFileArrivals reading the CSV file PATH
+    trace:PATH    TraceArrivals reading the binary trace file PATH
+
+Moving algorithms are given by the names in ALGORITHMS.
+
+A run that raises an error does not stop the sweep: it is reported as a row
+with its parameters, no statistics and the error in the error column.
+
+Run this module as a script to sweep a grid from the command line, e.g.
+
+    python sweep.py --floors 6 12 --elevators 2 4 --arrivals random:2 \\
+        --algorithms pushy short_sighted --seeds 0 1 2 -o results.csv
+"""
+from __future__ import annotations
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import csv
+import itertools
+import random
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import algorithms
+from simulation import Simulation
+
+ALGORITHMS = {
+    'random': algorithms.RandomAlgorithm,
+    'pushy': algorithms.PushyPassenger,
+    'short_sighted': algorithms.ShortSighted
+}
+
+# The columns of the results table: the run's parameters, then its statistics,
+# then the error that made it fail (empty if it did not)
+PARAMS = ['num_floors', 'num_elevators', 'elevator_capacity', 'arrivals',
+          'algorithm', 'seed', 'num_rounds']
+STATS = ['total_people', 'people_completed', 'max_time', 'min_time',
+         'avg_time', 'p95_time']
+ERROR = 'error'
+
+
+def make_arrivals(spec: str, max_floor: int) -> algorithms.ArrivalGenerator:
+    """Return the arrival generator described by <spec> for a building with
+    <max_floor> floors.
+
+    Raise ValueError if <spec> is not a valid arrival generator description.
+    """
+    kind, _, arg = spec.partition(':')
+    if kind == 'random' and arg.isdigit():
+        return algorithms.RandomArrivals(max_floor, int(arg))
+    if kind == 'file' and arg:
+        return algorithms.FileArrivals(max_floor, arg)
+    if kind == 'stream' and arg:
+        return algorithms.StreamingFileArrivals(max_floor, arg)
+    if kind == 'trace' and arg:
+        # Only imported when needed, like the visualizer in Simulation
+        from traces import TraceArrivals
+        return TraceArrivals(max_floor, arg)
+    raise ValueError(f'invalid arrival generator {spec!r}')
+
+
+def grid(num_floors: Iterable[int],
+         num_elevators: Iterable[int],
+         elevator_capacity: Iterable[int],
+         arrivals: Iterable[str],
+         algorithm: Iterable[str],
+         seed: Iterable[int],
+         num_rounds: int) -> Iterator[Dict[str, Any]]:
+    """Yield the parameters of every combination of the given values."""
+    for combination in itertools.product(num_floors, num_elevators,
+                                         elevator_capacity, arrivals,
+                                         algorithm, seed):
+        yield dict(zip(PARAMS, combination + (num_rounds,)))
+
+
+def run_one(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one headless simulation with the parameters <params> (a dict with
+    the keys in PARAMS), and return <params> together with its statistics.
+    """
+    random.seed(params['seed'])
+    generator = make_arrivals(params['arrivals'], params['num_floors'])
+    sim = Simulation({
+        'num_floors': params['num_floors'],
+        'num_elevators': params['num_elevators'],
+        'elevator_capacity': params['elevator_capacity'],
+        'arrival_generator': generator,
+        'moving_algorithm': ALGORITHMS[params['algorithm']](),
+        'visualize': False
+    })
+    stats = sim.run(params['num_rounds'])
+    if hasattr(generator, 'close'):
+        generator.close()
+
+    row = dict(params)
+    for key in STATS[:-1]:
+        row[key] = stats[key]
+    row['p95_time'] = sim.wait_summary()['p95']
+    return row
+
+
+def error_row(params: Dict[str, Any], error: str) -> Dict[str, Any]:
+    """Return the results table row of the run with the parameters <params>
+    that failed with <error>.
+    """
+    row = dict(params)
+    row[ERROR] = error
+    return row
+
+
+def describe_error(error: BaseException) -> str:
+    """Return <error> as it is shown in the error column: its type and
+    message, on one line.
+    """
+    return f'{type(error).__name__}: {error}'
+
+
+def sweep(runs: Iterable[Dict[str, Any]],
+          workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Run every simulation in <runs> on <workers> processes (one per CPU by
+    default), and yield each run's results as soon as it finishes.
+
+    A run that raises an error yields an error_row instead.
+    """
+    with ProcessPoolExecutor(workers) as pool:
+        futures = {pool.submit(run_one, params): params for params in runs}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as error:  # Reported in the table instead
+                yield error_row(futures[future], describe_error(error))
+
+
+def add_grid_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the command line options describing a grid of runs to <parser>.
+    """
+    parser.add_argument('--floors', type=int, nargs='+', default=[6])
+    parser.add_argument('--elevators', type=int, nargs='+', default=[2])
+    parser.add_argument('--capacity', type=int, nargs='+', default=[3])
+    parser.add_argument('--arrivals', nargs='+', default=['random:2'])
+    parser.add_argument('--algorithms', nargs='+', choices=ALGORITHMS,
+                        default=list(ALGORITHMS))
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('-o', '--output', default='-',
+                        help='CSV file to write, or - for standard output')
+
+
+def grid_from_arguments(args: argparse.Namespace) -> Iterator[Dict[str, Any]]:
+    """Return the grid of runs described by the parsed options <args>."""
+    return grid(args.floors, args.elevators, args.capacity, args.arrivals,
+                args.algorithms, args.seeds, args.rounds)
+
+
+def write_table(rows: Iterable[Dict[str, Any]], output: str) -> None:
+    """Write <rows> as a CSV results table to the file <output> (standard
+    output if it is -), one row at a time as they come.
+    """
+    out = sys.stdout if output == '-' else open(output, 'w', newline='')
+    try:
+        writer = csv.DictWriter(out, PARAMS + STATS + [ERROR])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def _main(argv: List[str]) -> None:
+    """Run the sweep described by the command line arguments <argv>, writing
+    the results table as CSV.
+    """
+    parser = argparse.ArgumentParser(
+        prog=argv[0], description='Run a grid of headless simulations.')
+    add_grid_arguments(parser)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv[1:])
+    write_table(sweep(grid_from_arguments(args), args.workers), args.output)
+
+
+if __name__ == '__main__':
+    _main(sys.argv)
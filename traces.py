@@ -0,0 +1,298 @@
+"""CSC148 Assignment 1 - Binary arrival traces
+
+=== Module Description ===
+This module contains a compact binary format for arrival traces, a converter
+from the CSV format read by FileArrivals, and TraceArrivals, an
+ArrivalGenerator that memory-maps a trace file and slices out each round's
+arrivals without any parsing. Since the file is mapped read-only, every worker
+process running the same trace shares a single copy of it in the page cache.
+
+A trace file is laid out as follows, with all integers little-endian:
+
+    header   8-byte magic b'ELVTRACE', uint32 version, uint32 reserved,
+             uint64 number of rounds R, uint64 number of people N
+    offsets  int64[R + 1]; the arrivals of round r are entries
+             offsets[r] to offsets[r + 1] - 1 of the two arrays below
+    starts   int32[N], the start floor of every person
+    targets  int32[N], the target floor of every person
+
+People are stored grouped by round, in the order they appear in the CSV file.
+Unlike FileArrivals, several CSV lines for the same round add up instead of
+replacing each other.
+
+Run this module as a script to convert a CSV file:
+
+    python traces.py arrivals.csv arrivals.trace
+"""
+from __future__ import annotations
+from array import array
+import bisect
+import csv
+import mmap
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from algorithms import ArrivalGenerator, open_arrivals_file
+from entities import Person
+
+MAGIC = b'ELVTRACE'
+VERSION = 1
+_HEADER = struct.Struct('<8sIIQQ')
+
+
+def convert_csv(csv_filename: str, trace_filename: str) -> None:
+    """Convert the arrivals CSV file <csv_filename> into a trace file.
+
+    The CSV file may be gzip or xz compressed. It is read twice: once to
+    count the arrivals in each round, and once to write every person straight
+    into their place in the output file, so memory is only needed for the
+    per-round counts.
+
+    Raise ValueError if the file has a line for a negative round.
+
+    Precondition:
+        <csv_filename> refers to a valid CSV file, following the specified
+        format and restrictions from the assignment handout.
+    """
+    counts: Dict[int, int] = {}
+    with open_arrivals_file(csv_filename) as csvfile:
+        for line in csv.reader(csvfile):
+            if line:
+                ln = int(line[0])
+                if ln < 0:
+                    raise ValueError(f'{csv_filename} has arrivals for '
+                                     f'round {ln}')
+                counts[ln] = counts.get(ln, 0) + (len(line) - 1) // 2
+
+    num_rounds = max(counts) + 1 if counts else 0
+    offsets = array('q', [0] * (num_rounds + 1))
+    for ln in range(num_rounds):
+        offsets[ln + 1] = offsets[ln] + counts.get(ln, 0)
+    num_people = offsets[num_rounds]
+
+    size = _HEADER.size + 8 * (num_rounds + 1) + 8 * num_people
+    with open(trace_filename, 'w+b') as out:
+        out.truncate(size)
+        out.write(_HEADER.pack(MAGIC, VERSION, 0, num_rounds, num_people))
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        out.write(offsets.tobytes())
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        out.flush()
+        if num_people == 0:
+            return
+
+        with mmap.mmap(out.fileno(), size) as mapped, \
+                memoryview(mapped) as buffer:
+            starts, targets = _people_views(buffer, num_rounds, num_people)
+            # The next free slot of every round
+            cursor = offsets[:num_rounds]
+            with open_arrivals_file(csv_filename) as csvfile:
+                for line in csv.reader(csvfile):
+                    if not line:
+                        continue
+                    ln = int(line[0])
+                    for i in range(1, len(line)-1, 2):
+                        pos = cursor[ln]
+                        starts[pos] = _to_little(int(line[i]))
+                        targets[pos] = _to_little(int(line[i+1]))
+                        cursor[ln] = pos + 1
+            starts.release()
+            targets.release()
+
+
+def _to_little(value: int) -> int:
+    """Return the native int32 whose bytes are <value> in little-endian."""
+    if sys.byteorder == 'little':
+        return value
+    return struct.unpack('=i', struct.pack('<i', value))[0]
+
+
+def _people_views(buffer: memoryview, num_rounds: int,
+                  num_people: int) -> Tuple[memoryview, memoryview]:
+    """Return int32 views of the starts and targets arrays in <buffer>, the
+    whole contents of a trace file.
+    """
+    begin = _HEADER.size + 8 * (num_rounds + 1)
+    middle = begin + 4 * num_people
+    return (buffer[begin:middle].cast('i'),
+            buffer[middle:middle + 4 * num_people].cast('i'))
+
+
+class TraceFile:
+    """A read-only, memory-mapped arrival trace file.
+
+    === Attributes ===
+    filename: the name of the trace file
+    num_rounds: one more than the last round with arrivals in the trace
+    num_people: the number of arrivals in the trace
+
+    === Private Attributes ===
+    _file: the open trace file
+    _map: the read-only memory map of _file
+    _offsets: the offsets array of the trace
+    _starts: the start floors of the trace
+    _targets: the target floors of the trace
+    """
+    filename: str
+    num_rounds: int
+    num_people: int
+
+    def __init__(self, filename: str) -> None:
+        """Open and map the trace file <filename>.
+
+        Raise ValueError if <filename> is not a trace file.
+        """
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        header = self._file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            self._file.close()
+            raise ValueError(f'{filename} is not an arrival trace file')
+        magic, version, _, self.num_rounds, self.num_people = \
+            _HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            self._file.close()
+            raise ValueError(f'{filename} is not an arrival trace file')
+
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._map)
+        self._offsets = \
+            buffer[_HEADER.size:_HEADER.size + 8 * (self.num_rounds + 1)] \
+            .cast('q')
+        self._starts, self._targets = _people_views(buffer, self.num_rounds,
+                                                    self.num_people)
+        if sys.byteorder != 'little':
+            # Byte-swapped copies; only little-endian hosts get zero-copy
+            self._offsets, self._starts, self._targets = [
+                _swapped(view)
+                for view in (self._offsets, self._starts, self._targets)]
+
+    def arrivals(self, round_num: int) -> Tuple[memoryview, memoryview]:
+        """Return the start and target floors of the people arriving in
+        round <round_num>, as two int32 views into the mapped file.
+        """
+        if not 0 <= round_num < self.num_rounds:
+            return self._starts[0:0], self._targets[0:0]
+        begin = self._offsets[round_num]
+        end = self._offsets[round_num + 1]
+        return self._starts[begin:end], self._targets[begin:end]
+
+    def arrivals_between(self, first: int, end: int
+                         ) -> Tuple[memoryview, memoryview, memoryview]:
+        """Return the arrivals of rounds <first> up to but not including
+        <end>, as three views into the mapped file: the offsets of the rounds
+        in the trace among them, and the start and target floors of everyone
+        arriving in those rounds.
+
+        Round first + i's people are at offsets[i] - offsets[0] up to
+        offsets[i + 1] - offsets[0] in the floor views. Rounds past the end
+        of the trace have no arrivals, and no offsets.
+
+        Precondition: 0 <= first <= end.
+        """
+        first = min(first, self.num_rounds)
+        end = min(end, self.num_rounds)
+        offsets = self._offsets[first:end + 1]
+        begin = offsets[0]
+        stop = offsets[-1]
+        return offsets, self._starts[begin:stop], self._targets[begin:stop]
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round from <round_num> on with arrivals, or None
+        if there is none.
+        """
+        if not 0 <= round_num < self.num_rounds:
+            return None
+        # Offsets only grow, and first grow after a round with arrivals
+        end = bisect.bisect_right(self._offsets, self._offsets[round_num],
+                                  lo=round_num)
+        if end > self.num_rounds:
+            return None
+        return end - 1
+
+    def close(self) -> None:
+        """Unmap and close the trace file, if it is still open.
+
+        Views returned by arrivals must not be used after this.
+        """
+        if self._file.closed:
+            return
+        for view in (self._offsets, self._starts, self._targets):
+            view.release()
+        self._map.close()
+        self._file.close()
+
+
+def _swapped(view: memoryview) -> memoryview:
+    """Return a native-endian copy of the little-endian integers in <view>."""
+    copy = array(view.format, view.tobytes())
+    copy.byteswap()
+    return memoryview(copy)
+
+
+class TraceArrivals(ArrivalGenerator):
+    """Generate arrivals from a binary trace file (see convert_csv).
+
+    Each round's arrivals are sliced out of the memory-mapped file, so loading
+    a trace is effectively free, however long it is. A TraceArrivals can be
+    pickled (for example to send it to a worker process); the copy maps the
+    same file again. Simulation.run closes it at its end, unmapping the file.
+
+    === Attributes ===
+    trace: the memory-mapped trace file
+    """
+    trace: TraceFile
+
+    def __init__(self, max_floor: int, filename: str) -> None:
+        """Initialize a new TraceArrivals reading from <filename>.
+
+        The num_people attribute is set to None, since the number of arrivals
+        depends on the given file.
+        """
+        ArrivalGenerator.__init__(self, max_floor, None)
+        self.trace = TraceFile(filename)
+
+    def __getstate__(self) -> Tuple[int, str]:
+        return self.max_floor, self.trace.filename
+
+    def __setstate__(self, state: Tuple[int, str]) -> None:
+        self.__init__(*state)
+
+    def generate(self, round_num: int) -> Dict[int, List[Person]]:
+        """Generate the new arrivals for the given round_num from the trace.
+        """
+        new_arrivals = {}
+        for i in range(1, self.max_floor+1):
+            new_arrivals[i] = []
+
+        starts, targets = self.trace.arrivals(round_num)
+        for start, target in zip(starts, targets):
+            new_arrivals[start].append(Person(start, target))
+        return new_arrivals
+
+    def next_arrival_round(self, round_num: int) -> Optional[int]:
+        """Return the first round from round_num on with arrivals in the
+        trace, or None if there is none.
+        """
+        return self.trace.next_arrival_round(max(round_num, 0))
+
+    def close(self) -> None:
+        """Unmap and close the trace file."""
+        self.trace.close()
+
+
+def _main(argv: List[str]) -> Optional[str]:
+    """Convert the CSV file named in <argv> and return None, or return a
+    usage message if <argv> is not valid.
+    """
+    if len(argv) != 3:
+        return f'usage: {argv[0]} ARRIVALS.csv[.gz|.xz] OUTPUT.trace'
+    convert_csv(argv[1], argv[2])
+    return None
+
+
+if __name__ == '__main__':
+    sys.exit(_main(sys.argv))
@@ -0,0 +1,1189 @@
+"""CSC148 Assignment 1 - Vectorized simulation engine
+
+=== Module Description ===
+This module contains engines that keep their state as NumPy arrays instead of
+Person and Elevator objects, and run each stage of a round as a handful of
+array operations over everyone in the building at once.
+
+BatchSimulation steps several independent buildings in lockstep: every array
+has a leading building dimension, and one call to step advances every
+building by one round, so the interpreter overhead of a round is paid once for
+the whole batch. Elevators are moved by a BatchPolicy, which sees a
+BatchObservation of all the buildings and returns the moves of all their
+elevators at once. VectorSimulation is the single-building case, with the same
+interface as Simulation. Both report exactly the same statistics as
+Simulation for the built-in moving algorithms, whose rules are reimplemented
+here as batch policies.
+
+Elevator e of building b has the global index b * num_elevators + e, and
+floor f of building b has the global key b * (num_floors + 1) + f, so the
+buildings can share one set of arrays without mixing. Nobody is stored as an
+object:
+
+    - Arrivals are generated as arrays, many rounds ahead at a time where
+      nothing else draws from their random numbers: RandomArrivals by
+      replaying the random module's draws with RandomStreams, TraceArrivals
+      by slicing the mapped trace, and FileArrivals from arrays built once.
+    - Each floor's waiting queue is a ring buffer of people, with the head
+      and tail counts of everyone who has joined and left it, so joining and
+      boarding only ever write and read at the two ends.
+    - Each elevator has one slot per place, holding the target floor, the
+      arrival round and the boarding order of its rider, or the target
+      _NOBODY if it is empty.
+
+A waiting person is one integer: (arrival round << _FLOOR_BITS) | target.
+
+Replaying the random module's draws relies on how CPython's random module
+turns its generator's outputs into numbers (its _randbelow and sample), which
+are not part of its documented interface. So when this module is imported,
+it draws a few numbers both ways and compares them; if they differ,
+SEED_IDENTICAL is False and a RuntimeWarning is issued. The engines then
+still draw uniformly at random, so their results are statistically
+equivalent to Simulation's, but they no longer match it seed for seed.
+
+The per-round cost is a few dozen NumPy calls whatever the size of the
+building, against Simulation's Python work per person and elevator, so this
+only wins on large, busy buildings (or large batches): on small buildings,
+Simulation is faster. bench.py --engines measures both and checks that they
+agree.
+"""
+from __future__ import annotations
+import random
+from typing import Any, Dict, List, Optional, Tuple
+import warnings
+
+import numpy as np
+
+import algorithms
+from stats import WaitStats
+from traces import TraceArrivals
+
+# The bits of a waiting person's integer holding their target floor
+_FLOOR_BITS = 24
+
+# The starting length of every floor's ring buffer; they double when needed
+_INITIAL_QUEUE = 16
+
+# Rounds of arrivals generated at a time, and the most people in them
+_CHUNK_ROUNDS = 1024
+_CHUNK_PEOPLE = 1 << 18
+
+# Wait times kept before they are added to the running statistics
+_PENDING_WAITS = 1 << 16
+
+# The random outputs read ahead for each random number sequence
+_READ_AHEAD = 4096
+
+# The randbelow calls whose outputs are searched together
+_CALLS = 16
+
+# random.sample picks 2 of this many or fewer from a pool (else a set)
+_POOL_SIZE = 21
+
+# The target floor of an empty elevator slot, further than any floor
+_NOBODY = 1 << 40
+
+
+class RandomStreams:
+    """The random number sequences of a batch of buildings, read as arrays.
+
+    Each sequence starts from the state of a random module generator (the
+    random module itself, or a random.Random) and gives exactly the numbers
+    that generator would: randbelow stands in for its _randbelow, which
+    randint, randrange and sample are made of. NumPy's MT19937 produces the
+    same 32-bit outputs from the same state, so the outputs are read ahead
+    in blocks, and each call looks through them with array operations.
+
+    === Private Attributes ===
+    _words: the outputs read ahead, one row per sequence
+    _next: the index in _words of the next unused output of each sequence
+    _bits: NumPy's generator of each sequence
+    _bases: the state of each generator at the start of its row of _words
+    _gauss: the gauss_next part of each sequence's starting state
+
+    === Representation Invariants ===
+    0 <= _next[i] <= _words.shape[1] for every sequence i
+    """
+    _words: np.ndarray
+    _next: np.ndarray
+    _bits: List[np.random.MT19937]
+    _bases: List[Dict[str, Any]]
+    _gauss: List[Optional[float]]
+
+    def __init__(self, states: List[Tuple[Any, ...]]) -> None:
+        """Initialize one sequence for each state in <states>, as returned by
+        random.getstate or random.Random.getstate.
+        """
+        self._words = np.zeros((len(states), _READ_AHEAD), dtype=np.int64)
+        self._next = np.zeros(len(states), dtype=np.int64)
+        self._bits = []
+        self._bases = []
+        self._gauss = []
+        for row, (_, internal, gauss) in enumerate(states):
+            bits = np.random.MT19937()
+            bits.state = {'bit_generator': 'MT19937',
+                          'state': {'key': np.array(internal[:-1],
+                                                    dtype=np.uint32),
+                                    'pos': internal[-1]}}
+            self._bits.append(bits)
+            self._bases.append(bits.state)
+            self._gauss.append(gauss)
+            self._refill(row)
+
+    def state(self, row: int) -> Tuple[Any, ...]:
+        """Return the state of sequence <row> after the numbers used so far,
+        for random.setstate or random.Random.setstate.
+        """
+        bits = np.random.MT19937()
+        bits.state = self._bases[row]
+        bits.random_raw(int(self._next[row]))
+        state = bits.state['state']
+        return (3, tuple(state['key'].tolist()) + (int(state['pos']),),
+                self._gauss[row])
+
+    def randbelow(self, limits: np.ndarray,
+                  rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return one row of numbers for each sequence in <rows> (every
+        sequence by default), drawn like a call to _randbelow(limit) for each
+        limit in the matching row of <limits>, in order.
+
+        Precondition: every limit is at least 1.
+        """
+        limits = np.asarray(limits, dtype=np.int64)
+        if rows is None:
+            rows = np.arange(len(limits))
+        numbers = np.empty_like(limits)
+        for first in range(0, limits.shape[1], _CALLS):
+            part = limits[:, first:first + _CALLS]
+            numbers[:, first:first + _CALLS] = self._draw(part, rows)
+        return numbers
+
+    def _draw(self, limits: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Return randbelow(limits, rows), for at most _CALLS limits a row.
+
+        Every call takes the first output from its sequence's position on
+        whose top k bits are below its limit, where k is the bit length of
+        the limit. Where that output is, for every call and every position,
+        comes out of one running minimum, so each call only has to look it
+        up at the position the previous call left its sequence at.
+        """
+        num_calls = limits.shape[1]
+        shifts = (32 - np.frexp(limits)[1])[:, :, None]
+        everyone = np.arange(len(rows))
+        # Each call takes two outputs on average, at worst
+        width = 2 * num_calls + 32
+        while True:
+            self._reserve(rows, width)
+            window = self._words[rows[:, None],
+                                 self._next[rows][:, None] + np.arange(width)]
+            candidates = window[:, None, :] >> shifts
+            found = np.where(candidates < limits[:, :, None],
+                             np.arange(width), width)
+            found = np.minimum.accumulate(found[:, :, ::-1],
+                                          axis=2)[:, :, ::-1]
+            found = np.concatenate(
+                (found, np.full(found.shape[:2] + (1,), width)), axis=2)
+
+            numbers = np.empty_like(limits)
+            position = np.zeros(len(rows), dtype=np.int64)
+            for call in range(num_calls):
+                taken = found[everyone, call, position]
+                numbers[:, call] = candidates[everyone, call,
+                                              np.minimum(taken, width - 1)]
+                position = np.minimum(taken + 1, width)
+            if (taken < width).all():
+                self._next[rows] += position
+                return numbers
+            width *= 2
+
+    def sample_pairs(self, row: int, count: int,
+                     size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the two numbers of each of <count> calls to
+        sample(range(1, size + 1), 2) on sequence <row>, in order.
+
+        The calls are found all at once, by following the chain of positions
+        each call leaves the sequence at (see _chain).
+
+        Precondition: size >= 2
+        """
+        if count == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        width = 4 * count + 64
+        while True:
+            here, words = self._read(row, width)
+            if size <= _POOL_SIZE:
+                # Draw from a pool, the second time from the size - 1
+                # numbers left after moving the top one into the gap
+                firsts = words >> (32 - size.bit_length())
+                seconds = words >> (32 - (size - 1).bit_length())
+                next_first = _next_true(firsts < size)
+                next_second = _next_true(seconds < size - 1)
+                starts = _chain(next_second[next_first + 1] + 1, count)
+                first_at = next_first[starts]
+                second_at = next_second[first_at + 1]
+                if second_at[-1] < width:
+                    picks = firsts[first_at]
+                    others = seconds[second_at]
+                    others = np.where(others == picks, size - 1, others)
+                    used = int(second_at[-1]) + 1
+                    break
+            else:
+                # Draw from the whole range, again until the second differs
+                values = words >> (32 - size.bit_length())
+                accepted = np.flatnonzero(values < size)
+                values = values[accepted]
+                changes = np.flatnonzero(values[1:] != values[:-1]) + 1
+                differs = np.append(changes, len(values))[
+                    np.searchsorted(changes, np.arange(len(values) + 2),
+                                    side='right')]
+                starts = _chain(differs + 1, count)
+                second_at = differs[starts]
+                if second_at[-1] < len(values):
+                    picks = values[starts]
+                    others = values[second_at]
+                    used = int(accepted[second_at[-1]]) + 1
+                    break
+            width *= 2
+        self._skip(row, here, used)
+        return picks + 1, others + 1
+
+    def samples(self, rows: np.ndarray, count: int,
+                size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the two numbers of each of <count> calls to
+        sample(range(1, size + 1), 2) on each sequence in <rows>, as two
+        arrays with one row per sequence.
+
+        Precondition: size >= 2
+        """
+        if size <= _POOL_SIZE:
+            limits = np.tile([size, size - 1], (len(rows), count))
+            numbers = self.randbelow(limits, rows)
+            picks = numbers[:, 0::2]
+            others = numbers[:, 1::2]
+            others = np.where(others == picks, size - 1, others)
+            return picks + 1, others + 1
+
+        picks = np.empty((len(rows), count), dtype=np.int64)
+        others = np.empty((len(rows), count), dtype=np.int64)
+        limit = np.full((len(rows), 1), size)
+        for call in range(count):
+            picks[:, call] = self.randbelow(limit, rows)[:, 0]
+            others[:, call] = self.randbelow(limit, rows)[:, 0]
+            again = np.flatnonzero(others[:, call] == picks[:, call])
+            while len(again) > 0:
+                others[again, call] = self.randbelow(limit[again],
+                                                     rows[again])[:, 0]
+                again = again[others[again, call] == picks[again, call]]
+        return picks + 1, others + 1
+
+    def _reserve(self, rows: np.ndarray, count: int) -> None:
+        """Make sure that at least <count> outputs are read ahead for every
+        sequence in <rows>.
+        """
+        if count > self._words.shape[1]:
+            self._words = np.zeros((len(self._words), 2 * count),
+                                   dtype=np.int64)
+            for row in range(len(self._words)):
+                self._refill(row)
+            return
+        short = rows[self._next[rows] + count > self._words.shape[1]]
+        for row in np.unique(short).tolist():
+            self._refill(row)
+
+    def _refill(self, row: int) -> None:
+        """Drop the used outputs of sequence <row>, and read ahead from its
+        next unused output on.
+        """
+        bits = self._bits[row]
+        bits.state = self._bases[row]
+        bits.random_raw(int(self._next[row]))
+        self._bases[row] = bits.state
+        self._words[row] = bits.random_raw(self._words.shape[1]).view(np.int64)
+        self._next[row] = 0
+
+    def _read(self, row: int, count: int) -> Tuple[Dict[str, Any],
+                                                   np.ndarray]:
+        """Return the generator state of sequence <row> at its next unused
+        output, and <count> outputs from there on, leaving the sequence
+        where it is.
+        """
+        bits = self._bits[row]
+        bits.state = self._bases[row]
+        bits.random_raw(int(self._next[row]))
+        here = bits.state
+        return here, bits.random_raw(count).view(np.int64)
+
+    def _skip(self, row: int, here: Dict[str, Any], used: int) -> None:
+        """Move sequence <row> past the <used> outputs from the generator
+        state <here>, its next unused output.
+        """
+        bits = self._bits[row]
+        bits.state = here
+        bits.random_raw(used)
+        self._bases[row] = bits.state
+        self._next[row] = 0
+        self._words[row] = bits.random_raw(self._words.shape[1]).view(np.int64)
+
+
+class BatchObservation:
+    """What a BatchPolicy sees of a batch of buildings, after boarding.
+
+    Every array has one row per building. The passenger targets are only
+    worked out the first time they are asked for.
+
+    === Attributes ===
+    max_floor: the top floor of every building
+    floors: the floor each elevator is on
+    loads: the number of people in each elevator
+    waiting: the number of people waiting on each floor (column 0 unused)
+    first_targets: the target floor of the first passenger (the one who has
+                   been on longest) of each elevator, or 0 if it is empty
+    closest_targets: the passenger target floor closest to each elevator,
+                     the lower one if two are equally close, or 0 if it is
+                     empty
+    randoms: the random number sequences, one per building (the first
+             num_buildings of them)
+
+    === Private Attributes ===
+    _riders: the target floor in each elevator's slots, one row per
+             elevator (_NOBODY for an empty slot)
+    _orders: when the rider in each slot boarded
+    _first: first_targets, once worked out
+    _closest: closest_targets, once worked out
+    """
+    max_floor: int
+    floors: np.ndarray
+    loads: np.ndarray
+    waiting: np.ndarray
+    randoms: RandomStreams
+    _riders: np.ndarray
+    _orders: np.ndarray
+    _first: Optional[np.ndarray]
+    _closest: Optional[np.ndarray]
+
+    def __init__(self, max_floor: int, floors: np.ndarray, loads: np.ndarray,
+                 waiting: np.ndarray, randoms: RandomStreams,
+                 riders: np.ndarray, orders: np.ndarray) -> None:
+        self.max_floor = max_floor
+        self.floors = floors
+        self.loads = loads
+        self.waiting = waiting
+        self.randoms = randoms
+        self._riders = riders
+        self._orders = orders
+        self._first = None
+        self._closest = None
+
+    @property
+    def first_targets(self) -> np.ndarray:
+        if self._first is None:
+            riders = self._riders
+            first = riders[np.arange(len(riders)),
+                           np.where(riders < _NOBODY, self._orders,
+                                    _NOBODY).argmin(axis=1)]
+            self._first = np.where(first < _NOBODY, first, 0).reshape(
+                self.floors.shape)
+        return self._first
+
+    @property
+    def closest_targets(self) -> np.ndarray:
+        if self._closest is None:
+            floors = self.floors.reshape(-1, 1)
+            # Score targets by distance, breaking ties in favour of going
+            # down; nobody rides to the floor they are on, and empty slots
+            # score more than any rider
+            distances = self._riders - floors
+            best = (2 * np.abs(distances) + (distances > 0)).min(axis=1)
+            self._closest = np.where(
+                best < _NOBODY,
+                floors[:, 0] + ((best & 1) * 2 - 1) * (best >> 1),
+                0).reshape(self.floors.shape)
+        return self._closest
+
+
+class BatchPolicy:
+    """A moving algorithm for a batch of buildings.
+
+    === Attributes ===
+    draws_randoms: whether the policy draws from the buildings' random
+                   number sequences
+    """
+    draws_randoms = False
+
+    def move_elevators(self, observation: BatchObservation) -> np.ndarray:
+        """Return the move (-1 for down, 0 to stay, 1 for up) of every
+        elevator in every building, as an array shaped like
+        observation.floors.
+
+        Like the directions returned by MovingAlgorithm.move_elevators, each
+        move must keep its elevator between floor 1 and the top floor.
+        """
+        raise NotImplementedError
+
+
+class BatchRandom(BatchPolicy):
+    """RandomAlgorithm for a batch of buildings.
+
+    The moves of each building are drawn from its random number sequence
+    exactly as RandomAlgorithm's calls to randint would be.
+    """
+    draws_randoms = True
+
+    def move_elevators(self, observation: BatchObservation) -> np.ndarray:
+        floors = observation.floors
+        bottom = floors == 1
+        # randint(0, 1), randint(-1, 0) or randint(-1, 1)
+        limits = np.where(bottom | (floors == observation.max_floor), 2, 3)
+        return observation.randoms.randbelow(limits) - ~bottom
+
+
+class BatchPushy(BatchPolicy):
+    """PushyPassenger for a batch of buildings: head for the first
+    passenger's target, or else for the lowest floor with someone waiting.
+    """
+
+    def move_elevators(self, observation: BatchObservation) -> np.ndarray:
+        floors = observation.floors
+        called = observation.waiting > 0
+        levels = np.arange(called.shape[1])
+        # Down to the lowest floor with someone waiting, or else up if
+        # anyone is waiting higher up; far off where there is none
+        lowest = np.where(called, levels, 2 * len(levels)).min(axis=1)
+        highest = np.where(called, levels, -1).max(axis=1)
+        targets = np.where(lowest[:, None] < floors, lowest[:, None],
+                           np.where(highest[:, None] > floors,
+                                    highest[:, None], floors))
+        targets = np.where(observation.loads > 0, observation.first_targets,
+                           targets)
+        return np.sign(targets - floors)
+
+
+class BatchShortSighted(BatchPolicy):
+    """ShortSighted for a batch of buildings: head for the closest passenger
+    target (the lower one on a tie), or else for the closest floor with
+    someone waiting (the higher one on a tie).
+    """
+
+    def move_elevators(self, observation: BatchObservation) -> np.ndarray:
+        floors = observation.floors
+        called = observation.waiting > 0
+        levels = np.arange(called.shape[1])
+        # The closest floors with someone waiting at or above, and below,
+        # every floor; far off where there is none
+        far = 2 * called.shape[1]
+        at_or_above = np.minimum.accumulate(
+            np.where(called, levels, far)[:, ::-1], axis=1)[:, ::-1]
+        at_or_below = np.maximum.accumulate(np.where(called, levels, -far),
+                                            axis=1)
+
+        buildings = np.arange(len(floors))[:, None]
+        up = at_or_above[buildings, floors]
+        down = at_or_below[buildings, floors - 1]
+        targets = np.where(up - floors <= floors - down, up, down)
+        targets = np.where(called.any(axis=1)[:, None], targets, floors)
+        targets = np.where(observation.loads > 0,
+                           observation.closest_targets, targets)
+        return np.sign(targets - floors)
+
+
+# The batch version of each built-in moving algorithm
+POLICIES = {
+    algorithms.RandomAlgorithm: BatchRandom,
+    algorithms.PushyPassenger: BatchPushy,
+    algorithms.ShortSighted: BatchShortSighted
+}
+
+
+class _ArrivalChunk:
+    """The arrivals of every building in a run of rounds, ready to be added
+    to the waiting queues one round at a time.
+
+    Arrivals are in the order they join the queues: by round, then by floor
+    key, then in the order Simulation would queue them.
+
+    === Attributes ===
+    first: the first round of the chunk
+    end: the round after the last round of the chunk
+    keys: the floor key of each arrival
+    people: each arrival, as a waiting person's integer
+    ranks: the number of people before each arrival joining the same queue
+           in the same round
+    offsets: where each round's arrivals start, and where the last ends
+    queue_keys: the floor key of each queue people join in each round
+    queue_counts: the number of people joining each of those queues
+    queue_offsets: where each round's queues start, and where the last ends
+    counts: the number of arrivals in each round in each building
+    busiest: the most people joining any one queue in the chunk
+    """
+    first: int
+    end: int
+    keys: np.ndarray
+    people: np.ndarray
+    ranks: np.ndarray
+    offsets: List[int]
+    queue_keys: np.ndarray
+    queue_counts: np.ndarray
+    queue_offsets: List[int]
+    counts: np.ndarray
+    busiest: int
+
+    def __init__(self, first: int, end: int, num_buildings: int,
+                 num_keys: int, rounds: np.ndarray, keys: np.ndarray,
+                 targets: np.ndarray) -> None:
+        """Initialize the chunk of rounds <first> up to <end>, from the round
+        (relative to <first>), floor key and target of every arrival, in the
+        order Simulation would queue each floor's arrivals.
+        """
+        self.first = first
+        self.end = end
+        order = np.argsort(rounds * num_keys + keys, kind='stable')
+        rounds = rounds[order]
+        self.keys = keys[order]
+        self.people = ((first + rounds) << _FLOOR_BITS) | targets[order]
+
+        total = len(rounds)
+        changes = np.ones(total + 1, dtype=bool)
+        changes[1:-1] = (rounds[1:] != rounds[:-1]) | \
+            (self.keys[1:] != self.keys[:-1])
+        positions = np.arange(total)
+        self.ranks = positions - np.maximum.accumulate(
+            np.where(changes[:-1], positions, 0))
+        last = changes[1:]
+        self.queue_keys = self.keys[last]
+        self.queue_counts = self.ranks[last] + 1
+
+        round_range = np.arange(end - first + 1)
+        self.offsets = np.searchsorted(rounds, round_range).tolist()
+        self.queue_offsets = np.searchsorted(rounds[last],
+                                             round_range).tolist()
+        self.counts = np.bincount(
+            rounds * num_buildings + self.keys // (num_keys // num_buildings),
+            minlength=(end - first) * num_buildings).reshape(
+                end - first, num_buildings)
+        self.busiest = int(np.bincount(self.keys).max()) if total else 0
+
+
+class BatchSimulation:
+    """Several independent simulations of identical buildings, stepped in
+    lockstep on shared arrays.
+
+    Each building has its own arrival generator and its own random number
+    sequence, used for its RandomArrivals (unless that has an rng of its own)
+    and its random moves. If its configuration has a 'seed', a building's
+    sequence is that of random.seed(seed), and it gets exactly the results
+    of random.seed(seed) followed by Simulation.run. Otherwise the first
+    building continues the random module's sequence, so that a batch of one
+    matches Simulation, and run leaves the random module where Simulation.run
+    would; the other buildings' sequences are seeded from it.
+
+    Every building's random numbers are copied in at reset and drawn as
+    arrays: the random module and the arrival generators' rng attributes are
+    never drawn from or changed. Arrival generators other than RandomArrivals,
+    FileArrivals and TraceArrivals are asked for one round at a time, and
+    draw any random numbers they need from the random module itself.
+
+    === Attributes ===
+    num_buildings: the number of buildings
+    num_floors: the number of floors of every building
+    num_elevators: the number of elevators of every building
+    elevator_capacity: the number of people each elevator can hold
+    arrival_generators: the arrival generator of each building
+    policy: the batch moving algorithm moving every elevator
+    round_num: the number of rounds stepped since the last reset
+    floors: the floor each elevator is on, one row per building
+    loads: the number of people in each elevator, one row per building
+
+    === Private Attributes ===
+    _seeds: the seed of each building's random number sequence
+    _files: the round, start and target arrays of each building's
+            FileArrivals, by building
+    _floor_keys: the floor key of floor 0 of each building, as a column
+    _randoms: the random number sequences: one per building, then one per
+              RandomArrivals with an rng of its own
+    _arrival_rows: the sequence each building's RandomArrivals draws from,
+                   or None if its arrivals are not random
+    _chunk_rounds: the number of rounds of arrivals generated at a time
+    _chunk: the arrivals of the current run of rounds
+    _horizon: the round run stops at, or None when stepping
+    _queue: the ring buffer of each floor's waiting queue, by floor key
+    _head: the number of people who have left each floor's queue
+    _tail: the number of people who have joined each floor's queue
+    _riders: the target floor of the rider in each slot of each elevator,
+             one row per elevator, or _NOBODY if the slot is empty
+    _arrivals: the round the rider in each slot arrived in
+    _orders: when the rider in each slot boarded, as a value of _boardings
+    _boardings: the number of boardings so far
+    _generated: the number of people generated in each building
+    _waits: the wait times not yet added to _wait_stats, with the elevator
+            of each, in batches
+    _pending: the number of wait times in _waits
+    _wait_stats: running statistics of the wait times of the people who
+                 reached their target floor in each building
+
+    === Representation Invariants ===
+    num_floors >= 2
+    0 <= loads[b, e] <= elevator_capacity for every elevator
+    the length of every ring buffer is a power of 2, and at least the
+    length of every queue
+    """
+    num_buildings: int
+    num_floors: int
+    num_elevators: int
+    elevator_capacity: int
+    arrival_generators: List[algorithms.ArrivalGenerator]
+    policy: BatchPolicy
+    round_num: int
+    floors: np.ndarray
+    loads: np.ndarray
+    _seeds: List[Any]
+    _files: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]]
+    _floor_keys: np.ndarray
+    _randoms: RandomStreams
+    _arrival_rows: List[Optional[int]]
+    _chunk_rounds: int
+    _chunk: _ArrivalChunk
+    _horizon: Optional[int]
+    _queue: np.ndarray
+    _head: np.ndarray
+    _tail: np.ndarray
+    _riders: np.ndarray
+    _arrivals: np.ndarray
+    _orders: np.ndarray
+    _boardings: int
+    _generated: np.ndarray
+    _waits: List[Tuple[np.ndarray, np.ndarray]]
+    _pending: int
+    _wait_stats: List[WaitStats]
+
+    def __init__(self, configs: List[Dict[str, Any]]) -> None:
+        """Initialize one building for each configuration in <configs>.
+
+        The configurations are the same as for Simulation, and must agree on
+        everything but the arrival generator and the seed. The moving
+        algorithm may be a BatchPolicy or a built-in MovingAlgorithm.
+
+        Raise ValueError if the configurations disagree, or if the moving
+        algorithm has no batch version.
+        """
+        first = configs[0]
+        for key in ('num_floors', 'num_elevators', 'elevator_capacity'):
+            if any(config[key] != first[key] for config in configs):
+                raise ValueError(f'every building must have the same {key}')
+        if any(type(config['moving_algorithm']) is not
+               type(first['moving_algorithm']) for config in configs):
+            raise ValueError('every building must use the same moving '
+                             'algorithm')
+        if any(('seed' in config) != ('seed' in first) for config in configs):
+            raise ValueError('either every building or none must have a seed')
+
+        self.num_buildings = len(configs)
+        self.num_floors = first['num_floors']
+        self.num_elevators = first['num_elevators']
+        self.elevator_capacity = first['elevator_capacity']
+        self.arrival_generators = [config['arrival_generator']
+                                   for config in configs]
+        self.policy = _batch_policy(first['moving_algorithm'])
+        if 'seed' in first:
+            self._seeds = [config['seed'] for config in configs]
+        else:
+            self._seeds = []
+        self._files = {}
+        self._floor_keys = np.arange(self.num_buildings)[:, None] * \
+            (self.num_floors + 1)
+        self._horizon = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Empty every building, put every elevator on floor 1, and restart
+        the random number sequences.
+        """
+        shape = (self.num_buildings, self.num_elevators)
+        self.round_num = 0
+        self.floors = np.ones(shape, dtype=np.int64)
+        self.loads = np.zeros(shape, dtype=np.int64)
+        self._reset_arrivals()
+
+        num_keys = self.num_buildings * (self.num_floors + 1)
+        self._queue = np.zeros((num_keys, _INITIAL_QUEUE), dtype=np.int64)
+        self._head = np.zeros(num_keys, dtype=np.int64)
+        self._tail = np.zeros(num_keys, dtype=np.int64)
+        slots = (self.loads.size, self.elevator_capacity)
+        self._riders = np.full(slots, _NOBODY, dtype=np.int64)
+        self._arrivals = np.zeros(slots, dtype=np.int64)
+        self._orders = np.zeros(slots, dtype=np.int64)
+        self._boardings = 0
+        self._generated = np.zeros(self.num_buildings, dtype=np.int64)
+        self._waits = []
+        self._pending = 0
+        self._wait_stats = [WaitStats() for _ in range(self.num_buildings)]
+
+    def _reset_arrivals(self) -> None:
+        """Restart the random number sequences, and decide how the arrivals
+        of each building are generated.
+        """
+        if self._seeds:
+            states = [random.Random(seed).getstate() for seed in self._seeds]
+        else:
+            states = [random.getstate()]
+            seeder = random.Random()
+            seeder.setstate(states[0])
+            states.extend(random.Random(seeder.getrandbits(64)).getstate()
+                          for _ in range(self.num_buildings - 1))
+
+        self._arrival_rows = []
+        generic = False
+        shared = False
+        most = 1
+        for b, generator in enumerate(self.arrival_generators):
+            row = None
+            if isinstance(generator, algorithms.RandomArrivals):
+                if generator.num_people and generator.rng is not None:
+                    row = len(states)
+                    states.append(generator.rng.getstate())
+                elif generator.num_people:
+                    row = b
+                    shared = shared or self.policy.draws_randoms
+                most = max(most, generator.num_people or 0)
+            elif isinstance(generator, algorithms.FileArrivals):
+                if b not in self._files:
+                    self._files[b] = _file_arrays(generator)
+            elif not isinstance(generator, TraceArrivals):
+                generic = True
+            self._arrival_rows.append(row)
+        self._randoms = RandomStreams(states)
+
+        if shared or generic:
+            # Arrivals and moves take turns drawing random numbers, or the
+            # generator expects to be asked round by round
+            self._chunk_rounds = 1
+        else:
+            self._chunk_rounds = max(1, min(_CHUNK_ROUNDS,
+                                            _CHUNK_PEOPLE // most))
+        empty = np.zeros(0, dtype=np.int64)
+        self._chunk = _ArrivalChunk(0, 0, self.num_buildings,
+                                    self.num_buildings * (self.num_floors + 1),
+                                    empty, empty, empty)
+
+    ############################################################################
+    # Handle rounds of simulation.
+    ############################################################################
+    def run(self, num_rounds: int) -> List[Dict[str, int]]:
+        """Run every building for the given number of rounds from the start,
+        and return the statistics of each, as Simulation.run does.
+
+        Precondition: num_rounds >= 1.
+        """
+        self.reset()
+        self._horizon = num_rounds
+        try:
+            for _ in range(num_rounds):
+                self.step()
+        finally:
+            self._horizon = None
+        if not self._seeds:
+            random.setstate(self._randoms.state(0))
+        return self.stats()
+
+    def step(self) -> None:
+        """Advance every building by one round."""
+        if self.round_num >= self._chunk.end:
+            self._next_chunk()
+        self._generate_arrivals()
+        self._handle_leaving()
+        self._handle_boarding()
+        self.floors += self.policy.move_elevators(self.observe())
+        self.round_num += 1
+
+    def _next_chunk(self) -> None:
+        """Generate the arrivals of the next run of rounds."""
+        first = self.round_num
+        end = first + self._chunk_rounds
+        if self._horizon is not None:
+            end = max(first + 1, min(end, self._horizon))
+        parts = []
+        shared = {}
+        for b, generator in enumerate(self.arrival_generators):
+            row = self._arrival_rows[b]
+            if row is not None and self._chunk_rounds == 1:
+                # Drawn below, all buildings at once
+                shared.setdefault((generator.max_floor, generator.num_people),
+                                  []).append(b)
+            elif row is not None:
+                starts, targets = self._randoms.sample_pairs(
+                    row, (end - first) * generator.num_people,
+                    generator.max_floor)
+                rounds = np.repeat(np.arange(end - first),
+                                   generator.num_people)
+                parts.append((b, rounds, starts, targets))
+            elif isinstance(generator, TraceArrivals):
+                parts.append((b,) + _trace_arrays(generator, first, end))
+            elif isinstance(generator, algorithms.FileArrivals):
+                rounds, starts, targets = self._files[b]
+                lo, hi = np.searchsorted(rounds, [first, end])
+                parts.append((b, rounds[lo:hi] - first, starts[lo:hi],
+                              targets[lo:hi]))
+            elif not isinstance(generator, algorithms.RandomArrivals):
+                parts.append((b,) + _generated_arrays(generator, first, end))
+
+        for (max_floor, num_people), buildings in shared.items():
+            rows = np.array([self._arrival_rows[b] for b in buildings])
+            starts, targets = self._randoms.samples(rows, num_people,
+                                                    max_floor)
+            for b, floors, goals in zip(buildings, starts, targets):
+                parts.append((b, np.zeros(num_people, dtype=np.int64), floors,
+                              goals))
+
+        num_keys = self.num_buildings * (self.num_floors + 1)
+        if parts:
+            rounds = np.concatenate([part[1] for part in parts])
+            keys = np.concatenate(
+                [b * (self.num_floors + 1) + np.asarray(starts, dtype=np.int64)
+                 for b, _, starts, _ in parts])
+            targets = np.concatenate([np.asarray(part[3], dtype=np.int64)
+                                      for part in parts])
+        else:
+            rounds = keys = targets = np.zeros(0, dtype=np.int64)
+        self._chunk = _ArrivalChunk(first, end, self.num_buildings, num_keys,
+                                    rounds.astype(np.int64), keys, targets)
+        if self._chunk.busiest:
+            self._grow_queues(int((self._tail - self._head).max()) +
+                              self._chunk.busiest)
+
+    def _grow_queues(self, needed: int) -> None:
+        """Make every ring buffer at least <needed> long."""
+        length = self._queue.shape[1]
+        if needed <= length:
+            return
+        new_length = length
+        while new_length < needed:
+            new_length *= 2
+        keys = np.arange(len(self._queue))[:, None]
+        positions = self._head[:, None] + np.arange(length)
+        queue = np.zeros((len(self._queue), new_length), dtype=np.int64)
+        queue[keys, positions & (new_length - 1)] = \
+            self._queue[keys, positions & (length - 1)]
+        self._queue = queue
+
+    def _generate_arrivals(self) -> None:
+        """Add the people arriving in this round to the waiting queues."""
+        chunk = self._chunk
+        i = self.round_num - chunk.first
+        begin, end = chunk.offsets[i], chunk.offsets[i + 1]
+        if begin == end:
+            return
+        keys = chunk.keys[begin:end]
+        self._queue[keys, (self._tail[keys] + chunk.ranks[begin:end]) &
+                    (self._queue.shape[1] - 1)] = chunk.people[begin:end]
+        begin, end = chunk.queue_offsets[i], chunk.queue_offsets[i + 1]
+        self._tail[chunk.queue_keys[begin:end]] += \
+            chunk.queue_counts[begin:end]
+        self._generated += chunk.counts[i]
+
+    def _handle_leaving(self) -> None:
+        """Take everyone who reached their target floor off their elevator,
+        and record their wait times.
+        """
+        leaving = self._riders == self.floors.reshape(-1, 1)
+        if not leaving.any():
+            return
+        cars, slots = np.nonzero(leaving)
+        self._waits.append((self.round_num - self._arrivals[cars, slots],
+                            cars))
+        self._pending += len(cars)
+        self._riders[cars, slots] = _NOBODY
+        self.loads -= leaving.sum(axis=1).reshape(self.loads.shape)
+        if self._pending >= _PENDING_WAITS:
+            self._record_waits()
+
+    def _handle_boarding(self) -> None:
+        """Board waiting people first come, first served, filling the
+        elevators on each floor in order.
+
+        Each elevator takes the people in its floor's queue after those
+        taken by the elevators before it on the same floor, up to its free
+        places, and puts them in its empty slots in order.
+        """
+        keys = (self._floor_keys + self.floors).reshape(-1)
+        free = self.elevator_capacity - self.loads.reshape(-1)
+        # The elevators with free places on a floor where people wait, in
+        # order, and their floors
+        cars = np.flatnonzero((free > 0) &
+                              (self._tail[keys] > self._head[keys]))
+        if len(cars) == 0:
+            return
+        keys = keys[cars]
+        free = free[cars]
+
+        # The free places of the elevators before each on the same floor:
+        # a running total of free places, restarting at each floor
+        waiting = self._tail[keys] - self._head[keys]
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        shared = sorted_keys[1:] == sorted_keys[:-1]
+        if shared.any():
+            totals = np.cumsum(free[order]) - free[order]
+            firsts = np.flatnonzero(np.append(True, ~shared))
+            before = np.empty_like(free)
+            before[order] = totals - np.repeat(
+                totals[firsts], np.diff(np.append(firsts, len(order))))
+            count = np.maximum(np.minimum(free, waiting - before), 0)
+            start = self._head[keys] + before
+            np.add.at(self._head, keys, count)
+        else:
+            count = np.minimum(free, waiting)
+            start = self._head[keys]
+            self._head[keys] += count
+
+        # The elevator, slot and queue position of everyone boarding
+        empty = self._riders[cars] == _NOBODY
+        rank = np.cumsum(empty, axis=1) - 1
+        boarding, slots = np.nonzero(empty & (rank < count[:, None]))
+        positions = (start[boarding] + rank[boarding, slots]) & \
+            (self._queue.shape[1] - 1)
+        people = self._queue[keys[boarding], positions]
+
+        boarding_cars = cars[boarding]
+        self._riders[boarding_cars, slots] = people & ((1 << _FLOOR_BITS) - 1)
+        self._arrivals[boarding_cars, slots] = people >> _FLOOR_BITS
+        self._orders[boarding_cars, slots] = np.arange(
+            self._boardings, self._boardings + len(boarding))
+        self._boardings += len(boarding)
+        self.loads.reshape(-1)[cars] += count
+
+    def observe(self) -> BatchObservation:
+        """Return what a batch policy sees of the buildings right now."""
+        return BatchObservation(
+            self.num_floors, self.floors, self.loads,
+            (self._tail - self._head).reshape(self.num_buildings,
+                                              self.num_floors + 1),
+            self._randoms, self._riders, self._orders)
+
+    ############################################################################
+    # Statistics calculations
+    ############################################################################
+    def _record_waits(self) -> None:
+        """Add the wait times in _waits to the running statistics."""
+        if not self._waits:
+            return
+        waits = np.concatenate([waits for waits, _ in self._waits])
+        buildings = np.concatenate([cars for _, cars in self._waits]) // \
+            self.num_elevators
+        self._waits = []
+        self._pending = 0
+        # Count each (building, wait time) pair
+        span = int(waits.max()) + 1
+        pairs, times = np.unique(buildings * span + waits, return_counts=True)
+        for pair, count in zip(pairs.tolist(), times.tolist()):
+            self._wait_stats[pair // span].add(pair % span, count)
+
+    def wait_summaries(self) -> List[Dict[str, float]]:
+        """Report detailed wait time statistics for the people who have
+        reached their target floor so far in each building; see
+        WaitStats.summary.
+        """
+        self._record_waits()
+        return [wait_stats.summary() for wait_stats in self._wait_stats]
+
+    def stats(self) -> List[Dict[str, int]]:
+        """Report the statistics of each building, as Simulation.run does,
+        for the rounds stepped so far.
+        """
+        self._record_waits()
+        stats = []
+        generated_counts = self._generated.tolist()
+        for wait_stats, generated in zip(self._wait_stats, generated_counts):
+            if wait_stats.count == 0:
+                max_wait = min_wait = avg_wait = -1
+            else:
+                min_wait = wait_stats.min
+                max_wait = wait_stats.max
+                avg_wait = wait_stats.total // wait_stats.count
+            stats.append({
+                'num_iterations': self.round_num,
+                'total_people': generated,
+                'people_completed': wait_stats.count,
+                'max_time': max_wait,
+                'min_time': min_wait,
+                'avg_time': avg_wait
+            })
+        return stats
+
+
+class VectorSimulation:
+    """A simulation whose people and elevators are NumPy arrays.
+
+    This has the same interface as Simulation (without visualization), and
+    runs a BatchSimulation of one building.
+
+    === Attributes ===
+    num_floors: the number of floors
+    num_rounds: the number of rounds the simulation should run for
+
+    === Private Attributes ===
+    _batch: the batch of one building being simulated
+    """
+    num_floors: int
+    num_rounds: int
+    _batch: BatchSimulation
+
+    def __init__(self, config: Dict[str, Any]) -> None:
+        """Initialize a new simulation using the given configuration.
+
+        Raise ValueError if the moving algorithm has no batch version.
+        """
+        self.num_floors = config['num_floors']
+        self.num_rounds = 0
+        self._batch = BatchSimulation([config])
+
+    def run(self, num_rounds: int) -> Dict[str, int]:
+        """Run the simulation for the given number of rounds, and return the
+        same statistics as Simulation.run.
+
+        Precondition: num_rounds >= 1.
+        """
+        self.num_rounds = num_rounds
+        return self._batch.run(num_rounds)[0]
+
+    def wait_summary(self) -> Dict[str, float]:
+        """Report detailed wait time statistics for the people who have
+        reached their target floor so far; see WaitStats.summary.
+        """
+        return self._batch.wait_summaries()[0]
+
+
+def _batch_policy(algorithm: Any) -> BatchPolicy:
+    """Return <algorithm> if it is a BatchPolicy, or else the batch version of
+    the built-in MovingAlgorithm <algorithm>.
+
+    Raise ValueError if there is none.
+    """
+    if isinstance(algorithm, BatchPolicy):
+        return algorithm
+    if type(algorithm) not in POLICIES:
+        raise ValueError(f'{type(algorithm).__name__} has no batch version')
+    return POLICIES[type(algorithm)]()
+
+
+def _next_true(mask: np.ndarray) -> np.ndarray:
+    """Return the index of the first True in <mask> at or after every index
+    up to len(mask) + 1, or len(mask) if there is none.
+    """
+    size = len(mask)
+    found = np.where(mask, np.arange(size), size)
+    found = np.minimum.accumulate(found[::-1])[::-1]
+    return np.append(found, [size, size])
+
+
+def _chain(successors: np.ndarray, count: int) -> np.ndarray:
+    """Return the first <count> positions of the chain starting at 0 and
+    going from each position p to successors[p].
+
+    Chains are followed by doubling: knowing the first 2 ** i positions and
+    where every position is 2 ** i steps on, one lookup gives the next
+    2 ** i positions, and another where every position is 2 ** (i + 1)
+    steps on.
+
+    Precondition: successors[successors[p]] is a valid index for every p.
+    """
+    positions = np.zeros(1, dtype=np.int64)
+    jumps = successors
+    while len(positions) < count:
+        positions = np.concatenate((positions, jumps[positions]))
+        jumps = jumps[jumps]
+    return positions[:count]
+
+
+def _file_arrays(generator: algorithms.FileArrivals
+                 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the round, start floor and target floor of everyone in
+    <generator>'s file, by round and then in file order.
+    """
+    rounds = []
+    starts = []
+    targets = []
+    for round_num in sorted(generator.arrivals):
+        for person in generator.arrivals[round_num]:
+            rounds.append(round_num)
+            starts.append(person.start)
+            targets.append(person.target)
+    return (np.array(rounds, dtype=np.int64), np.array(starts, dtype=np.int64),
+            np.array(targets, dtype=np.int64))
+
+
+def _trace_arrays(generator: TraceArrivals, first: int,
+                  end: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the round (relative to <first>), start floor and target floor of
+    everyone arriving in rounds <first> up to <end> in <generator>'s trace.
+    """
+    offsets, starts, targets = generator.trace.arrivals_between(first, end)
+    counts = np.diff(np.frombuffer(offsets, dtype=np.int64))
+    rounds = np.repeat(np.arange(len(counts)), counts)
+    return (rounds, np.frombuffer(starts, dtype=np.int32),
+            np.frombuffer(targets, dtype=np.int32))
+
+
+def _generated_arrays(generator: algorithms.ArrivalGenerator, first: int,
+                      end: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the round (relative to <first>), start floor and target floor of
+    everyone <generator> generates for rounds <first> up to <end>.
+    """
+    rounds = []
+    starts = []
+    targets = []
+    for round_num in range(first, end):
+        arrivals = generator.generate(round_num)
+        if arrivals is None:
+            continue
+        for people in arrivals.values():
+            for person in people:
+                rounds.append(round_num - first)
+                starts.append(person.start)
+                targets.append(person.target)
+    return (np.array(rounds, dtype=np.int64), np.array(starts, dtype=np.int64),
+            np.array(targets, dtype=np.int64))
+
+
+def _matches_random() -> bool:
+    """Return whether RandomStreams draws exactly the numbers the random
+    module does, and leaves its sequence in the same state.
+    """
+    limits = [2, 3, 5, 21, 22, 100, 1000, 2 ** 20 + 1]
+    sizes = [2, 7, 20, 21, 22, 200]
+    expected = random.Random(148)
+    want = [expected.randrange(limit) for limit in limits]
+    for size in sizes:
+        for _ in range(2 * _CALLS):
+            want.extend(expected.sample(range(1, size + 1), 2))
+
+    streams = RandomStreams([random.Random(148).getstate()])
+    got = streams.randbelow(np.array([limits]))[0].tolist()
+    rows = np.zeros(1, dtype=np.int64)
+    for size in sizes:
+        picks, others = streams.sample_pairs(0, _CALLS, size)
+        got.extend(number for pair in zip(picks.tolist(), others.tolist())
+                   for number in pair)
+        picks, others = streams.samples(rows, _CALLS, size)
+        got.extend(number for pair in zip(picks[0].tolist(),
+                                          others[0].tolist())
+                   for number in pair)
+    return got == want and streams.state(0) == expected.getstate()
+
+
+# Whether the engines draw exactly the random numbers Simulation would
+SEED_IDENTICAL = _matches_random()
+if not SEED_IDENTICAL:
+    warnings.warn('this Python\'s random module draws numbers differently '
+                  'from vector_engine.RandomStreams, so the vectorized '
+                  'engines will not match Simulation seed for seed',
+                  RuntimeWarning)
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['random', 'numpy', 'algorithms', 'stats', 'traces'],
+        'max-nested-blocks': 4,
+        'max-attributes': 25,
+        'disable': ['R0201']
+    })
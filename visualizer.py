@@ -1,222 +1,689 @@
-"""CSC148 Assignment 1 - Visualizer
-
-=== CSC148 Fall 2018 ===
-Department of Computer Science,
-University of Toronto
-
-=== Module Description ===
-
-This file contains the Visualizer class, which is responsible for interacting
-with Pygame, the graphics library we're using for this assignment.
-There's quite a bit in this file, but you aren't responsible for most of it.
-
-DO NOT CHANGE ANY CODE IN THIS FILE. You don't need to for this assignment,
-and in fact you aren't even submitting this file!
-"""
-from __future__ import annotations
-import random
-import time
-from typing import Dict, List
-
-import pygame
-from algorithms import Direction
-import sprites
-
-
-# Colour constants
-WHITE = (255, 255, 255)
-
-# Dimensions for various objects
-WIDTH = 900               # Screen width
-STAT_WINDOW_HEIGHT = 100  # Space at the top for stats and messages
-FLOOR_HEIGHT = 100        # The height of each floor (including the border)
-FLOOR_BORDER_HEIGHT = 10  # The height of the border
-
-# FPS based on config speed
-FPS = 60
-
-
-class Visualizer:
-    """Visualizer for the current state of a simulation.
-
-    All attributes of this class are private; you are not responsible for
-    understanding them, and they are left undocumented.
-    """
-    def __init__(self,
-                 elevators: List[sprites.ElevatorSprite],
-                 num_floors: int,
-                 visualize: bool) -> None:
-        """Initialize this visualization.
-
-        If visualize is False, this instance does nothing.
-        """
-        self._visualize = visualize
-        if not self._visualize:
-            return
-
-        self._num_elevators = len(elevators)
-        self._num_floors = num_floors
-
-        # pygame stuff
-        pygame.init()
-        self._clock = pygame.time.Clock()
-
-        self._screen = pygame.display.set_mode(
-            (WIDTH, self._total_height()), pygame.HWSURFACE | pygame.DOUBLEBUF)
-        self._screen.fill(WHITE)
-
-        # Contains all sprites in the simulation
-        self._sprite_group = pygame.sprite.Group()
-        self._stats_group = pygame.sprite.Group()
-
-        self._setup_sprites(elevators)
-        # Initial render.
-        self.render()
-
-    def render_header(self, round_num: int) -> None:
-        """Render text displaying the round number for this simulation."""
-        if not self._visualize:
-            return
-        self._stats_group.remove(list(self._stats_group))
-        self._stats_group.add(sprites.StatLine(0, f'Round {round_num}'))
-        for sprite in self._sprite_group:
-            if isinstance(sprite, sprites.PersonSprite):
-                sprite.image = sprite.load_image()
-        self.render()
-
-    def _total_height(self) -> int:
-        """Return the screen height for this visualization."""
-        return self._num_floors * FLOOR_HEIGHT + STAT_WINDOW_HEIGHT
-
-    def get_y_of_floor(self, floor: int) -> int:
-        """Return the y-coordinate of the given floor."""
-        assert self._num_floors >= floor >= 1, f'{self._num_floors}, {floor}'
-        return (
-            self._total_height() -
-            (floor - 1) * FLOOR_HEIGHT -
-            FLOOR_BORDER_HEIGHT
-        )
-
-    def render(self) -> None:
-        """Draw the current state of the simulation to the screen.
-        """
-        if not self._visualize:
-            return
-
-        # Need this on OSX due to pygame bug
-        pygame.event.peek(0)
-
-        self._screen.fill(WHITE)
-        self._sprite_group.draw(self._screen)
-        self._stats_group.draw(self._screen)
-        self._clock.tick(FPS)
-        pygame.display.flip()
-
-    def show_arrivals(self,
-                      arrivals: Dict[int, List[sprites.PersonSprite]]) -> None:
-        """Show new arrivals."""
-        if not self._visualize:
-            return
-
-        x = 10
-        for floor, people in arrivals.items():
-            y = self.get_y_of_floor(floor)
-            for person in people:
-                person.rect.bottom = y
-                person.rect.centerx = x + random.randint(-3, 3)
-                self._sprite_group.add(person)
-        self.render()
-
-    def show_boarding(self, person: sprites.PersonSprite,
-                      elevator: sprites.ElevatorSprite) -> None:
-        """Show boarding of the given person onto the given elevator.
-
-        Precondition: the given person is on the same floor as the elevator.
-        """
-        if not self._visualize:
-            return
-
-        from_x = 10
-        target_x = elevator.rect.centerx + random.randint(-3, 3)
-
-        for frame in range(21):  # Move in 20 seconds
-            person.rect.centerx = from_x + (target_x - from_x) * frame // 20
-            self.render()
-
-        elevator.update()
-        self.render()
-
-    def show_disembarking(self, person: sprites.PersonSprite,
-                          elevator: sprites.ElevatorSprite) -> None:
-        """Show disembarking of the given person from the given elevator."""
-        if not self._visualize:
-            return
-
-        from_x = person.rect.centerx
-        target_x = WIDTH - 10
-
-        elevator.update()
-
-        for frame in range(21):  # Move in 20 seconds
-            x = from_x + (target_x - from_x) * frame // 20
-            person.rect.centerx = x
-            self.render()
-
-    def show_elevator_moves(self,
-                            elevators: List['Elevator'],
-                            directions: List[Direction]) -> None:
-        """Show elevator moves. Note that all the elevators move at once."""
-        if not self._visualize:
-            return
-
-        for _ in range(20):  # Move in 20 seconds
-            for elevator, direction in zip(elevators, directions):
-                if direction == Direction.UP:
-                    step = - FLOOR_HEIGHT / 20
-                elif direction == Direction.DOWN:
-                    step = FLOOR_HEIGHT / 20
-                else:
-                    step = 0
-                elevator.rect.bottom += step
-                for passenger in elevator.passengers:
-                    passenger.rect.bottom += step
-
-            self.render()
-
-    def wait(self, wait_time: int) -> None:
-        """Wait for the specified amount of time, in seconds.
-
-        Only occurs if self.visualize is true, otherwise there's no need to
-        wait.
-        """
-        if self._visualize:
-            time.sleep(wait_time)
-
-    def _setup_sprites(self, elevators: List[sprites.ElevatorSprite]) -> None:
-        """Set up the initial sprites for this visualization.
-
-        Position them on the screen and spaces them based on:
-            Size of the screen
-            Number of each item
-        """
-        for i in range(1, self._num_floors + 1):
-            y = self.get_y_of_floor(i)
-            floor = sprites.FloorSprite(WIDTH, FLOOR_HEIGHT, y)
-            floor_num = sprites.FloorNum(y - 20, str(i))
-            self._sprite_group.add(floor_num)
-            self._sprite_group.add(floor)
-
-        for i, elevator in enumerate(elevators):
-            elevator.rect.centerx =\
-                (i + 1) * WIDTH // (self._num_elevators + 1)
-            elevator.rect.bottom = self._total_height() - FLOOR_BORDER_HEIGHT
-
-            self._sprite_group.add(elevator)
-
-
-if __name__ == '__main__':
-    import python_ta
-    python_ta.check_all(config={
-        'extra-imports': ['random', 'pygame', 'time', 'algorithms'],
-        'generated-members': 'pygame.*'
-    })
+"""CSC148 Assignment 1 - Visualizer
+
+=== CSC148 Fall 2018 ===
+Department of Computer Science,
+University of Toronto
+
+=== Module Description ===
+
+This file contains the Visualizer class, which is responsible for interacting
+with Pygame, the graphics library we're using for this assignment.
+There's quite a bit in this file, but you aren't responsible for most of it.
+
+Only simulations that are visualized import this module. See the Visualizer
+docstring for how it redraws the screen and plays rounds back.
+"""
+from __future__ import annotations
+from collections import deque
+import random
+import time
+from typing import (Callable, Deque, Dict, List, Optional, Sequence, Set,
+                    Tuple, TYPE_CHECKING)
+
+import pygame
+from algorithms import Direction
+from entities import Person, Elevator
+import sprites
+
+if TYPE_CHECKING:
+    from export import FrameExporter
+
+
+# Colour constants
+WHITE = (255, 255, 255)
+
+# Dimensions for various objects
+WIDTH = 900               # Screen width
+STAT_WINDOW_HEIGHT = 100  # Space at the top for stats and messages
+FLOOR_HEIGHT = 100        # The height of each floor (including the border)
+FLOOR_BORDER_HEIGHT = 10  # The height of the border
+
+# FPS based on config speed
+FPS = 60
+
+# Number of frames in each round's animation, at normal playback speed
+ANIMATION_FRAMES = 20
+
+# Most floors shown at once; taller buildings scroll
+VISIBLE_FLOORS = 8
+
+# Crowds of more people than this are drawn as a single badge
+CROWD_THRESHOLD = 12
+
+
+class Visualizer:
+    """Visualizer for the current state of a simulation.
+
+    All attributes of this class are private; you are not responsible for
+    understanding them, and they are left undocumented.
+
+    The public methods take simulation entities; the visualizer keeps the
+    sprite drawing each of them in _people and _elevators.
+
+    Boardings, disembarkings and elevator moves are not drawn right away:
+    the show_* methods queue them in _tweens, and animate plays everything
+    queued for the round together in a single ANIMATION_FRAMES loop.
+
+    The window shows at most visible_floors floors below the stats header;
+    the arrow keys, Page Up/Down and the mouse wheel scroll through taller
+    buildings. Sprite rects are in building coordinates; _top is the
+    building y-coordinate shown at the top of the viewport. Each frame only
+    redraws the screen areas of sprites that moved or changed (_dirty), and
+    only sprites inside the viewport (_visible) are ever drawn.
+
+    Once more than crowd_threshold people wait on a floor or ride an
+    elevator, they are drawn as one CrowdBadge showing their number and
+    anger levels instead of one sprite each. Only the last crowd_threshold
+    people to reach each floor stay on screen. The number of sprites, and
+    so the cost of drawing, is then bounded by the number of floors and
+    elevators however many people are in the building.
+
+    While drawing is turned off with set_drawing, the visualizer keeps its
+    sprites up to date but never touches the screen: animations jump straight
+    to their end, and the whole screen is redrawn once drawing resumes.
+
+    Playback is controlled by three options. playback_speed scales both the
+    animations and the pause of wait; float('inf') draws every round as a
+    single frame, with no pause and no frame rate limit. Only rounds from fast_forward on are drawn,
+    and of those only every frame_skip-th one; the other rounds are not
+    drawn at all and wait does not pause for them.
+
+    Given a FrameExporter, the visualizer opens no window: it draws onto an
+    offscreen surface as fast as it can and hands every frame to the
+    exporter instead of showing it, and wait never pauses.
+    """
+    def __init__(self,
+                 elevators: List[Elevator],
+                 num_floors: int,
+                 visualize: bool,
+                 visible_floors: int = VISIBLE_FLOORS,
+                 crowd_threshold: int = CROWD_THRESHOLD,
+                 playback_speed: float = 1.0,
+                 frame_skip: int = 1,
+                 fast_forward: int = 0,
+                 export: Optional[FrameExporter] = None) -> None:
+        """Initialize this visualization.
+
+        If visualize is False, this instance does nothing.
+
+        Preconditions:
+            playback_speed > 0
+            frame_skip >= 1
+        """
+        self._visualize = visualize
+        if not self._visualize:
+            return
+
+        self._num_elevators = len(elevators)
+        self._num_floors = num_floors
+
+        # pygame stuff
+        pygame.init()
+        self._clock = pygame.time.Clock()
+
+        # The viewport, and the screen areas of the header and the building
+        shown = min(num_floors, visible_floors)
+        self._header = pygame.Rect(0, 0, WIDTH, STAT_WINDOW_HEIGHT)
+        self._view = pygame.Rect(0, STAT_WINDOW_HEIGHT,
+                                 WIDTH, shown * FLOOR_HEIGHT)
+        self._top = self._max_top()
+
+        self._export = export
+        if export is None:
+            self._screen = pygame.display.set_mode(
+                (WIDTH, self._view.bottom),
+                pygame.HWSURFACE | pygame.DOUBLEBUF)
+        else:
+            self._screen = pygame.Surface((WIDTH, self._view.bottom))
+        self._screen.fill(WHITE)
+
+        # Contains all sprites in the simulation
+        self._sprite_group = pygame.sprite.Group()
+        self._stats_group = pygame.sprite.Group()
+
+        # Dirty-rect bookkeeping: the order sprites are drawn in, the
+        # sprites in the viewport, the screen rect each sprite was last drawn
+        # at, the sprites changed since the last frame, and whether the
+        # header or the whole screen must be redrawn
+        self._order: Dict[pygame.sprite.Sprite, int] = {}
+        self._next_order = 0
+        self._visible: Set[pygame.sprite.Sprite] = set()
+        self._drawn: Dict[pygame.sprite.Sprite, pygame.Rect] = {}
+        self._dirty: Dict[pygame.sprite.Sprite, None] = {}
+        self._header_dirty = False
+        self._redraw_all = True
+
+        # Playback: whether the screen is drawn at all, whether drawing is
+        # turned on (set_drawing) and whether the current round is shown.
+        # At unlimited speed, each round is drawn as one frame with no ticks
+        self._speed = playback_speed
+        self._unlimited = playback_speed == float('inf')
+        self._frames = max(1, round(ANIMATION_FRAMES / playback_speed))
+        self._frame_skip = frame_skip
+        self._fast_forward = fast_forward
+        self._drawing = True
+        self._enabled = True
+        self._round_shown = True
+
+        # Sprite positions are jittered with a random generator of their own
+        # (like in sprites), so drawing never changes the random numbers the
+        # simulation draws
+        self._jitter = random.Random()
+
+        # The round being shown, and the sprites drawing each entity
+        self._round = 0
+        self._people: Dict[Person, sprites.VisualPerson] = {}
+        self._elevators: Dict[Elevator, sprites.VisualElevator] = {}
+
+        # Crowds: the people waiting on each floor in arrival order (from
+        # the floor's head index on, so they can be binary searched), the
+        # sprites of the people who reached each floor, and the badges of the
+        # floors and elevators drawn as crowds
+        self._crowd_threshold = crowd_threshold
+        self._waiting: Dict[int, List[Person]] = {
+            floor: [] for floor in range(1, num_floors + 1)}
+        self._heads: Dict[int, int] = dict.fromkeys(range(1, num_floors + 1),
+                                                    0)
+        self._arrived: Dict[int, Deque[sprites.VisualPerson]] = {
+            floor: deque() for floor in range(1, num_floors + 1)}
+        self._floor_badges: Dict[int, sprites.CrowdBadge] = {}
+        self._elevator_badges: Dict[Elevator, sprites.CrowdBadge] = {}
+
+        # Queued animation: (sprite, rect attribute, start, end) tweens, and
+        # the elevators whose fullness changed
+        self._tweens: List[Tuple[pygame.sprite.Sprite, str, int, int]] = []
+        self._refill: Dict[sprites.VisualElevator, None] = {}
+
+        self._setup_sprites(elevators)
+        # Initial render.
+        self.render()
+
+    def render_header(self, round_num: int) -> None:
+        """Render text displaying the round number for this simulation."""
+        if not self._visualize:
+            return
+        self._stats_group.remove(list(self._stats_group))
+        self._stats_group.add(sprites.StatLine(0, f'Round {round_num}'))
+        self._header_dirty = True
+        self._round = round_num
+        self._round_shown = (
+            round_num >= self._fast_forward and
+            (round_num - self._fast_forward) % self._frame_skip == 0)
+        self._update_drawing()
+        for sprite in self._people.values():
+            sprite.round_num = round_num
+            if sprite.refresh():
+                self._dirty[sprite] = None
+        for floor in list(self._floor_badges):
+            self._update_floor(floor)
+        for elevator in list(self._elevator_badges):
+            self._update_elevator(elevator)
+        if not self._unlimited:
+            self.render()
+
+    def _total_height(self) -> int:
+        """Return the height of the whole building, including the header."""
+        return self._num_floors * FLOOR_HEIGHT + STAT_WINDOW_HEIGHT
+
+    def _max_top(self) -> int:
+        """Return the value of _top that shows the bottom of the building."""
+        return self._total_height() - self._view.height
+
+    def get_y_of_floor(self, floor: int) -> int:
+        """Return the y-coordinate of the given floor."""
+        assert self._num_floors >= floor >= 1, f'{self._num_floors}, {floor}'
+        return (
+            self._total_height() -
+            (floor - 1) * FLOOR_HEIGHT -
+            FLOOR_BORDER_HEIGHT
+        )
+
+    def render(self) -> None:
+        """Draw the current state of the simulation to the screen.
+
+        Only the parts of the screen covered by sprites that changed since the
+        last frame are redrawn, so the cost of a frame depends on what changed
+        on screen rather than on the size of the building.
+        """
+        if not self._visualize:
+            return
+        if not self._drawing:
+            # Everything is redrawn when drawing resumes
+            self._dirty.clear()
+            return
+
+        if self._export is None:
+            self._handle_events()
+
+        if self._redraw_all:
+            self._redraw_all = False
+            self._header_dirty = False
+            self._dirty.clear()
+            self._drawn.clear()
+            self._visible = {sprite for sprite in self._sprite_group
+                             if self._view.colliderect(self._on_screen(sprite))}
+            areas = [self._screen.get_rect()]
+        else:
+            areas = []
+            for sprite in self._dirty:
+                old = self._drawn.pop(sprite, None)
+                if old is not None:
+                    areas.append(old)
+                rect = self._on_screen(sprite)
+                if sprite.alive() and self._view.colliderect(rect):
+                    self._visible.add(sprite)
+                    areas.append(rect.clip(self._view))
+                else:
+                    self._visible.discard(sprite)
+            self._dirty.clear()
+            if self._header_dirty:
+                self._header_dirty = False
+                areas.append(self._header)
+
+        if areas:
+            self._draw_areas(areas)
+        if self._export is not None:
+            self._export.write(self._screen)
+            return
+        if not self._unlimited:
+            self._clock.tick(FPS)
+        if areas:
+            pygame.display.update(areas)
+
+    def set_drawing(self, drawing: bool) -> None:
+        """Turn drawing to the screen on or off.
+
+        This lets a caller catch up on many rounds quickly and only draw the
+        last one.
+        """
+        if not self._visualize:
+            return
+        self._enabled = drawing
+        self._update_drawing()
+
+    def _update_drawing(self) -> None:
+        """Work out whether to draw from set_drawing and the round shown."""
+        drawing = self._enabled and self._round_shown
+        if drawing and not self._drawing:
+            self._redraw_all = True
+        self._drawing = drawing
+
+    def _on_screen(self, sprite: pygame.sprite.Sprite) -> pygame.Rect:
+        """Return the screen rect of the building sprite <sprite>."""
+        return sprite.rect.move(0, self._view.top - self._top)
+
+    def _draw_areas(self, areas: List[pygame.Rect]) -> None:
+        """Redraw the given screen areas from scratch."""
+        visible = sorted(self._visible, key=self._order.__getitem__)
+        rects = [self._on_screen(sprite) for sprite in visible]
+
+        # The sprites to draw in each area, in drawing order
+        overlaps = [[] for _ in areas]
+        for i, rect in enumerate(rects):
+            for j in rect.collidelistall(areas):
+                overlaps[j].append(i)
+
+        for area, indices in zip(areas, overlaps):
+            self._screen.set_clip(area)
+            self._screen.fill(WHITE)
+            self._screen.set_clip(area.clip(self._view))
+            for i in indices:
+                self._screen.blit(visible[i].image, rects[i])
+                self._drawn[visible[i]] = rects[i]
+            self._screen.set_clip(area.clip(self._header))
+            self._stats_group.draw(self._screen)
+        self._screen.set_clip(None)
+
+    def _handle_events(self) -> None:
+        """Scroll the viewport in response to any pending input events."""
+        step = 0
+        for event in pygame.event.get():
+            if event.type == pygame.MOUSEWHEEL:
+                step -= event.y * FLOOR_HEIGHT
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_UP:
+                    step -= FLOOR_HEIGHT
+                elif event.key == pygame.K_DOWN:
+                    step += FLOOR_HEIGHT
+                elif event.key == pygame.K_PAGEUP:
+                    step -= self._view.height
+                elif event.key == pygame.K_PAGEDOWN:
+                    step += self._view.height
+        if step:
+            self.scroll_to(self._top + step)
+
+    def scroll_to(self, top: int) -> None:
+        """Scroll the viewport so the building y-coordinate <top> is at its
+        top, as far as the building allows.
+        """
+        if not self._visualize:
+            return
+        top = max(STAT_WINDOW_HEIGHT, min(top, self._max_top()))
+        if top != self._top:
+            self._top = top
+            self._redraw_all = True
+
+    def _add_sprite(self, sprite: pygame.sprite.Sprite) -> None:
+        """Add <sprite> to the building, drawn on top of every other sprite.
+        """
+        self._order[sprite] = self._next_order
+        self._next_order += 1
+        self._sprite_group.add(sprite)
+        self._dirty[sprite] = None
+
+    def _remove_sprite(self, sprite: pygame.sprite.Sprite) -> None:
+        """Remove <sprite> from the building."""
+        sprite.kill()
+        del self._order[sprite]
+        self._dirty[sprite] = None
+
+    def _place_person(self, person: Person, centerx: int,
+                      bottom: int) -> sprites.VisualPerson:
+        """Add and return a sprite for <person> at the given position."""
+        sprite = sprites.VisualPerson(person, self._round)
+        sprite.rect.bottom = bottom
+        sprite.rect.centerx = centerx + self._jitter.randint(-3, 3)
+        self._people[person] = sprite
+        self._add_sprite(sprite)
+        return sprite
+
+    def _drop_person(self, person: Person) -> None:
+        """Remove the sprite of <person>, if they have one."""
+        sprite = self._people.pop(person, None)
+        if sprite is not None:
+            self._remove_sprite(sprite)
+
+    def _update_floor(self, floor: int) -> None:
+        """Draw the people waiting on <floor> as a crowd badge if there are
+        more than crowd_threshold of them, or one by one otherwise.
+        """
+        queue = self._waiting[floor]
+        head = self._heads[floor]
+        y = self.get_y_of_floor(floor)
+        if len(queue) - head > self._crowd_threshold:
+            if floor not in self._floor_badges:
+                for person in queue[head:]:
+                    self._drop_person(person)
+                badge = sprites.CrowdBadge()
+                badge.rect.left = 2
+                badge.rect.bottom = y
+                self._floor_badges[floor] = badge
+                self._add_sprite(badge)
+            # People waiting longer are angrier, so anger levels only fall
+            # from the front of the queue to the back
+            histogram = [len(queue) - head]
+            for level in range(1, 5):
+                histogram.append(_count_prefix(
+                    queue, head,
+                    lambda p, lvl=level: p.get_anger_level(self._round) >= lvl))
+            histogram.append(0)
+            self._show_badge(self._floor_badges[floor],
+                             [histogram[i] - histogram[i + 1]
+                              for i in range(5)])
+        else:
+            if floor in self._floor_badges:
+                self._remove_sprite(self._floor_badges.pop(floor))
+            for person in queue[head:]:
+                if person not in self._people:
+                    self._place_person(person, 10, y)
+
+    def _update_elevator(self, elevator: Elevator) -> None:
+        """Draw the passengers of <elevator> as a crowd badge if there are
+        more than crowd_threshold of them, or one by one otherwise.
+        """
+        elevator_sprite = self._elevators[elevator]
+        if len(elevator.passengers) > self._crowd_threshold:
+            if elevator not in self._elevator_badges:
+                for person in elevator.passengers:
+                    self._drop_person(person)
+                badge = sprites.CrowdBadge()
+                badge.rect.center = elevator_sprite.rect.center
+                self._elevator_badges[elevator] = badge
+                self._add_sprite(badge)
+            histogram = [0] * 5
+            for person in elevator.passengers:
+                histogram[person.get_anger_level(self._round)] += 1
+            self._show_badge(self._elevator_badges[elevator], histogram)
+        else:
+            if elevator in self._elevator_badges:
+                self._remove_sprite(self._elevator_badges.pop(elevator))
+            for person in elevator.passengers:
+                if person not in self._people:
+                    self._place_person(person, elevator_sprite.rect.centerx,
+                                       elevator_sprite.rect.bottom)
+
+    def _show_badge(self, badge: sprites.CrowdBadge,
+                    histogram: List[int]) -> None:
+        """Show <histogram> on <badge>, redrawing it if it changed."""
+        if badge.show(sum(histogram), histogram):
+            self._dirty[badge] = None
+
+    def show_arrivals(self,
+                      arrivals: Dict[int, List[Person]]) -> None:
+        """Show new arrivals."""
+        if not self._visualize:
+            return
+
+        for floor, people in arrivals.items():
+            if people:
+                self._waiting[floor].extend(people)
+                self._update_floor(floor)
+        if not self._unlimited:
+            self.render()
+
+    def show_boarding(self, person: Person, elevator: Elevator) -> None:
+        """Queue the boarding of the given person onto the given elevator.
+
+        Precondition: the given person is on the same floor as the elevator.
+        """
+        if not self._visualize:
+            return
+
+        floor = person.start
+        queue = self._waiting[floor]
+        head = self._heads[floor]
+        if queue[head] is person:
+            head += 1
+            if head * 2 > len(queue):
+                # Drop the people who boarded once they are half the list
+                del queue[:head]
+                head = 0
+            self._heads[floor] = head
+        else:
+            queue.remove(person)
+        elevator_sprite = self._elevators[elevator]
+
+        if len(elevator.passengers) > self._crowd_threshold:
+            # The person just joins the elevator's crowd badge
+            self._drop_person(person)
+        else:
+            person_sprite = self._people.get(person)
+            if person_sprite is None:
+                person_sprite = self._place_person(person, 10,
+                                                   self.get_y_of_floor(floor))
+            target_x = elevator_sprite.rect.centerx + \
+                self._jitter.randint(-3, 3)
+            self._tweens.append((person_sprite, 'centerx',
+                                 person_sprite.rect.centerx, target_x))
+        self._refill[elevator_sprite] = None
+        self._update_elevator(elevator)
+        self._update_floor(floor)
+
+    def show_disembarking(self, person: Person, elevator: Elevator) -> None:
+        """Queue the disembarking of the given person from the given elevator.
+        """
+        if not self._visualize:
+            return
+
+        elevator_sprite = self._elevators[elevator]
+        person_sprite = self._people.get(person)
+        if person_sprite is None:
+            # The person was part of the elevator's crowd badge
+            person_sprite = self._place_person(person,
+                                               elevator_sprite.rect.centerx,
+                                               elevator_sprite.rect.bottom)
+        self._tweens.append((person_sprite, 'centerx',
+                             person_sprite.rect.centerx, WIDTH - 10))
+        self._refill[elevator_sprite] = None
+
+        # Only the latest people to arrive on each floor stay on screen
+        arrived = self._arrived[person.target]
+        arrived.append(person_sprite)
+        if len(arrived) > self._crowd_threshold:
+            self._drop_person(arrived.popleft().entity)
+        self._update_elevator(elevator)
+
+    def show_state(self, round_num: int,
+                   waiting: Dict[int, List[Person]]) -> None:
+        """Forget everything shown so far, and show round <round_num> with
+        <waiting> people on each floor and the elevators where they are now,
+        with their current passengers.
+
+        This lets a caller that missed rounds jump straight to the latest one
+        instead of replaying them.
+        """
+        if not self._visualize:
+            return
+
+        for sprite in [*self._people.values(), *self._floor_badges.values(),
+                       *self._elevator_badges.values()]:
+            self._remove_sprite(sprite)
+        self._people.clear()
+        self._floor_badges.clear()
+        self._elevator_badges.clear()
+        for floor in self._waiting:
+            self._waiting[floor].clear()
+            self._heads[floor] = 0
+            self._arrived[floor].clear()
+        self._tweens.clear()
+        self._refill.clear()
+
+        self.render_header(round_num)
+        for elevator, elevator_sprite in self._elevators.items():
+            elevator_sprite.rect.bottom = \
+                self.get_y_of_floor(elevator.current_floor)
+            elevator_sprite.update()
+            self._dirty[elevator_sprite] = None
+            self._update_elevator(elevator)
+        for floor, people in waiting.items():
+            self._waiting[floor].extend(people)
+            self._update_floor(floor)
+        self._redraw_all = True
+        self.render()
+
+    def show_elevator_moves(self,
+                            elevators: List[Elevator],
+                            directions: List[Direction]) -> None:
+        """Queue elevator moves. Note that all the elevators move at once."""
+        if not self._visualize:
+            return
+
+        for elevator, direction in zip(elevators, directions):
+            if direction == Direction.UP:
+                step = - FLOOR_HEIGHT
+            elif direction == Direction.DOWN:
+                step = FLOOR_HEIGHT
+            else:
+                continue
+            moving = [self._elevators[elevator]]
+            if elevator in self._elevator_badges:
+                moving.append(self._elevator_badges[elevator])
+            else:
+                moving.extend(self._people[passenger]
+                              for passenger in elevator.passengers)
+            for sprite in moving:
+                self._tweens.append((sprite, 'bottom', sprite.rect.bottom,
+                                     sprite.rect.bottom + step))
+
+    def animate(self) -> None:
+        """Play every queued boarding, disembarking and elevator move at once.
+
+        The animation takes ANIMATION_FRAMES frames at normal playback speed,
+        however many people and elevators move.
+        """
+        if not self._visualize:
+            return
+
+        for elevator_sprite in self._refill:
+            elevator_sprite.update()
+            self._dirty[elevator_sprite] = None
+        self._refill.clear()
+
+        if not self._drawing:
+            for sprite, attribute, _, end in self._tweens:
+                setattr(sprite.rect, attribute, end)
+            self._tweens.clear()
+        elif self._tweens:
+            # At unlimited speed only the last frame is drawn
+            first = self._frames if self._unlimited else 0
+            for frame in range(first, self._frames + 1):
+                for sprite, attribute, start, end in self._tweens:
+                    setattr(sprite.rect, attribute,
+                            start + (end - start) * frame // self._frames)
+                    self._dirty[sprite] = None
+                self.render()
+            self._tweens.clear()
+        else:
+            self.render()
+
+    def wait(self, wait_time: int) -> None:
+        """Wait for the specified amount of time, in seconds.
+
+        Only occurs if self.visualize is true and the current round is drawn,
+        otherwise there's no need to wait. The time is divided by the playback
+        speed.
+        """
+        if self._visualize and self._drawing and self._export is None:
+            time.sleep(wait_time / self._speed)
+
+    def _setup_sprites(self, elevators: List[Elevator]) -> None:
+        """Set up the initial sprites for this visualization.
+
+        Position them on the screen and spaces them based on:
+            Size of the screen
+            Number of each item
+        """
+        for i in range(1, self._num_floors + 1):
+            y = self.get_y_of_floor(i)
+            floor = sprites.FloorSprite(WIDTH, FLOOR_HEIGHT, y)
+            floor_num = sprites.FloorNum(y - 20, str(i))
+            self._add_sprite(floor_num)
+            self._add_sprite(floor)
+
+        for i, entity in enumerate(elevators):
+            elevator = sprites.VisualElevator(entity)
+            self._elevators[entity] = elevator
+            elevator.rect.centerx =\
+                (i + 1) * WIDTH // (self._num_elevators + 1)
+            elevator.rect.bottom = self._total_height() - FLOOR_BORDER_HEIGHT
+
+            self._add_sprite(elevator)
+
+
+def _count_prefix(people: Sequence[Person], start: int,
+                  holds: Callable[[Person], bool]) -> int:
+    """Return how many people from index <start> of <people> on satisfy
+    <holds>, before the first who does not.
+
+    <people> must be indexable in constant time, such as a list.
+
+    Precondition: once <holds> is False for someone in <people> from <start>
+    on, it is False for everyone after them.
+    """
+    low, high = start, len(people)
+    while low < high:
+        middle = (low + high) // 2
+        if holds(people[middle]):
+            low = middle + 1
+        else:
+            high = middle
+    return low - start
+
+
+if __name__ == '__main__':
+    import python_ta
+    python_ta.check_all(config={
+        'extra-imports': ['random', 'pygame', 'time', 'algorithms',
+                          'entities'],
+        'generated-members': 'pygame.*'
+    })